@@ -1,11 +1,56 @@
-from flask import Blueprint, render_template, abort, request
+from flask import Blueprint, render_template, abort, request, Response
+import math
 import numpy as np
 import json
+from tt.fluid_state import RankineCycle, SolverError
+from ._chart_data import encode_float32, encode_json
 
 Dampfturbine_routes = Blueprint('Dampfturbine', __name__, template_folder='templates')
 
+MAX_CYCLES = 200000
+# parameters of the cycle study and their defaults (bar, K)
+CYCLE_PARAMETERS = {'p_boiler': '80', 'T_live': '753.15', 'p_condenser': '0.08', 'eta_turbine': '1',
+                    'eta_pump': '1', 'p_reheat': None, 'T_reheat': None}
+
 
 @Dampfturbine_routes.route('/Dampfturbine')
 def main():
     return render_template('Dampfturbine/main.html')
 
+
+def _parameter_values(text: str) -> np.ndarray:
+    """'1.5' or a list '1,2,5' or a range 'start:stop:num', with at most MAX_CYCLES values."""
+    if ':' in text:
+        start, stop, num = text.split(':')
+        num = int(num)
+        if not 0 < num <= MAX_CYCLES:
+            raise ValueError(f'the number of values of a range must be between 1 and {MAX_CYCLES}, not {num}')
+        return np.linspace(float(start), float(stop), num)
+    values = text.split(',')
+    if len(values) > MAX_CYCLES:
+        raise ValueError(f'{len(values)} values are more than {MAX_CYCLES}')
+    return np.array([float(v) for v in values])
+
+
+@Dampfturbine_routes.route('/Dampfturbine/cycle')
+def cycle():
+    """Rankine cycles of all combinations of the parameters, e.g.
+    /Dampfturbine/cycle?p_boiler=20:200:46&T_live=600:900:46&p_condenser=0.05,0.1&eta_turbine=0.85
+
+    Every parameter of CYCLE_PARAMETERS is a value, a list or a range (see _parameter_values) in bar and K. The
+    results have one value per combination, the parameters vary in their order (the last fastest).
+    """
+    try:
+        axes = {name: _parameter_values(request.args.get(name, default)) for name, default in CYCLE_PARAMETERS.items()
+                if request.args.get(name, default) is not None}
+        shape = [len(a) for a in axes.values()]
+        if math.prod(shape) > MAX_CYCLES:
+            raise ValueError(f'{math.prod(shape)} combinations are more than {MAX_CYCLES}')
+        grids = np.meshgrid(*axes.values(), indexing='ij')
+        rankine = RankineCycle(**dict(zip(axes, grids)), backend=request.args.get('backend'))
+        data = {'parameters': axes, 'shape': shape, 'results': rankine.results()}
+    except (ValueError, SolverError) as e:
+        return Response(json.dumps({'error': f'no valid cycle -> {e}'}), status=400, mimetype='application/json')
+    if request.args.get('format') == 'float32':
+        return Response(encode_float32(data), mimetype='application/octet-stream')
+    return Response(encode_json(data), mimetype='application/json')
@@ -2,3 +2,4 @@ from ._main import main_routes, page_not_found, internal_server_error
 from ._eos import eos_routes
 from ._tt1 import tt1_routes
 from ._Dampfturbine import Dampfturbine_routes
+from ._jobs import jobs_routes
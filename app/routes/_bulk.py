@@ -0,0 +1,150 @@
+"""Bulk mode of the appendix table endpoints.
+
+The values of a POST request are read in chunks from a JSON array, CSV or little-endian float64 body, every chunk is
+interpolated at once and its rows are streamed back as NDJSON or CSV before the next chunk is read. So the memory of
+a request does not grow with its size.
+"""
+import codecs
+import itertools
+import json
+import numpy as np
+from flask import Response, request, stream_with_context
+
+CHUNK_SIZE = 8192  # values per chunk
+_BLOCK_SIZE = 65536  # bytes read from a text body at once
+_SEPARATORS = str.maketrans({',': ' ', ';': ' ', '[': ' ', ']': ' '})
+_CONTENT_TYPES = ['application/json', 'text/csv', 'text/plain', 'application/octet-stream']
+
+
+def read_binary(stream, chunk_size: int = CHUNK_SIZE):
+    """Yields arrays of little-endian float64 values from a byte stream."""
+    rest = b''
+    while True:
+        block = stream.read(8 * chunk_size - len(rest))
+        if not block:
+            break
+        data = rest + block
+        end = len(data) - len(data) % 8
+        if end:
+            yield np.frombuffer(data[:end], dtype='<f8').astype(float)
+        rest = data[end:]
+    if rest:
+        raise ValueError(f'the body is no float64 array, {len(rest)} bytes are left')
+
+
+def _parse(tokens: list) -> np.ndarray:
+    try:
+        return np.array(tokens, dtype=float)
+    except ValueError:
+        bad = next(t for t in tokens if not _is_number(t))
+        raise ValueError(f'{bad} is not a number') from None
+
+
+def _is_number(token: str) -> bool:
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+
+def read_text(stream, chunk_size: int = CHUNK_SIZE, skip_header: bool = False):
+    """Yields arrays of the numbers of a flat JSON array or a CSV body (separated by commas, semicolons or white
+    space). With skip_header a first line without numbers, e.g. the property name of a CSV column, is skipped, a first
+    line with numbers and other text raises a ValueError."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    rest, tokens, header = '', [], skip_header
+    while True:
+        block = stream.read(_BLOCK_SIZE)
+        text = rest + decoder.decode(block, final=not block)
+        if header:
+            if '\n' not in text and block:
+                rest = text
+                continue
+            first_line, _, remainder = text.partition('\n')
+            first_tokens = first_line.translate(_SEPARATORS).split()
+            numbers = [_is_number(t) for t in first_tokens]
+            if not any(numbers):
+                text = remainder
+            elif not all(numbers):
+                raise ValueError(f'the first line {first_line.strip()!r} is neither a header nor a line of numbers')
+            header = False
+        if block:
+            # the last token may continue in the next block
+            split = max(text.rfind(c) for c in ' \t\r\n,;[]') + 1
+            text, rest = text[:split], text[split:]
+        tokens.extend(text.translate(_SEPARATORS).split())
+        while len(tokens) >= chunk_size or (tokens and not block):
+            yield _parse(tokens[:chunk_size])
+            tokens = tokens[chunk_size:]
+        if not block:
+            break
+
+
+def read_values(chunk_size: int = CHUNK_SIZE):
+    """Yields the values of the body of the current request in arrays of at most chunk_size values."""
+    if request.mimetype == 'application/octet-stream':
+        return read_binary(request.stream, chunk_size)
+    return read_text(request.stream, chunk_size, skip_header=request.mimetype != 'application/json')
+
+
+def _error(message: dict, status: int = 400) -> Response:
+    return Response(json.dumps(message, ensure_ascii=False), status=status, mimetype='application/json')
+
+
+def stream_rows(interpolator, chunks, output_format: str = 'ndjson'):
+    """Yields the interpolated rows of all chunks of values as NDJSON or CSV text, one piece per chunk.
+
+    Values outside the table get empty (CSV) or null (NDJSON) properties, NDJSON has null for any value which is not
+    finite. An invalid value ends the stream with an error line, as the status of the response is already sent.
+    """
+    columns = interpolator.columns
+    key_index = columns.index(interpolator.key)
+    if output_format == 'csv':
+        row_format, replacements = ','.join(['%.12g'] * len(columns)), [('nan', '')]
+        yield ','.join(columns) + '\n'
+    else:
+        row_format = '{' + ', '.join(json.dumps(c).replace('%', '%%') + ': %.12g' for c in columns) + '}'
+        # JSON has no nan or infinity
+        replacements = [(': nan', ': null'), (': inf', ': null'), (': -inf', ': null')]
+    try:
+        for values in chunks:
+            rows = interpolator.columns_at(values, strict=False)
+            rows[key_index] = values
+            # one formatting operation for the whole chunk
+            text = (row_format + '\n') * rows.shape[1] % tuple(rows.T.ravel().tolist())
+            for replacement in replacements:
+                text = text.replace(*replacement)
+            yield text
+    except ValueError as e:
+        error = {'error': str(e)}
+        yield f'error,{json.dumps(str(e))}\n' if output_format == 'csv' else json.dumps(error) + '\n'
+
+
+def bulk_response(table, key: str) -> Response:
+    """Streams the properties of an appendix table (SaturatedWater, IdealGas) at all values of the request body.
+
+    The output is NDJSON or, with ?format=csv or Accept: text/csv, CSV.
+    """
+    if key not in table.properties:
+        return _error({'error': 'unknown property', 'property': key,
+                       'properties': [f'{p} in {u}' for p, u in table._prop_unit.items()]})
+    if request.mimetype not in _CONTENT_TYPES:
+        return _error({'error': f'content type {request.mimetype} is not supported', 'content_types': _CONTENT_TYPES},
+                      status=415)
+    output_format = request.args.get('format')
+    if output_format is None:
+        output_format = 'csv' if request.accept_mimetypes.best_match(['application/x-ndjson', 'text/csv']) == \
+            'text/csv' else 'ndjson'
+    if output_format not in ('csv', 'ndjson'):
+        return _error({'error': f'format must be csv or ndjson, not {output_format}'})
+    # the first chunk is read before the response, so a body which is no list of numbers from the start gets a 400
+    chunks = read_values()
+    try:
+        first = next(chunks, None)
+    except ValueError as e:
+        return _error({'error': str(e)})
+    chunks = chunks if first is None else itertools.chain([first], chunks)
+    rows = stream_rows(table.get_interpolator(key), chunks, output_format)
+    return Response(stream_with_context(rows), mimetype='text/csv' if output_format == 'csv' else
+                    'application/x-ndjson')
@@ -0,0 +1,118 @@
+"""Numeric series of a thermodynamic chart for drawing it in the browser.
+
+The saturation dome and the iso lines are sampled adaptively to a tolerance in pixels of the requested chart size,
+so the level of detail follows the width of the chart. The series are sent as JSON with 6 significant digits or
+as float32 binary: a little-endian uint32 with the length of a JSON header, the header (padded with spaces to a
+multiple of 4 bytes) and the float32 values. In the header every series is {"offset": i, "length": n} in values.
+"""
+import json
+import struct
+import numpy as np
+from pint.errors import PintError
+from tt.fluid_state import ureg, AbstractFluid, FluidState, FluidStateArray, IsoLineSampler, SolverError
+
+# errors of invalid chart definitions (e.g. unknown properties, units or states without solution), other errors are
+# bugs of the server
+INPUT_ERRORS = (ValueError, KeyError, SolverError, PintError)
+
+
+def _space_range(fluid: AbstractFluid, space_property: str) -> tuple:
+    """Default range of iso lines in the space property, the dome extended into the single phase regions."""
+    c = fluid.fluid_info.constants
+    unit = FluidState.property_info[space_property].coolprop_unit
+    if space_property == 'p':
+        return ureg.Quantity(c['p_triple'], unit), ureg.Quantity(4 * c['p_critical'], unit)
+    if space_property == 'T':
+        return ureg.Quantity(c['T_triple'], unit), ureg.Quantity(1.6 * c['T_critical'], unit)
+    values = [s.value(space_property) for s in (fluid.triple_point_liquid, fluid.triple_point_vapor,
+                                                fluid.critical_point)]
+    span = max(values) - min(values)
+    return ureg.Quantity(min(values) - 0.1 * span, unit), ureg.Quantity(max(values) + 0.5 * span, unit)
+
+
+def chart_data(fluid_name: str, x_property: str = 's', x_unit: str = None, y_property: str = 'T',
+               y_unit: str = None, x_log: bool = False, y_log: bool = False, isolines: dict = None,
+               states: list = None, size: tuple = (640, 480), pixels: float = 0.5, backend: str = None) -> dict:
+    """Series of the dome, the critical and triple points, iso lines and states of a chart as {'x': .., 'y': ..}.
+
+    isolines are {property: [values]} and states [{property: value}], both in the units of Properties.xlsx, which
+    are also the default units of the axes.
+    """
+    for pn in (x_property, y_property):
+        if pn not in FluidState.property_info:
+            raise ValueError(f'{pn} is not a possible property name of an axis')
+    fluid = AbstractFluid(fluid_name, backend)
+    x_unit = FluidState.property_info[x_property].unit if x_unit is None else ureg.Unit(x_unit)
+    y_unit = FluidState.property_info[y_property].unit if y_unit is None else ureg.Unit(y_unit)
+
+    def series(line) -> dict:
+        return {'x': np.asarray(line.get_property(x_property).to(x_unit).magnitude, dtype=float),
+                'y': np.asarray(line.get_property(y_property).to(y_unit).magnitude, dtype=float)}
+
+    sampler = IsoLineSampler.from_pixels(x_property, x_unit, y_property, y_unit, x_log, y_log, pixels, size,
+                                         max_points=4 * int(size[0]))
+    data = {'fluid': fluid_name,
+            'x': {'property': x_property, 'unit': f'{x_unit:~P}', 'log': x_log},
+            'y': {'property': y_property, 'unit': f'{y_unit:~P}', 'log': y_log},
+            'critical_point': series(FluidStateArray.from_states([fluid.critical_point])),
+            'triple_line': series(FluidStateArray.from_states([fluid.triple_point_liquid,
+                                                               fluid.triple_point_vapor])),
+            'dome': {branch: series(fluid.get_saturation_line(x, 'p', space='log', sampler=sampler))
+                     for branch, x in (('liquid', 0), ('vapor', 1))},
+            'isolines': [], 'states': []}
+
+    for iso_property, values in ({} if isolines is None else isolines).items():
+        info = FluidState.property_info.get(iso_property)
+        if info is None or not info.valid_input:
+            raise ValueError(f'{iso_property} is not a possible property of an iso line')
+        space_property = y_property if iso_property != y_property else x_property
+        space_min, space_max = _space_range(fluid, space_property)
+        space = 'log' if space_property == 'p' else 'linear'
+        for value in values:
+            line = fluid.get_iso_line(iso_property, ureg.Quantity(value, info.unit), space_property, space_min,
+                                      space_max, space, sampler=sampler)
+            data['isolines'].append({'property': iso_property, 'value': value, 'unit': f'{info.unit:~P}',
+                                     **series(line)})
+
+    for properties in [] if states is None else states:
+        data['states'].append({'properties': properties,
+                               **series(FluidStateArray.from_states([FluidState(fluid_name, properties,
+                                                                                backend=backend)]))})
+    return data
+
+
+def _encode(data) -> str:
+    """JSON with arrays written with 6 significant digits, nan as null."""
+    if isinstance(data, dict):
+        return '{' + ', '.join(f'{json.dumps(k)}: {_encode(v)}' for k, v in data.items()) + '}'
+    if isinstance(data, list):
+        return '[' + ', '.join(_encode(v) for v in data) + ']'
+    if isinstance(data, np.ndarray):
+        values = np.where(np.isfinite(data), data, np.nan).ravel().tolist()
+        return ('[' + ','.join(['%.6g'] * len(values)) % tuple(values) + ']').replace('nan', 'null')
+    return json.dumps(data, ensure_ascii=False)
+
+
+def encode_json(data: dict) -> bytes:
+    return _encode(data).encode()
+
+
+def encode_float32(data: dict) -> bytes:
+    """The binary format of the module docstring."""
+    arrays = []
+
+    def layout(value):
+        if isinstance(value, dict):
+            return {k: layout(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [layout(v) for v in value]
+        if isinstance(value, np.ndarray):
+            offset = sum(len(a) for a in arrays)
+            arrays.append(value.ravel())
+            return {'offset': offset, 'length': value.size}
+        return value
+
+    header = json.dumps(layout(data), ensure_ascii=False).encode()
+    header += b' ' * (-len(header) % 4)
+    values = np.concatenate(arrays).astype('<f4') if arrays else np.empty(0, dtype='<f4')
+    return struct.pack('<I', len(header)) + header + values.tobytes()
@@ -1,9 +1,15 @@
-from flask import Blueprint, render_template, abort, request
+from flask import Blueprint, render_template, abort, request, Response
 import numpy as np
 import json
+from ._chart_data import INPUT_ERRORS, chart_data, encode_float32, encode_json
+from ._render_cache import RenderCache, chart_key
 
 eos_routes = Blueprint('eos', __name__, template_folder='templates')
 
+MAX_ISOLINES = 50
+MAX_STATES = 100
+data_cache = RenderCache('eos_data', suffix='.data')
+
 
 @eos_routes.route('/eos')
 def eos():
@@ -19,5 +25,50 @@ def ts():
 
 @eos_routes.route('/eos/data')
 def data():
-    d = [{'x': x/10, 'y': np.sin(x/10)} for x in range(100)]
-    return json.dumps(d)
+    """Chart data, e.g. /eos/data?fluid=Water&x=s&y=T&iso=p:1,10,100&state=p:10,T:300&width=800&format=float32
+
+    iso and state can be repeated, their values are in the units of Properties.xlsx. At most MAX_ISOLINES iso lines
+    and MAX_STATES states are drawn, the data is cached like the images of /fluid_state_img.
+    """
+    args = request.args
+    output_format = 'float32' if args.get('format') == 'float32' else 'json'
+    try:
+        isolines, n_isolines = {}, 0
+        for iso in args.getlist('iso'):
+            iso_property, _, values = iso.partition(':')
+            n_isolines += values.count(',') + 1
+            if n_isolines > MAX_ISOLINES:
+                raise ValueError(f'at most {MAX_ISOLINES} iso lines can be drawn')
+            isolines.setdefault(iso_property, []).extend(float(v) for v in values.split(','))
+        if len(args.getlist('state')) > MAX_STATES:
+            raise ValueError(f'at most {MAX_STATES} states can be drawn')
+        states = [{pn: float(v) for pn, v in (pair.split(':') for pair in state.split(','))}
+                  for state in args.getlist('state')]
+        size = (min(max(args.get('width', default=640, type=int), 50), 4096),
+                min(max(args.get('height', default=480, type=int), 50), 4096))
+    except ValueError as e:
+        return _error(f'no valid chart -> {e}')
+    definition = {'fluid_name': args.get('fluid', default='Water'), 'x_property': args.get('x', default='s'),
+                  'x_unit': args.get('x_unit'), 'y_property': args.get('y', default='T'), 'y_unit': args.get('y_unit'),
+                  'x_log': args.get('x_log') == 'true', 'y_log': args.get('y_log') == 'true', 'isolines': isolines,
+                  'states': states, 'size': size, 'pixels': args.get('pixels', default=0.5, type=float),
+                  'backend': args.get('backend')}
+    encode = encode_float32 if output_format == 'float32' else encode_json
+
+    key = chart_key({**definition, 'format': output_format})
+    if request.if_none_match.contains(key):
+        response = Response(status=304)
+    else:
+        try:
+            body = data_cache.get(key, lambda: encode(chart_data(**definition)))
+        except INPUT_ERRORS as e:
+            return _error(f'no valid chart -> {e}')
+        response = Response(body, mimetype='application/octet-stream' if output_format == 'float32' else
+                            'application/json')
+    response.set_etag(key)
+    response.cache_control.no_cache = True
+    return response
+
+
+def _error(message: str) -> Response:
+    return Response(json.dumps({'error': message}), status=400, mimetype='application/json')
@@ -0,0 +1,75 @@
+from flask import Blueprint, request, Response, url_for, stream_with_context
+import json
+import time
+from tt.jobs import JobQueue, JobNotFound
+
+jobs_routes = Blueprint('jobs', __name__)
+
+job_queue = JobQueue()
+STREAM_INTERVAL = 0.25  # seconds between two looks at the job store while streaming
+
+
+def _json_response(data, status=200) -> Response:
+    return Response(json.dumps(data), status=status, mimetype='application/json')
+
+
+@jobs_routes.route('/jobs', methods=['POST'])
+def submit():
+    """Starts a job, the body is JSON {"kind": "property_sweep", "params": {...}} (see tt.jobs)."""
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or 'kind' not in body:
+        return _json_response({'error': 'the body must be JSON {"kind": ..., "params": {...}}'}, 400)
+    try:
+        job_id = job_queue.submit(body['kind'], body.get('params', {}))
+    except (TypeError, ValueError) as e:
+        return _json_response({'error': f'no valid job -> {e}'}, 400)
+    return _json_response({'id': job_id, 'status_url': url_for('jobs.status', job_id=job_id),
+                           'stream_url': url_for('jobs.stream', job_id=job_id)}, 202)
+
+
+@jobs_routes.route('/jobs/<job_id>')
+def status(job_id):
+    """The status of a job, with the result once it is finished (?parts=true adds the partial results)."""
+    store = job_queue.store
+    try:
+        data = store.status(job_id)
+        if request.args.get('parts') == 'true':
+            data['partial'] = [store.part(job_id, i) for i in range(data['parts'])]
+        if data['state'] == 'finished':
+            data['result'] = store.result(job_id)
+    except (JobNotFound, OSError):
+        return _json_response({'error': f'no job {job_id}, it may have expired'}, 404)
+    return _json_response(data)
+
+
+@jobs_routes.route('/jobs/<job_id>/stream')
+def stream(job_id):
+    """NDJSON lines {"status": ...} on every change and {"part": i, "data": ...} for every partial result, the
+    last line is the finished or failed status."""
+    store = job_queue.store
+    try:
+        store.status(job_id)
+    except JobNotFound:
+        return _json_response({'error': f'no job {job_id}, it may have expired'}, 404)
+
+    def lines():
+        sent_parts = 0
+        last_update = None
+        while True:
+            try:
+                data = store.status(job_id)
+                while sent_parts < data['parts']:
+                    yield json.dumps({'part': sent_parts, 'data': store.part(job_id, sent_parts)}) + '\n'
+                    sent_parts += 1
+            except (JobNotFound, OSError):
+                yield json.dumps({'error': f'job {job_id} has expired'}) + '\n'
+                return
+            if data['updated'] != last_update:
+                last_update = data['updated']
+                yield json.dumps({'status': data}) + '\n'
+            if data['state'] in ('finished', 'failed'):
+                return
+            time.sleep(STREAM_INTERVAL)
+
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
@@ -0,0 +1,161 @@
+"""Cache of rendered chart images keyed by the chart definition.
+
+The images are kept in memory and on disk, both tiers evict the least recently used images above their size limit.
+Identical requests which arrive while an image is rendered wait for that render instead of starting their own
+(single flight per process, other processes share the result through the disk tier).
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from tt.cache import get_cache_dir
+
+RENDER_VERSION = 2  # increase when the rendering changes, so cached images of the old version are not used
+
+
+def chart_key(definition: dict) -> str:
+    """A digest of a chart definition (JSON data) and the versions of the rendering, used as file name and ETag."""
+    import matplotlib
+    data = json.dumps([definition, RENDER_VERSION, matplotlib.__version__], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode()).hexdigest()[:32]
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RenderCache:
+    def __init__(self, name: str, max_memory: int = 64 * 2 ** 20, max_disk: int = 512 * 2 ** 20,
+                 suffix: str = '.png'):
+        """Sizes in bytes, max_disk=0 disables the disk tier (in the tt cache folder charts/name)."""
+        self.directory = get_cache_dir('charts', name) if max_disk else None
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.suffix = suffix
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.statistics = {'memory_hits': 0, 'disk_hits': 0, 'renders': 0, 'waits': 0}
+
+    def __repr__(self):
+        return f'RenderCache({len(self._memory)} images, {self._memory_size} bytes in memory)'
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _remember(self, key: str, data: bytes):
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.max_memory and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def _lookup(self, key: str) -> bytes:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.statistics['memory_hits'] += 1
+                return data
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            os.utime(self._path(key))  # the modification time orders the eviction
+        except OSError:
+            return None
+        with self._lock:
+            self.statistics['disk_hits'] += 1
+        self._remember(key, data)
+        return data
+
+    def _store(self, key: str, data: bytes):
+        self._remember(key, data)
+        if self.directory is None:
+            return
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _evict_disk(self):
+        """Removes the least recently used files until the disk tier is below 90 % of max_disk."""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(self.suffix):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        size = sum(f[1] for f in files)
+        if size <= self.max_disk:
+            return
+        for _, file_size, path in sorted(files):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= file_size
+            if size <= 0.9 * self.max_disk:
+                break
+
+    def get(self, key: str, render) -> bytes:
+        """The cached image of key, render() creates it (once for all concurrent calls with the same key).
+
+        An error of render() is raised in all calls waiting for it, the next call renders again.
+        """
+        data = self._lookup(key)
+        if data is not None:
+            return data
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.statistics['waits'] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            # another thread may have finished the same render between the lookup and the flight
+            data = self._lookup(key)
+            if data is None:
+                with self._lock:
+                    self.statistics['renders'] += 1
+                data = render()
+                self._store(key, data)
+            flight.result = data
+            return data
+        except BaseException as e:
+            # every error (not only invalid charts) reaches the waiting calls, none is stored
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def clear(self):
+        """Empties the memory tier (the disk tier is kept)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
@@ -0,0 +1,73 @@
+"""Bounded pool of worker processes which render charts, so chart requests use all cores and never share pyplot.
+
+The workers are started with 'spawn' (forking a threaded server is unsafe) on the first render. At most
+max_pending renders are queued or running, further requests wait queue_timeout seconds for a slot and are then
+rejected with RenderPoolBusy. A render which takes longer than timeout raises a TimeoutError, its worker finishes it
+in the background.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+class RenderPoolBusy(RuntimeError):
+    """All slots of the render pool are taken."""
+
+
+class RenderPool:
+    def __init__(self, workers: int = None, max_pending: int = None, timeout: float = 60, queue_timeout: float = 5):
+        self.workers = workers or int(os.environ.get('TT_RENDER_WORKERS', 0)) or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.workers
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'RenderPool({self.workers} workers, {self.max_pending} pending)'
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, function, *args, timeout: float = None):
+        """Returns function(*args) computed by a worker, function must be importable (e.g. tt...render_chart)."""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise RenderPoolBusy(f'all {self.max_pending} render slots are taken')
+        executor = self._get_executor()
+        try:
+            future = executor.submit(function, *args)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            return future.result(self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+        except BrokenProcessPool:
+            # a worker died (e.g. out of memory), the next render starts a new pool
+            self._discard_executor(executor)
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+render_pool = RenderPool()
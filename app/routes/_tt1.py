@@ -3,9 +3,13 @@ import numpy as np
 import json
 from tt.appendices.A1 import SaturatedWater
 from tt.appendices.A3 import IdealGas
-from tt.fluid_state import Fluid, Process, ThermoChart
-import io
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+from tt.appendices import TableRangeError
+from tt.fluid_state import render_chart
+from ._bulk import bulk_response
+from ._chart_data import INPUT_ERRORS
+from ._render_cache import RenderCache, chart_key
+from ._render_pool import render_pool, RenderPoolBusy
+from concurrent.futures.process import BrokenProcessPool
 
 
 tt1_routes = Blueprint('tt1', __name__, template_folder='templates')
@@ -16,9 +20,11 @@ def tt1():
     return render_template('tt1/tt1.html')
 
 
-@tt1_routes.route('/tt1/saturated_water')
+@tt1_routes.route('/tt1/saturated_water', methods=['GET', 'POST'])
 def saturated_water():
     key = request.args.get('property', default=None, type=str)
+    if request.method == 'POST':
+        return bulk_response(SaturatedWater, key)
     value = request.args.get('value', default=None, type=float)
 
     if value is None:
@@ -32,6 +38,8 @@ def saturated_water():
     try:
         properties = SaturatedWater.get_state(key, value)
         return json.dumps(properties, ensure_ascii=False)
+    except TableRangeError as e:
+        return Response(json.dumps(e.as_dict(), ensure_ascii=False), status=400, mimetype='application/json')
     except Exception as e:
         if key not in SaturatedWater.properties:
             prop_unit = [f'{p} in {u}' for p, u in SaturatedWater._prop_unit.items()]
@@ -45,33 +53,44 @@ def saturated_water():
 def fluid_state():
     return render_template('tt1/fluid_state.html')
 
-@tt1_routes.route('/fluid_state_img')
-def fluid_state_img():
-    props = {'p': 100, 'v': 0.02}
-    f1 = Fluid(fluid_name='Water', amount=1, properties=props)
-    p12 = Process(f1, 'p', 'T', 400)
-
-    f2 = p12.state_2
-    p23 = Process(f2, 'T', 'p', 230)
-    f3 = p23.state_2
-    p34 = Process(f3, 'p', 'v', 0.002)
-    f4 = p34.state_2
-    p45 = Process(f4, 'T', 'v', 1)
-    f5 = p45.state_2
-
-    chrt = ThermoChart('pv', fluid=f1.fluid_name, x_property='h', x_unit='kJ/kg', y_property='p', y_unit='bar',
-                       states=[f1, f2, f3, f4, f5], processes=[p12, p23, p34, p45], x_log=False, y_log=False)
-
-    fig = chrt.create_empty()
+# chart of /fluid_state_img (see ThermoChart.from_definition), the axes, units and scales can be changed with
+# query arguments
+FLUID_STATE_CHART = {'kind': 'pv', 'fluid': 'Water', 'state': {'p': 100, 'v': 0.02},
+                     'processes': [['p', 'T', 400], ['T', 'p', 230], ['p', 'v', 0.002], ['T', 'v', 1]],
+                     'x_property': 'h', 'x_unit': 'kJ/kg', 'y_property': 'p', 'y_unit': 'bar',
+                     'x_log': False, 'y_log': False}
+chart_cache = RenderCache('fluid_state')
 
-    output = io.BytesIO()
-    FigureCanvas(fig).print_png(output)
-    return Response(output.getvalue(), mimetype='image/png')
 
-
-@tt1_routes.route('/tt1/ideal_gas')
+@tt1_routes.route('/fluid_state_img')
+def fluid_state_img():
+    definition = dict(FLUID_STATE_CHART)
+    for a in ('x_property', 'x_unit', 'y_property', 'y_unit'):
+        definition[a] = request.args.get(a, default=definition[a], type=str)
+    for a in ('x_log', 'y_log'):
+        definition[a] = request.args.get(a, default=definition[a], type=lambda v: v.lower() in ('1', 'true'))
+
+    key = chart_key(definition)
+    if request.if_none_match.contains(key):
+        response = Response(status=304)
+    else:
+        try:
+            png = chart_cache.get(key, lambda: render_pool.render(render_chart, definition))
+        except (RenderPoolBusy, TimeoutError, BrokenProcessPool):
+            abort(503, 'the chart can not be rendered now, try again later')
+        except INPUT_ERRORS as e:
+            abort(400, f'no valid chart -> {e}')
+        response = Response(png, mimetype='image/png')
+    response.set_etag(key)
+    response.cache_control.no_cache = True  # revalidated with the ETag, which is answered without rendering
+    return response
+
+
+@tt1_routes.route('/tt1/ideal_gas', methods=['GET', 'POST'])
 def ideal_gas():
     key = request.args.get('property', default=None, type=str)
+    if request.method == 'POST':
+        return bulk_response(IdealGas, key)
     value = request.args.get('value', default=None, type=float)
 
     if value is None:
@@ -85,6 +104,8 @@ def ideal_gas():
     try:
         properties = IdealGas.get_state(key, value)
         return json.dumps(properties, ensure_ascii=False)
+    except TableRangeError as e:
+        return Response(json.dumps(e.as_dict(), ensure_ascii=False), status=400, mimetype='application/json')
     except Exception as e:
         if key not in IdealGas.properties:
             prop_unit = [f'{p} in {u}' for p, u in IdealGas._prop_unit.items()]
@@ -0,0 +1,48 @@
+// efficiency of the Rankine cycles of /Dampfturbine/cycle over the boiler pressure, one line per live steam temperature
+var rankineChart = null;
+var colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#7f7f7f"];
+
+function celsiusToKelvin(text) {
+    // values, lists and ranges start:stop:num, the number of a range is kept
+    var parts = text.split(":");
+    var values = (parts.length === 3 ? parts.slice(0, 2) : text.split(",")).map(function (v) {
+        return parseFloat(v) + 273.15;
+    });
+    return parts.length === 3 ? values.concat(parts[2]).join(":") : values.join(",");
+}
+
+function drawRankine(data) {
+    var shape = data.shape, p = data.parameters.p_boiler, T = data.parameters.T_live;
+    var stride = shape.slice(2).reduce(function (a, b) { return a * b; }, 1);  // first value of the other parameters
+    var datasets = T.map(function (T_live, j) {
+        return {
+            label: "T = " + (T_live - 273.15).toFixed(0) + " °C", borderColor: colors[j % colors.length],
+            fill: false, showLine: true, radius: 0, borderWidth: 1,
+            data: p.map(function (p_boiler, i) {
+                return {x: p_boiler, y: 100 * data.results.efficiency[(i * T.length + j) * stride]};
+            })
+        };
+    });
+    if (rankineChart !== null) {
+        rankineChart.destroy();
+    }
+    rankineChart = new Chart(document.getElementById("rankine-chart"), {
+        type: "scatter", data: {datasets: datasets},
+        options: {scales: {
+            xAxes: [{scaleLabel: {display: true, labelString: "Kesseldruck [bar]"}}],
+            yAxes: [{scaleLabel: {display: true, labelString: "thermischer Wirkungsgrad [%]"}}]
+        }}
+    });
+}
+
+$("#rankine-form").submit(function (event) {
+    event.preventDefault();
+    var query = $.param({
+        p_boiler: $("#p_boiler").val(), T_live: celsiusToKelvin($("#T_live").val()),
+        p_condenser: $("#p_condenser").val(), eta_turbine: $("#eta_turbine").val(), eta_pump: $("#eta_pump").val()
+    });
+    $.getJSON("/Dampfturbine/cycle?" + query, drawRankine).fail(function (response) {
+        alert(response.responseJSON ? response.responseJSON.error : "Berechnung fehlgeschlagen");
+    });
+});
+$("#rankine-form").submit();
@@ -1,38 +1,80 @@
-$.getJSON("/eos/data", function (data) {
-    new Chart(document.getElementById("t-s-chart"), {
+// T-s chart drawn from the series of /eos/data, zoomed with the mouse wheel (double click resets the zoom)
+var canvas = document.getElementById("t-s-chart");
+var query = $.param({
+    fluid: "Water", x: "s", x_unit: "kJ/(kg K)", y: "T", y_unit: "K",
+    width: canvas.clientWidth || canvas.width, height: canvas.clientHeight || canvas.height
+}) + "&iso=p:0.01,0.1,1,10,100,1000";
+
+function points(series) {
+    return series.x.map(function (x, i) {
+        return {x: x, y: series.y[i]};
+    });
+}
+
+function line(series, label, color) {
+    return {data: points(series), label: label, borderColor: color, borderWidth: 1, showLine: true, radius: 0,
+            fill: false};
+}
+
+$.getJSON("/eos/data?" + query, function (data) {
+    var datasets = [
+        line(data.dome.liquid, "saturated liquid line", "#1f77b4"),
+        line(data.dome.vapor, "saturated vapor line", "#ff7f0e"),
+        line(data.triple_line, "triple line", "#2ca02c"),
+        {data: points(data.critical_point), label: "critical point", backgroundColor: "red", radius: 4}
+    ];
+    data.isolines.forEach(function (iso) {
+        datasets.push(line(iso, "Iso: " + iso.property + "@" + iso.value + " " + iso.unit, "#999999"));
+    });
+    data.states.forEach(function (state) {
+        datasets.push({data: points(state), label: JSON.stringify(state.properties), radius: 4});
+    });
+
+    var chart = new Chart(canvas, {
         type: 'scatter',
-        data: {
-            datasets: [{
-                data: data,
-                borderWidth: 1,
-                showLine: true,
-                radius: 0,
-                label: "Isobaric ",
-                fill: false
-            }
-            ]
-        },
+        data: {datasets: datasets},
         options: {
+            animation: false,
             title: {
                 display: true,
-                text: 'T-s Diagram of H20'
+                text: 'T-s Diagram of ' + data.fluid
             },
             scales: {
                 yAxes: [{
+                    ticks: {},
                     scaleLabel: {
                         display: true,
-                        labelString: "Temperatur T [K]"
+                        labelString: data.y.property + " [" + data.y.unit + "]"
                     }
                 }],
                 xAxes: [{
+                    ticks: {},
                     scaleLabel: {
                         display: true,
-                        labelString: "Entropy S [kJ/(kg*K)]"
+                        labelString: data.x.property + " [" + data.x.unit + "]"
                     }
                 }]
             }
-        },
+        }
+    });
 
+    canvas.addEventListener("wheel", function (event) {
+        event.preventDefault();
+        var factor = event.deltaY > 0 ? 1.25 : 0.8;
+        [["x-axis-1", chart.options.scales.xAxes[0], event.offsetX],
+         ["y-axis-1", chart.options.scales.yAxes[0], event.offsetY]].forEach(function (axis) {
+            var scale = chart.scales[axis[0]];
+            var center = scale.getValueForPixel(axis[2]);
+            axis[1].ticks.min = center - (center - scale.min) * factor;
+            axis[1].ticks.max = center + (scale.max - center) * factor;
+        });
+        chart.update();
+    });
+    canvas.addEventListener("dblclick", function () {
+        [chart.options.scales.xAxes[0], chart.options.scales.yAxes[0]].forEach(function (axis) {
+            delete axis.ticks.min;
+            delete axis.ticks.max;
+        });
+        chart.update();
     });
 });
-
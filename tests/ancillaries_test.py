@@ -0,0 +1,48 @@
+import os
+import numpy as np
+import pytest
+from tt.cache import coolprop_version
+from tt.fluid_state import get_saturation_ancillaries
+from tt.fluid_state._engine import get_engine
+
+
+@pytest.fixture(scope='module')
+def ancillaries():
+    return get_saturation_ancillaries('Water')
+
+
+def test_saturation_curves(ancillaries):
+    T = np.linspace(280, 640, 50)
+    exact = get_engine('Water').evaluate_array({'T': T, 'Q': 0}, ['P', 'Dmass'])
+    np.testing.assert_allclose(ancillaries.p_sat(T), exact['P'], rtol=1e-8)
+    np.testing.assert_allclose(ancillaries.T_sat(exact['P']), T, rtol=1e-8)
+    np.testing.assert_allclose(ancillaries.saturated('Dmass_liquid', T), exact['Dmass'], rtol=1e-4)
+    assert np.isnan(ancillaries.p_sat(700.)) and np.isnan(ancillaries.T_sat(1e9))
+    assert max(ancillaries.max_errors['p_sat'], ancillaries.max_errors['T_sat']) < 2e-8
+    with pytest.raises(ValueError):
+        ancillaries.saturated('Umass_liquid', T)
+
+
+@pytest.mark.parametrize('name', ['T', 'Hmass', 'Smass'])
+def test_classify_matches_flashed_phases(ancillaries, name):
+    rng = np.random.default_rng(0)
+    p = np.exp(rng.uniform(np.log(1e3), np.log(1e8), 2000))
+    y = {'T': rng.uniform(280, 1000, 2000), 'Hmass': rng.uniform(1e5, 4e6, 2000),
+         'Smass': rng.uniform(500, 9000, 2000)}[name]
+    exact = get_engine('Water').evaluate_array({'P': p, name: y}, ['phase'])['phase']
+    sign = {'T': 'T', 'Hmass': 'h', 'Smass': 's'}[name]
+    phases = ancillaries.classify({'p': p, sign: y}, si=True)
+    known = (phases != 'unknown') & (exact != 'unknown')
+    assert np.count_nonzero(known) > 1900
+    assert np.mean(phases[known] == exact[known]) > 0.995
+
+
+def test_classify_inputs(ancillaries):
+    with pytest.raises(ValueError):
+        ancillaries.classify({'T': 300, 'h': 1e5})
+    assert ancillaries.classify({'T': 300, 'p': 1})[()] == 'liquid'
+
+
+def test_file_is_keyed_by_coolprop_version(ancillaries):
+    folder = os.path.join(os.environ['TT_CACHE_DIR'], 'ancillaries', coolprop_version())
+    assert os.listdir(folder) == ['Water-HEOS.npz']
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from tt.appendices import TableInterpolator, TableRangeError
+from tt.appendices.A1 import SaturatedWater
+
+
+@pytest.fixture
+def interpolator():
+    x = np.array([3., 1., 2., 5.])
+    return TableInterpolator('x', {'x': x, 'y': x ** 2, 'z': -x}, {'x': 'K'})
+
+
+def test_interpolation_matches_numpy(interpolator):
+    values = np.linspace(1, 5, 17)
+    columns = interpolator.columns_at(values)
+    np.testing.assert_allclose(columns[1], np.interp(values, [1, 2, 3, 5], [1, 4, 9, 25]))
+    np.testing.assert_allclose(columns[2], -values)
+    assert interpolator(5.) == {'x': 5., 'y': 25., 'z': -5.}
+
+
+def test_gathered_and_column_wise_results_are_equal(interpolator, monkeypatch):
+    values = np.random.default_rng(1).uniform(1, 5, (30, 7))
+    gathered = interpolator.columns_at(values)
+    monkeypatch.setattr(TableInterpolator, 'gather_size', 10)
+    np.testing.assert_array_equal(interpolator.columns_at(values), gathered)
+
+
+def test_values_outside_the_table(interpolator):
+    with pytest.raises(TableRangeError) as e:
+        interpolator.columns_at([0.5, 2., np.nan, 6.])
+    assert isinstance(e.value, ValueError)
+    assert e.value.as_dict()['indices'] == [0, 2, 3]
+    assert e.value.as_dict()['min'] == 1 and e.value.unit == 'K'
+    columns = interpolator.columns_at([0.5, 2.], strict=False)
+    assert np.isnan(columns[:, 0]).all() and columns[1, 1] == 4
+
+
+def test_saturated_water():
+    state = SaturatedWater.get_state('T', 100.)
+    assert state['P'] == pytest.approx(1.014, rel=1e-2)
+    values = SaturatedWater.get_state('P', [1., 10.])['T']
+    assert values[0] == pytest.approx(99.6, abs=0.1) and values[1] == pytest.approx(179.9, abs=0.1)
+    with pytest.raises(TableRangeError):
+        SaturatedWater.get_state('T', 1000.)
\ No newline at end of file
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tt.appendices import AppendixTable, GridTable, TableRangeError, get_appendix_table
+from tt.appendices._tables import _compile_sheet, _table
+from tt.appendices.A3 import IdealGas
+
+
+def test_appendix_table_lookups():
+    table = AppendixTable('test', {'T': np.array([300., 400.]), 'Cp': np.array([1., 2.])}, {'T': 'K', 'Cp': ''},
+                          {'Gas': ['A', 'B']})
+    assert table.lookup('T', 350.)['Cp'] == 1.5
+    assert table.interpolator('T') is table.interpolator('T')
+    assert table.row('B') == {'Gas': 'B', 'T': 400., 'Cp': 2.}
+    with pytest.raises(ValueError):
+        table.row('C')
+    with pytest.raises(ValueError):
+        table.lookup('p', 1.)
+
+
+def test_grid_table_is_exact_for_bilinear_functions():
+    p, T = np.array([1., 5., 2.]), np.array([300., 500., 400., 350.])
+    grid = GridTable('v', ('p', 'T'), (p, T), T[None, :] * p[:, None] + p[:, None], {'p': 'bar'})
+    x, y = np.array([1., 1.5, 5.]), np.array([300., 420., 500.])
+    np.testing.assert_allclose(grid(x, y), x * y + x)
+    assert grid(2, 350) == 702
+    with pytest.raises(TableRangeError):
+        grid([1., 6.], 400.)
+
+
+def test_compiled_grid_sheet():
+    frame = pd.DataFrame([[1., 10., 20.], [2., 30., 40.], [3., 50., np.nan]],
+                         columns=['v (m3/kg): p (bar) \\ T (°C)', 100, 200])
+    data = _compile_sheet('grid', frame)
+    assert data['kind'] == 'grid' and data['keys'] == ('p', 'T') and data['units']['v'] == 'm3/kg'
+    grid = _table(data)
+    assert grid(1.5, 150.) == pytest.approx(25)
+    assert np.isnan(grid(2.5, 150.))  # empty cells are outside the phase of the table
+
+
+def test_ideal_gas_and_rows_by_name():
+    assert IdealGas.get_state('T', 300.)['h'] == pytest.approx(300.19, rel=1e-3)
+    assert get_appendix_table('A-16').row('H2O-fl')['Form'] == 'liquid'
+    with pytest.raises(ValueError):
+        get_appendix_table('A-99')
@@ -0,0 +1,44 @@
+import pytest
+from tt.fluid_state import FluidState, benchmark_backends, coolprop_fluid_name, get_backend, set_backend
+
+
+@pytest.fixture
+def restore_backends():
+    yield
+    set_backend('HEOS')
+    set_backend(None, 'Water')
+
+
+def test_backend_precedence(restore_backends):
+    assert get_backend('Water') == 'HEOS'
+    set_backend('IF97', 'Water')
+    assert get_backend('Water') == 'IF97' and get_backend('Nitrogen') == 'HEOS'
+    assert get_backend('Water', 'HEOS') == 'HEOS'
+    assert get_backend('REFPROP::Water', 'HEOS') == 'REFPROP'
+    assert coolprop_fluid_name('Water') == 'IF97::Water'
+    assert coolprop_fluid_name('Water', 'table') == 'HEOS::Water'
+    set_backend(None, 'Water')
+    assert get_backend('Water') == 'HEOS'
+
+
+def test_invalid_backends(restore_backends):
+    with pytest.raises(ValueError):
+        set_backend('NOT_A_BACKEND')
+    with pytest.raises(ValueError):
+        set_backend(None)
+
+
+def test_states_of_other_backends():
+    heos = FluidState('Water', {'T': 500, 'p': 10})
+    if97 = FluidState('Water', {'T': 500, 'p': 10}, backend='IF97')
+    assert if97.backend == 'IF97'
+    assert if97.h.magnitude == pytest.approx(heos.h.magnitude, rel=1e-4)
+    assert FluidState('IF97::Water', {'T': 500, 'p': 10}).h.magnitude == if97.h.magnitude
+
+
+def test_benchmark():
+    results = benchmark_backends('Water', backends=('HEOS', 'IF97'), n=6)
+    assert list(results['backend']) == ['HEOS', 'IF97', 'HEOS', 'IF97']
+    heos = results[results['backend'] == 'HEOS']
+    assert (heos['Hmass'] == 0).all() and (heos['failed'] == 0).all()
+    assert (results['states/s'] > 0).all()
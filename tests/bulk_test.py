@@ -0,0 +1,72 @@
+import io
+import json
+import numpy as np
+import pytest
+from flask import Flask
+from app.routes._bulk import bulk_response, read_binary, read_text, stream_rows
+from tt.appendices import TableInterpolator
+from tt.appendices.A1 import SaturatedWater
+
+
+def _values(chunks) -> list:
+    return [v for chunk in chunks for v in chunk.tolist()]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route('/bulk', methods=['POST'])
+    def bulk():
+        return bulk_response(SaturatedWater, 'T')
+    return app.test_client()
+
+
+@pytest.mark.parametrize('body, values', [('T\n1\n2\n', [1, 2]), ('1\n2', [1, 2]), ('T (°C);x\n1;2', [1, 2]),
+                                          ('', []), ('T', [])])
+def test_header_skipping(body, values):
+    assert _values(read_text(io.BytesIO(body.encode()), skip_header=True)) == values
+
+
+def test_first_line_with_numbers_and_text_is_an_error():
+    with pytest.raises(ValueError):
+        list(read_text(io.BytesIO(b'1, x\n2\n'), skip_header=True))
+
+
+def test_chunks_split_at_block_boundaries():
+    values = np.arange(50000) / 7
+    body = ('[' + ', '.join(map(repr, values.tolist())) + ']').encode()
+    chunks = list(read_text(io.BytesIO(body), chunk_size=1000))
+    assert len(chunks) == 50 and _values(chunks) == values.tolist()
+    binary = list(read_binary(io.BytesIO(values.astype('<f8').tobytes() + b'\0' * 8), chunk_size=999))
+    assert _values(binary) == values.tolist() + [0.]
+    with pytest.raises(ValueError):
+        list(read_binary(io.BytesIO(b'\0' * 9)))
+
+
+def test_ndjson_rows_are_valid_json():
+    interpolator = TableInterpolator('x', {'x': np.array([0., 1.]), 'y': np.array([0., 2.])})
+    text = ''.join(stream_rows(interpolator, [np.array([0.5, 2., np.inf, -np.inf, np.nan])]))
+    rows = [json.loads(line) for line in text.splitlines()]
+    assert rows[0] == {'x': 0.5, 'y': 1.}
+    assert rows[1] == {'x': 2., 'y': None}
+    assert all(r == {'x': None, 'y': None} for r in rows[2:])
+
+
+def test_csv_and_ndjson_responses(client):
+    response = client.post('/bulk?format=csv', data='T\n20\n1000\n', content_type='text/csv')
+    lines = response.get_data(as_text=True).splitlines()
+    assert response.status_code == 200 and lines[0].startswith('T,P') and len(lines) == 3
+    assert lines[2].startswith('1000,,')
+    response = client.post('/bulk', data=json.dumps([20, 30]), content_type='application/json')
+    assert [json.loads(r)['T'] for r in response.get_data(as_text=True).splitlines()] == [20, 30]
+
+
+@pytest.mark.parametrize('body', ['20, x\n30\n', '20\nx\n'])
+def test_bad_first_lines_are_rejected(client, body):
+    response = client.post('/bulk', data=body, content_type='text/csv')
+    assert response.status_code == 400 and 'x' in response.get_json()['error']
+
+
+def test_unsupported_content_type(client):
+    assert client.post('/bulk', data='20', content_type='image/png').status_code == 415
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+from tt import cache
+
+
+def test_read_cached_rebuilds_when_the_file_changes(tmp_path):
+    path = tmp_path / 'data.txt'
+    path.write_text('a')
+    calls = []
+
+    def build(p):
+        calls.append(p)
+        with open(p) as f:
+            return f.read()
+
+    assert cache.read_cached(str(path), build, 'key') == 'a'
+    assert cache.read_cached(str(path), build, 'key') == 'a'
+    assert len(calls) == 1
+    path.write_text('bb')
+    assert cache.read_cached(str(path), build, 'key') == 'bb'
+    assert cache.read_cached(str(path), build, 'other key') == 'bb'
+    assert len(calls) == 3
+
+
+def test_write_pickle_skips_unwritable_paths(tmp_path):
+    cache.write_pickle(str(tmp_path / 'missing' / 'file.pickle'), {'a': 1})
+    assert not os.path.exists(tmp_path / 'missing')
+    cache.write_pickle(str(tmp_path / 'file.pickle'), {'a': 1})
+    assert os.listdir(tmp_path) == ['file.pickle']
+
+
+def test_heavy_dependencies_are_imported_lazily():
+    code = 'import sys, tt.fluid_state, tt.appendices.A1; ' \
+           'print(",".join(m for m in ("CoolProp", "pandas", "matplotlib.pyplot", "tabulate") if m in sys.modules))'
+    root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+    subprocess.run([sys.executable, '-c', code], cwd=root, check=True)  # builds the caches
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, check=True, capture_output=True, text=True)
+    assert output.stdout.strip() == ''
+
+
+def test_legacy_state_module_does_not_load_the_engines():
+    code = 'import sys, tt.state; print("tt.fluid_state" in sys.modules)'
+    root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, check=True, capture_output=True, text=True)
+    assert output.stdout.strip() == 'False'
@@ -0,0 +1,65 @@
+import json
+import struct
+import numpy as np
+import pytest
+from flask import Flask
+from app.routes import _eos
+from app.routes._chart_data import chart_data, encode_float32, encode_json
+from app.routes._render_cache import RenderCache
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(_eos, 'data_cache', RenderCache('eos_data', max_disk=0))
+    app = Flask(__name__)
+    app.register_blueprint(_eos.eos_routes)
+    return app.test_client()
+
+
+def test_chart_data_series():
+    data = chart_data('Water', 's', None, 'T', None, isolines={'p': [1, 100]}, states=[{'p': 10, 'T': 300}],
+                      size=(400, 300))
+    assert len(data['isolines']) == 2 and data['isolines'][1]['value'] == 100
+    assert data['states'][0]['y'][0] == pytest.approx(300)
+    liquid, vapor = data['dome']['liquid'], data['dome']['vapor']
+    assert len(liquid['x']) <= 4 * 400 and np.nanmax(liquid['x']) <= np.nanmax(vapor['x'])
+    assert data['critical_point']['y'][0] == pytest.approx(647.096, abs=0.01)
+
+
+def test_float32_layout():
+    data = {'a': np.array([1., 2.]), 'b': [{'c': np.array([3.])}], 'name': 'x'}
+    body = encode_float32(data)
+    length = struct.unpack('<I', body[:4])[0]
+    header = json.loads(body[4:4 + length])
+    values = np.frombuffer(body[4 + length:], dtype='<f4')
+    assert length % 4 == 0 and header['b'][0]['c'] == {'offset': 2, 'length': 1}
+    np.testing.assert_array_equal(values, [1, 2, 3])
+    assert json.loads(encode_json({'a': np.array([1.5, np.nan, np.inf])})) == {'a': [1.5, None, None]}
+
+
+def test_data_is_cached_with_etag(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(_eos, 'chart_data', lambda **definition: calls.append(definition) or {'a': np.ones(2)})
+    response = client.get('/eos/data?iso=p:1,10&width=100000')
+    assert response.get_json() == {'a': [1, 1]} and calls[0]['size'] == (4096, 480)
+    assert client.get('/eos/data?iso=p:1,10&width=100000').get_json() == {'a': [1, 1]}
+    assert client.get('/eos/data?iso=p:1,10&width=100000',
+                      headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get('/eos/data?iso=p:1,10&width=100000&format=float32').mimetype == 'application/octet-stream'
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize('query', ['iso=p:' + ','.join(['1'] * 51), '&'.join(['iso=p:1,2'] * 26),
+                                   '&'.join(['state=p:1,T:300'] * 101), 'iso=p:x', 'x=nope', 'x_unit=nope',
+                                   'x_unit=bar'])
+def test_invalid_requests(client, query):
+    response = client.get('/eos/data?' + query)
+    assert response.status_code == 400 and response.get_json()['error'].startswith('no valid chart')
+
+
+def test_server_errors_are_no_client_errors(client, monkeypatch):
+    def broken(**definition):
+        raise AttributeError('a bug')
+    monkeypatch.setattr(_eos, 'chart_data', broken)
+    client.application.config['PROPAGATE_EXCEPTIONS'] = False
+    assert client.get('/eos/data').status_code == 500
@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+import types
+
+# the tests build their caches (spreadsheets, fluid infos, tables ...) in a fresh folder
+os.environ.setdefault('TT_CACHE_DIR', tempfile.mkdtemp(prefix='tt-tests-'))
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+
+def _route_packages():
+    """Makes the route modules importable without app/__init__.py, so they are tested on a bare Flask app without
+    the navigation extension and the other blueprints."""
+    root = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'app')
+    for name, path in (('app', root), ('app.routes', os.path.join(root, 'routes'))):
+        if name not in sys.modules:
+            package = types.ModuleType(name)
+            package.__path__ = [path]
+            sys.modules[name] = package
+
+
+_route_packages()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from tt.fluid_state import FluidState, FluidStateArray
+
+
+def test_cp_is_dh_dT_at_constant_p():
+    state = FluidState('Water', {'T': 500, 'p': 10})
+    derivative = state.partial_derivative('h', 'T', 'p')
+    assert derivative.to('J/(kg K)').magnitude == pytest.approx(state.cp.to('J/(kg K)').magnitude, rel=1e-10)
+
+
+def test_matches_finite_differences():
+    dT = 1e-3
+    h = [FluidState('Water', {'T': T, 'rho': 5}).h.to('J/kg').magnitude for T in (500 - dT, 500 + dT)]
+    state = FluidState('Water', {'T': 500, 'rho': 5})
+    assert state.partial_derivative('h', 'T', 'rho').to('J/(kg K)').magnitude == \
+        pytest.approx((h[1] - h[0]) / (2 * dT), rel=1e-6)
+    second = state.second_partial_derivative('p', 'T', 'rho', 'T', 'rho')
+    p = [FluidState('Water', {'T': T, 'rho': 5}).partial_derivative('p', 'T', 'rho').to('Pa/K').magnitude
+         for T in (500 - dT, 500 + dT)]
+    assert second.to('Pa/K^2').magnitude == pytest.approx((p[1] - p[0]) / (2 * dT), rel=1e-5)
+
+
+def test_array_derivatives_in_one_flash():
+    states = FluidStateArray('Water', {'T': np.linspace(400, 600, 5), 'p': 1})
+    FluidState.reset_coolprop_calls()
+    cp, dv = states.partial_derivatives([('h', 'T', 'p'), ('rho', 'p', 'T')])
+    assert FluidState.reset_coolprop_calls() == 1
+    np.testing.assert_allclose(cp.to('J/(kg K)').magnitude, states.cp.to('J/(kg K)').magnitude, rtol=1e-10)
+    assert dv.magnitude.shape == (5,)
+
+
+def test_invalid_derivatives():
+    state = FluidState('Water', {'T': 500, 'p': 10})
+    with pytest.raises(ValueError):
+        state.partial_derivative('h', 'T', 'x')
+    with pytest.raises(ValueError):
+        state.partial_derivatives([('h', 'T')])
@@ -0,0 +1,41 @@
+import threading
+import numpy as np
+import pytest
+from CoolProp.CoolProp import PropsSI
+from tt.fluid_state._engine import get_engine
+
+
+def test_matches_props_si():
+    engine = get_engine('Water')
+    values = engine.evaluate({'T': 500., 'P': 1e6}, ['Hmass', 'Smass', 'Dmass', 'Cpmass', 'phase'])
+    for o in ('Hmass', 'Smass', 'Dmass', 'Cpmass'):
+        assert values[o] == pytest.approx(PropsSI(o, 'T', 500., 'P', 1e6, 'Water'), rel=1e-12)
+    assert values['phase'] == 'gas'
+
+
+def test_shared_engine():
+    assert get_engine('Water') is get_engine('Water')
+    assert get_engine('Water') is not get_engine('Nitrogen')
+
+
+def test_invalid_state_is_nan():
+    values = get_engine('Water').evaluate({'T': -10., 'P': 1e5}, ['Hmass'])
+    assert np.isnan(values['Hmass'])
+
+
+def test_abstract_state_per_thread():
+    engine = get_engine('Water')
+    states, results = [], []
+
+    def run(T):
+        states.append(engine.abstract_state)
+        results.append((T, engine.evaluate({'T': T, 'P': 1e5}, ['Hmass'])['Hmass']))
+
+    threads = [threading.Thread(target=run, args=(T,)) for T in (300., 350., 400.)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(map(id, states))) == 3
+    for T, h in results:
+        assert h == pytest.approx(PropsSI('Hmass', 'T', T, 'P', 1e5, 'Water'))
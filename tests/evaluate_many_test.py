@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from tt.fluid_state import FluidStateArray, SolverError, evaluate_many
+from tt.fluid_state import _evaluate_many
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    monkeypatch.setattr(_evaluate_many, 'MIN_SHARD_SIZE', 10)
+    yield
+    for workers in list(_evaluate_many._executors):
+        _evaluate_many._discard_executor(workers)
+
+
+def test_results_match_fluid_state_array():
+    p, T = np.array([[1, 10], [100, 200]]), np.array([[300, 400], [500, 900]])
+    results = evaluate_many('Water', {'p': p, 'T': T}, ['h', 's', 'v', 'x'], workers=1)
+    states = FluidStateArray('Water', {'p': p, 'T': T})
+    assert results['h'].shape == (2, 2) and results['h'].units == states.h.units
+    np.testing.assert_allclose(results['h'].magnitude, states.h.magnitude, rtol=1e-12)
+    np.testing.assert_allclose(results['v'].magnitude, states.v.magnitude, rtol=1e-12)
+
+
+def test_failed_states(small_shards):
+    T = np.linspace(400, 600, 50)
+    h = np.where(np.arange(50) % 10 == 3, 2e6, 5e6)  # only the wet states with the smaller h have a solution
+    with pytest.raises(SolverError) as e:
+        evaluate_many('Water', {'T': T, 'h': h}, ['p'], workers=1)
+    assert np.count_nonzero(e.value.failed) == 45
+    loose = evaluate_many('Water', {'T': T, 'h': h}, ['p'], workers=1, strict=False)['p'].magnitude
+    np.testing.assert_array_equal(np.isnan(loose), e.value.failed)
+    np.testing.assert_array_equal(e.value.values['p'].magnitude, loose)
+
+
+def test_shards_of_worker_processes(small_shards):
+    p, T = np.full(100, 10.), np.linspace(300, 900, 100)
+    direct = evaluate_many('Water', {'p': p, 'T': T}, ['h', 'cp'], workers=1)
+    shared = evaluate_many('Water', {'p': p, 'T': T}, ['h', 'cp'], workers=2)
+    np.testing.assert_array_equal(shared['h'].magnitude, direct['h'].magnitude)
+    np.testing.assert_array_equal(shared['cp'].magnitude, direct['cp'].magnitude)
+    assert 2 in _evaluate_many._executors
+
+
+def test_invalid_outputs():
+    with pytest.raises(ValueError):
+        evaluate_many('Water', {'p': [1], 'T': [300]}, ['H'], workers=1)
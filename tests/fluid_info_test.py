@@ -0,0 +1,33 @@
+import json
+import os
+import pytest
+from CoolProp.CoolProp import PropsSI
+from tt.cache import coolprop_version
+from tt.fluid_state import FluidInfo, get_fluid_info, preload_fluids
+from tt.fluid_state import _fluid_info
+
+
+def test_shared_info():
+    info = get_fluid_info('Water')
+    assert info is get_fluid_info('Water')
+    assert preload_fluids(['Water']) == [info]
+    assert info.constants['T_critical'] == pytest.approx(PropsSI('Tcrit', 'Water'))
+    assert info.critical_point.p.to('Pa').magnitude == pytest.approx(info.constants['p_critical'])
+    assert info.triple_point_vapor.x.magnitude == 1
+
+
+def test_file_is_keyed_by_coolprop_version(monkeypatch):
+    get_fluid_info('Nitrogen')
+    path = _fluid_info._info_file('Nitrogen')
+    assert os.path.basename(os.path.dirname(path)) == coolprop_version()
+    with open(path) as f:
+        assert set(json.load(f)) == set(FluidInfo.CONSTANTS)
+    monkeypatch.setattr(_fluid_info, '_fluid_infos', {})
+    monkeypatch.setattr(FluidInfo, 'from_coolprop', None)  # must be read from the file
+    assert get_fluid_info('Nitrogen').constants['T_critical'] == pytest.approx(PropsSI('Tcrit', 'Nitrogen'))
+
+
+def test_backend_prefix():
+    info = get_fluid_info('IF97::Water')
+    assert info.constants['T_critical'] == pytest.approx(PropsSI('Tcrit', 'IF97::Water'))
+    assert _fluid_info._info_file('IF97::Water') != _fluid_info._info_file('Water')
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from tt.fluid_state import FluidState, FluidStateArray, SolverError
+
+
+@pytest.fixture
+def states():
+    return FluidStateArray('Water', {'T': [300, 400, 500], 'p': [1, 2, 3]})
+
+
+def test_values_match_single_states(states):
+    for i, (T, p) in enumerate([(300, 1), (400, 2), (500, 3)]):
+        state = FluidState('Water', {'T': T, 'p': p})
+        for pn in ('h', 's', 'rho', 'cp', 'x'):
+            assert states.get_property(pn).magnitude[i] == pytest.approx(state.get_property(pn).magnitude)
+
+
+def test_one_batch_flash(states):
+    FluidState.reset_coolprop_calls()
+    states.h, states.s, states.rho, states.phase
+    assert FluidState.reset_coolprop_calls() == 1
+
+
+def test_broadcast_and_getitem():
+    states = FluidStateArray('Water', {'T': np.linspace(300, 500, 5), 'p': 1})
+    assert len(states) == 5
+    assert isinstance(states[0], FluidState) and not isinstance(states[0], FluidStateArray)
+    assert len(states[1:3]) == 2
+    np.testing.assert_allclose(states[1:3].h.magnitude, states.h.magnitude[1:3])
+    assert [s.T.magnitude for s in states] == pytest.approx(np.linspace(300, 500, 5))
+
+
+def test_from_states():
+    single = [FluidState('Water', {'T': T, 'p': 1}) for T in (300, 350)]
+    states = FluidStateArray.from_states(single)
+    np.testing.assert_allclose(states.h.magnitude, [s.h.magnitude for s in single])
+    with pytest.raises(ValueError):
+        FluidStateArray.from_states([single[0], FluidState('Water', {'T': 300, 'h': 1e5})])
+
+
+def test_summary(states, capsys):
+    states.summary()
+    output = capsys.readouterr().out
+    assert 'h [J / kg]' in output
+    assert len([line for line in output.splitlines() if line.startswith('| ')]) == 1 + len(states)
+
+
+def test_flash_returns_the_failed_mask():
+    states = FluidStateArray('Water', {'T': [500, 500, 300], 'h': [2.5e6, 3e6, 2.6e6]})
+    with pytest.raises(SolverError):
+        states.flash()
+    failed = states.flash(strict=False)
+    np.testing.assert_array_equal(failed, [False, True, True])
+    assert np.isfinite(states.p.magnitude[0]) and np.all(np.isnan(states.p.magnitude[1:]))
+    np.testing.assert_array_equal(states[1:].flash(strict=False), [True, True])
+    assert not states[:1].flash().any()
+    with pytest.raises(SolverError) as e:
+        states.flash()
+    np.testing.assert_array_equal(e.value.failed, failed)
+    assert not FluidStateArray('Water', {'T': [300, 400], 'p': [1, 1]}).flash().any()
@@ -0,0 +1,48 @@
+import pytest
+from tt.fluid_state import FluidState, ureg
+
+
+@pytest.fixture
+def state():
+    return FluidState('Water', {'T': 400, 'p': 2})
+
+
+def test_one_coolprop_call_for_all_state_properties(state):
+    FluidState.reset_coolprop_calls()
+    state.h, state.s, state.u, state.rho, state.cv, state.cp, state.x, state.g, state.f, state.phase
+    assert FluidState.reset_coolprop_calls() == 1
+    state.h, state.s
+    assert FluidState.reset_coolprop_calls() == 0
+
+
+def test_molar_properties_from_mass_specific_values(state):
+    M = state.M.to('kg/mol').magnitude
+    assert state.h_molar.to('J/mol').magnitude == pytest.approx(state.h.to('J/kg').magnitude * M)
+    assert state.s_molar.to('J/(mol K)').magnitude == pytest.approx(state.s.to('J/(kg K)').magnitude * M)
+
+
+def test_molar_input():
+    state = FluidState('Water', {'T': 400, 'p': 2})
+    molar = FluidState('Water', {'T': 400, 'rho_molar': state.get_property('rho_molar')})
+    assert molar.rho.to('kg/m^3').magnitude == pytest.approx(state.rho.to('kg/m^3').magnitude)
+    assert molar.h.to('J/kg').magnitude == pytest.approx(state.h.to('J/kg').magnitude)
+
+
+def test_quantity_inputs(state):
+    same = FluidState('Water', {'T': ureg.Quantity(126.85, 'degC'), 'p': ureg.Quantity(200, 'kPa')})
+    assert same.h.to('J/kg').magnitude == pytest.approx(state.h.to('J/kg').magnitude)
+
+
+def test_values_in_coolprop_units(state):
+    h, s, T, p = state.values(['h', 's', 'T', 'p'])
+    assert isinstance(h, float)
+    assert h == pytest.approx(state.h.to('J/kg').magnitude)
+    assert s == pytest.approx(state.s.to('J/(kg K)').magnitude)
+    assert (T, p) == (400, 2e5)
+    assert state.value('v') == pytest.approx(1 / state.value('rho'))
+    assert state.value('cp_molar') == pytest.approx(state.cp_molar.to('J/(mol K)').magnitude)
+
+
+def test_si_inputs(state):
+    si = FluidState('Water', {'T': 400, 'p': 2e5}, si=True)
+    assert si.value('h') == state.value('h')
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from tt.fluid_state import AbstractFluid, FluidStateArray, IsoLineSampler, ureg
+
+
+@pytest.fixture(scope='module')
+def fluid():
+    return AbstractFluid('Water')
+
+
+def _isobar(fluid, sampler, p=10):
+    return fluid.get_iso_line('p', ureg.Quantity(p, 'bar'), 'T', ureg.Quantity(300, 'K'), ureg.Quantity(900, 'K'),
+                              sampler=sampler)
+
+
+def test_isobar_within_tolerance(fluid):
+    sampler = IsoLineSampler('s', 'kJ/(kg K)', 'T', 'K', tolerance=1e-3)
+    line = _isobar(fluid, sampler)
+    s, T = line.s.to('kJ/(kg K)').magnitude, line.T.magnitude
+    assert np.all(np.diff(T) >= 0)
+    # the saturated liquid and vapor states are on the line
+    assert np.count_nonzero(line.phase == 'twophase') == 2
+    assert np.isclose(s, 2.1381, atol=1e-3).any() and np.isclose(s, 6.5850, atol=1e-3).any()
+    # midpoints of all intervals are close to the straight lines between the points
+    T_mid = (T[1:] + T[:-1]) / 2
+    mid = FluidStateArray('Water', {'p': 10, 'T': T_mid})
+    single_phase = np.diff(T) > 1e-6
+    s_line = np.interp(T_mid, T, s)
+    deviation = np.abs(mid.s.to('kJ/(kg K)').magnitude - s_line) / np.ptp(s)
+    assert np.max(deviation[single_phase]) < 5e-3
+    assert sampler.n_evaluations < 200
+
+
+def test_max_points(fluid):
+    sampler = IsoLineSampler('s', 'kJ/(kg K)', 'T', 'K', tolerance=1e-6, max_points=50)
+    line = _isobar(fluid, sampler)
+    assert sampler.n_evaluations <= 52 and len(line) == sampler.n_evaluations
+
+
+def test_isochore_phase_change_is_bisected(fluid):
+    sampler = IsoLineSampler.from_pixels('T', 'K', 'p', 'bar', y_log=True, pixels=0.5)
+    line = fluid.get_iso_line('v', ureg.Quantity(0.1, 'm^3/kg'), 'T', ureg.Quantity(300, 'K'),
+                              ureg.Quantity(700, 'K'), sampler=sampler)
+    two_phase = line.phase == 'twophase'
+    boundary = np.flatnonzero(two_phase[:-1] != two_phase[1:])
+    assert len(boundary) == 1
+    T = line.T.magnitude
+    assert T[boundary[0] + 1] - T[boundary[0]] < 0.1 * 400 / 640
+
+
+def test_invalid_space(fluid):
+    sampler = IsoLineSampler('s', 'kJ/(kg K)', 'T', 'K')
+    with pytest.raises(ValueError):
+        fluid.get_iso_line('p', ureg.Quantity(10, 'bar'), 'T', ureg.Quantity(-1, 'K'), ureg.Quantity(900, 'K'),
+                           space='log', sampler=sampler)
@@ -0,0 +1,106 @@
+import os
+import time
+import numpy as np
+import pytest
+from tt.jobs import JobNotFound, JobQueue, JobStore, property_sweep, register_job_kind
+from tt import jobs
+
+
+def crash(params, report):
+    os._exit(1)
+
+
+def _wait(store: JobStore, job_id: str, timeout: float = 60) -> dict:
+    end = time.time() + timeout
+    while time.time() < end:
+        status = store.status(job_id)
+        if status['state'] in ('finished', 'failed'):
+            return status
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path))
+
+
+@pytest.fixture
+def queue(store):
+    queue = JobQueue(store, workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def test_store(store):
+    job_id = store.create('property_sweep', {'a': 1})
+    assert store.status(job_id)['state'] == 'queued'
+    assert store.add_part(job_id, {'x': [1., float('nan')]}) == 0 and store.part(job_id, 0) == {'x': [1., None]}
+    store.set_result(job_id, np.arange(2))
+    assert store.result(job_id) == [0, 1] and store.status(job_id)['ended'] is not None
+    with pytest.raises(JobNotFound):
+        store.status('../x')
+    store.ttl = -1
+    assert store.purge() == 1
+    with pytest.raises(JobNotFound):
+        store.status(job_id)
+
+
+def test_property_sweep():
+    parts = []
+    result = property_sweep({'fluid': 'Water', 'inputs': {'p': [1, 10], 'T': [300, 400, 500]}, 'outputs': ['h'],
+                             'grid': True, 'chunk_size': 4}, lambda progress, part: parts.append((progress, part)))
+    assert len(result['outputs']['h']) == 6 and [p for p, _ in parts] == [4 / 6, 1]
+    assert parts[1][1]['offset'] == 4
+    with pytest.raises(ValueError):
+        property_sweep({'fluid': 'Water', 'inputs': {'p': np.ones(2000), 'T': np.ones(2000)}, 'outputs': ['h'],
+                        'grid': True}, None)
+    with pytest.raises(ValueError):
+        property_sweep({'fluid': 'Water', 'inputs': {'p': [1], 'T': [300]}, 'outputs': ['h', 'H']},
+                       lambda progress, part: parts.append(part))
+    assert len(parts) == 2  # nothing is reported for unknown outputs
+
+
+def test_queue_runs_jobs(queue):
+    job_id = queue.submit('property_sweep', {'fluid': 'Water', 'inputs': {'p': [1, 1], 'T': [300, -5]},
+                                             'outputs': ['h']})
+    assert _wait(queue.store, job_id)['state'] == 'finished'
+    h = queue.store.result(job_id)['outputs']['h']
+    assert h[0] == pytest.approx(112.65e3, rel=1e-3) and h[1] is None
+    with pytest.raises(ValueError):
+        queue.submit('nope', {})
+
+
+def test_dead_worker_discards_the_pool(queue, monkeypatch):
+    monkeypatch.setitem(jobs.JOB_KINDS, 'crash', 'jobs_test:crash')
+    job_id = queue.submit('crash', {})
+    status = _wait(queue.store, job_id)
+    assert status['state'] == 'failed' and 'worker failed' in status['error']
+    time.sleep(0.1)
+    assert queue._executor is None and queue._jobs == {}
+    job_id = queue.submit('property_sweep', {'fluid': 'Water', 'inputs': {'p': [1], 'T': [300]}, 'outputs': ['h']})
+    assert _wait(queue.store, job_id)['state'] == 'finished'
+
+
+def test_discarded_pool_fails_its_jobs(queue):
+    class Executor:
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = cancel_futures
+    executor, other = Executor(), Executor()
+    running, finished, elsewhere = (queue.store.create('property_sweep', {}) for _ in range(3))
+    queue.store.update(running, state='running')
+    queue.store.set_result(finished, 1)
+    queue._executor = executor
+    queue._jobs = {running: executor, finished: executor, elsewhere: other}
+    queue._discard_executor(executor)
+    assert queue._executor is None and executor.shut_down
+    assert queue.store.status(running)['state'] == 'failed'
+    assert queue.store.status(finished)['state'] == 'finished' and queue.store.status(elsewhere)['state'] == 'queued'
+    queue._executor = other
+    queue._discard_executor(executor)
+    assert queue._executor is other
+
+
+def test_registered_kinds_need_a_module():
+    with pytest.raises(ValueError):
+        register_job_kind('x', 'crash')
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from tt.fluid_state._engine import CoolPropEngine
+
+
+@pytest.fixture
+def engine():
+    return CoolPropEngine('Water')
+
+
+@pytest.mark.parametrize('inputs', [{'T': 400., 'Q': 0.5}, {'P': 5e5, 'Hmass': 1.5e6}, {'T': 400., 'Dmass': 10.},
+                                    {'P': 5e5, 'Smass': 4000.}])
+def test_same_wet_state_twice(engine, inputs):
+    outputs = CoolPropEngine.LEVER_OUTPUTS + ['Cvmass', 'Cpmass']
+    first = engine.evaluate(inputs, outputs)
+    second = engine.evaluate(inputs, outputs)
+    assert first['phase'] == 'twophase'
+    for o in outputs:
+        assert first[o] == second[o] or np.isnan(first[o]) and np.isnan(second[o]), o
+    assert first['Cvmass'] > 0
+
+
+def test_same_wet_array_twice(engine):
+    inputs = {'P': np.full(20, 5e5), 'Hmass': np.linspace(1e6, 2.5e6, 20)}
+    first = engine.evaluate_array(inputs, CoolPropEngine.LEVER_OUTPUTS)
+    second = engine.evaluate_array(inputs, CoolPropEngine.LEVER_OUTPUTS)
+    for o in CoolPropEngine.LEVER_OUTPUTS:
+        np.testing.assert_array_equal(first[o], second[o])
+
+
+def test_lever_rule_matches_flash(engine):
+    p, h = np.full(50, 5e5), np.linspace(7e5, 2.7e6, 50)
+    outputs = ['T', 'Q', 'Dmass', 'Smass', 'Umass', 'phase']
+    before = CoolPropEngine.n_updates
+    lever = engine.evaluate_array({'P': p, 'Hmass': h}, outputs)
+    assert CoolPropEngine.n_updates - before < 20  # two saturation flashes for all wet states
+    for i in range(len(p)):
+        flashed = engine.evaluate({'P': p[i], 'Hmass': h[i]}, outputs)
+        assert lever['phase'][i] == flashed['phase']
+        for o in outputs[:-1]:
+            assert lever[o][i] == pytest.approx(flashed[o], rel=1e-10)
+
+
+def test_cv_and_cp_are_flashed(engine):
+    inputs = {'T': np.full(5, 400.), 'Q': np.linspace(0.1, 0.9, 5)}
+    values = engine.evaluate_array(inputs, ['Hmass', 'Cvmass', 'Cpmass'])
+    assert np.all(np.isfinite(values['Cvmass'])) and np.all(np.isfinite(values['Cpmass']))
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from tt.fluid_state import Fluid, Process, SolverError
+from tt.fluid_state._engine import CoolPropEngine
+
+
+@pytest.fixture
+def engine():
+    return CoolPropEngine('Water')
+
+
+@pytest.mark.parametrize('T, h', [(300., 2.6e6), (300., 3.3e6), (300., 4e6), (500., 3e6)])
+def test_roots_above_the_limits_are_no_solution(engine, T, h):
+    with pytest.raises(SolverError):
+        engine.evaluate({'T': T, 'Hmass': h}, ['P'])
+
+
+def test_solved_pair_matches_native_flash(engine):
+    expected = engine.evaluate({'P': 26e5, 'Hmass': 2.9e6}, ['T', 'Dmass', 'Smass'])
+    solved = engine.evaluate({'T': expected['T'], 'Hmass': 2.9e6}, ['P', 'Dmass', 'Smass'])
+    assert solved['P'] == pytest.approx(26e5, rel=1e-8)
+    assert solved['Smass'] == pytest.approx(expected['Smass'], rel=1e-8)
+
+
+def test_array_failed_mask(engine):
+    T = np.array([500., 500., 300.])
+    h = np.array([2.5e6, 3e6, 2.6e6])
+    with pytest.raises(SolverError) as e:
+        engine.evaluate_array({'T': T, 'Hmass': h}, ['P'])
+    np.testing.assert_array_equal(e.value.failed, [False, True, True])
+    assert np.isfinite(e.value.values['P'][0]) and np.all(np.isnan(e.value.values['P'][1:]))
+
+
+def test_quality_pair(engine):
+    solved = engine.evaluate({'Q': 0.5, 'Hmass': 1.5e6}, ['T', 'P'])
+    flashed = engine.evaluate({'T': solved['T'], 'Q': 0.5}, ['Hmass'])
+    assert flashed['Hmass'] == pytest.approx(1.5e6, rel=1e-8)
+
+
+def test_process_warm_start_only_for_solved_pairs():
+    fluid = Fluid('Water', {'T': 300, 'p': 20}, 1)
+    assert Process(fluid, 'p', 'h', 3e6).state_2._warm_start is None
+    state = Process(fluid, 'T', 'h', 2e5).state_2
+    assert state._warm_start is not None
+    assert state.p.to('bar').magnitude > 20
@@ -0,0 +1,33 @@
+import pytest
+from tt.fluid_state import FluidState, ureg
+from tt.fluid_state._properties import compile_properties
+
+
+def test_compiled_registry():
+    p = FluidState.property_info['p']
+    assert p.coolprop_sign == 'P' and p.coolprop_use and p.valid_input
+    assert p.unit == ureg.Unit('bar') and p.factor == pytest.approx(1e5)
+    assert FluidState.property_info['T_c'].valid_input is False
+
+
+def test_compile_rows():
+    rows = [{'sign': 'h', 'description': 'enthalpy', 'unit': 'kJ/kg', 'valid_input': 1, 'coolprop_use': 1,
+             'coolprop_sign': 'Hmass', 'coolprop_unit': 'J/kg'},
+            {'sign': 'm', 'description': 'mass', 'unit': 'kg', 'valid_input': 0, 'coolprop_use': 0,
+             'coolprop_sign': float('nan'), 'coolprop_unit': float('nan')}]
+    info = compile_properties(rows)
+    assert info['h'].factor == pytest.approx(1000)
+    assert info['m'].coolprop_sign is None and info['m'].factor is None
+
+
+def test_properties_table_matches_registry():
+    table = FluidState.properties
+    assert list(table.index) == list(FluidState.property_info)
+    assert table.loc['h', 'coolprop_sign'] == FluidState.property_info['h'].coolprop_sign
+
+
+def test_invalid_names():
+    with pytest.raises(ValueError):
+        FluidState('Water', {'T': 300, 'T_c': 1})
+    with pytest.raises(ValueError):
+        FluidState('Water', {'T': 300, 'p': 1}).get_property('foo')
@@ -0,0 +1,77 @@
+import json
+import os
+import numpy as np
+import pytest
+from tt.fluid_state import PropertyTable, get_property_table
+from tt.fluid_state import _property_table
+from tt.fluid_state._engine import get_engine
+
+P_RANGE, T_RANGE = (1e5, 1e7), (400., 800.)
+
+
+@pytest.fixture(scope='module')
+def table():
+    table = PropertyTable.build('Water', 'pT', P_RANGE, T_RANGE, shape=(40, 40))
+    table.tolerance = 1e-3
+    table.validate(n_samples=500)
+    return table
+
+
+def _points(n=200, seed=1):
+    rng = np.random.default_rng(seed)
+    return np.exp(rng.uniform(np.log(2e5), np.log(5e6), n)), rng.uniform(420., 780., n)
+
+
+def test_interpolated_values_within_tolerance(table):
+    p, T = _points()
+    values, valid = table._interpolate(p, T, ['Hmass', 'Smass', 'Dmass'])
+    exact = get_engine('Water', 'HEOS').evaluate_array({'P': p[valid], 'T': T[valid]}, ['Hmass', 'Smass', 'Dmass'])
+    assert np.count_nonzero(valid) > 100
+    for o in ('Hmass', 'Smass', 'Dmass'):
+        assert np.max(np.abs(values[o][valid] / exact[o] - 1)) < 1e-3
+        assert np.all(np.isnan(values[o][~valid]))
+
+
+def test_outputs_above_the_tolerance_are_rejected(table):
+    strict = PropertyTable(table.fluid_name, table.kind, table.p_axis, table.y_axis, table.data, table.phases,
+                           table.validation, tolerance=1e-12)
+    assert all(set(outputs) >= {'Hmass', 'Cpmass'} for outputs in strict.rejected.values())
+    values, valid = strict._interpolate(*_points(), ['Hmass'])
+    assert not np.any(valid) and np.all(np.isnan(values['Hmass']))
+    assert table.rejected['gas'] != strict.rejected['gas']
+
+
+def test_save_replaces_a_table_atomically(table, tmp_path):
+    path = str(tmp_path / 'table')
+    table.save(path)
+    loaded = PropertyTable.load(path)
+    assert loaded.tolerance == table.tolerance and loaded.rejected == table.rejected
+    np.testing.assert_array_equal(loaded.data['Hmass'], table.data['Hmass'])
+    mapped = loaded.data['Hmass']
+    with open(os.path.join(path, 'table.json'), 'w') as f:
+        f.write('{"fluid_name": ')  # partly written
+    table.save(path)
+    np.testing.assert_array_equal(mapped, table.data['Hmass'])  # the mapped file was not truncated
+    assert PropertyTable.load(path).validation == json.loads(json.dumps(table.validation))
+    assert os.listdir(tmp_path) == ['table']
+
+
+def test_get_property_table_is_shared_and_validated():
+    table = get_property_table('Water', 'pT', P_RANGE, T_RANGE, shape=(20, 20))
+    assert get_property_table('Water', 'pT', P_RANGE, T_RANGE, shape=(20, 20)) is table
+    assert table.tolerance == 1e-3 and 'gas' in table.validation
+
+
+def test_table_backend_falls_back_to_heos(table, monkeypatch):
+    monkeypatch.setattr(_property_table, 'get_property_table', lambda fluid_name, kind: table)
+    engine = _property_table.TableEngine('Water')
+    p = np.array([2e5, 2e5, 1e3, 2e5])
+    T = np.array([600., 300., 600., 600.])  # interpolated, liquid and low pressure outside the table
+    values = engine.evaluate_array({'P': p, 'T': T}, ['Hmass', 'Cpmass', 'phase'])
+    exact = get_engine('Water', 'HEOS').evaluate_array({'P': p, 'T': T}, ['Hmass', 'Cpmass', 'phase'])
+    np.testing.assert_allclose(values['Hmass'], exact['Hmass'], rtol=1e-3)
+    np.testing.assert_array_equal(values['Hmass'][1:3], exact['Hmass'][1:3])
+    np.testing.assert_array_equal(values['phase'], exact['phase'])
+    values = engine.evaluate_array({'P': p, 'Dmass': np.full(4, 1.)}, ['T'])  # no table, exact
+    np.testing.assert_array_equal(values['T'], get_engine('Water', 'HEOS').evaluate_array(
+        {'P': p, 'Dmass': np.full(4, 1.)}, ['T'])['T'])
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from flask import Flask
+from app.routes import _Dampfturbine
+from tt.fluid_state import RankineCycle
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(_Dampfturbine.Dampfturbine_routes)
+    return app.test_client()
+
+
+def test_cycle_with_reheat():
+    cycle = RankineCycle(80, 753.15, 0.08, p_reheat=7, T_reheat=713.15)
+    assert cycle.efficiency.magnitude == pytest.approx(0.4033, abs=1e-4)
+    assert cycle.x_turbine_exit.magnitude == pytest.approx(0.9387, abs=1e-4)
+    assert cycle.w_net.to('kJ/kg').magnitude == pytest.approx(
+        (cycle.q_in - cycle.q_out).to('kJ/kg').magnitude, rel=1e-12)
+
+
+def test_cycles_match_single_cycles():
+    p_boiler, eta_turbine = np.array([[40.], [80.], [160.]]), np.array([0.85, 1.])
+    cycles = RankineCycle(p_boiler, 753.15, 0.08, eta_turbine=eta_turbine)
+    assert cycles.efficiency.shape == (3, 2)
+    single = RankineCycle(80, 753.15, 0.08, eta_turbine=0.85)
+    assert cycles.efficiency.magnitude[1, 0] == pytest.approx(single.efficiency.magnitude, rel=1e-12)
+    assert np.all(np.diff(cycles.efficiency.magnitude, axis=0) > 0)
+
+
+def test_cycles_without_solution_are_nan():
+    efficiency = RankineCycle([80, 80], [753.15, 10], 0.08).efficiency.magnitude
+    assert np.isfinite(efficiency[0]) and np.isnan(efficiency[1])
+
+
+def test_summary(capsys):
+    RankineCycle(80, 753.15, 0.08).summary()
+    assert sum(line.startswith('| ') for line in capsys.readouterr().out.splitlines()) == 6 + 1 + 7 + 1
+    RankineCycle([40, 80, 160], 753.15, 0.08).summary()
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith('| ')]
+    assert len(lines) == 1 + 3 and 'efficiency' in lines[0]
+
+
+def test_cycle_endpoint(client):
+    data = client.get('/Dampfturbine/cycle?p_boiler=80&T_live=753.15&p_condenser=0.08&p_reheat=7&'
+                      'T_reheat=713.15').get_json()
+    assert data['shape'] == [1] * 7 and data['results']['efficiency'][0] == pytest.approx(0.4033, abs=1e-4)
+    data = client.get('/Dampfturbine/cycle?p_boiler=20:200:4&eta_turbine=0.8,0.9').get_json()
+    assert data['shape'] == [4, 1, 1, 2, 1] and len(data['results']['efficiency']) == 8
+
+
+@pytest.mark.parametrize('query', ['p_boiler=0:1:1000000000', 'p_boiler=1:2:0', 'p_boiler=' + ','.join(['80'] * 200001),
+                                   'p_boiler=1:100:1000&T_live=600:900:1000', 'p_boiler=x',
+                                   '&'.join(f'{p}=1:2:200000' for p in _Dampfturbine.CYCLE_PARAMETERS)])
+def test_invalid_cycles(client, query):
+    response = client.get('/Dampfturbine/cycle?' + query)
+    assert response.status_code == 400 and response.get_json()['error'].startswith('no valid cycle')
@@ -0,0 +1,115 @@
+import threading
+import time
+import pytest
+from flask import Flask
+from app.routes import _tt1
+from app.routes._render_cache import RenderCache, chart_key
+
+
+def test_chart_key():
+    assert chart_key({'a': 1, 'b': [1, 2]}) == chart_key({'b': [1, 2], 'a': 1})
+    assert chart_key({'a': 1}) != chart_key({'a': 2})
+
+
+def test_memory_and_disk_tiers(tmp_path, monkeypatch):
+    monkeypatch.setenv('TT_CACHE_DIR', str(tmp_path))
+    cache = RenderCache('test')
+    assert cache.get('a', lambda: b'image') == b'image'
+    assert cache.get('a', lambda: b'other') == b'image'
+    assert RenderCache('test').get('a', lambda: b'other') == b'image'  # from the disk tier
+    assert cache.statistics['renders'] == 1 and cache.statistics['memory_hits'] == 1
+
+
+def test_eviction():
+    cache = RenderCache('evicted', max_memory=10, max_disk=0)
+    for key in 'abc':
+        cache.get(key, lambda: b'12345')
+    assert list(cache._memory) == ['b', 'c']
+    cache.get('b', lambda: b'')  # b is used, so c is evicted next
+    cache.get('d', lambda: b'12345')
+    assert list(cache._memory) == ['b', 'd']
+
+
+def test_single_flight():
+    cache = RenderCache('flight', max_disk=0)
+    started, calls = threading.Event(), []
+
+    def render():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return b'image'
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('a', render))) for _ in range(8)]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and results == [b'image'] * 8 and cache.statistics['waits'] == 7
+
+
+def test_errors_are_not_cached():
+    cache = RenderCache('errors', max_disk=0)
+    with pytest.raises(ValueError):
+        cache.get('a', lambda: (_ for _ in ()).throw(ValueError('no chart')))
+    assert cache.get('a', lambda: b'image') == b'image'
+
+
+def test_conditional_get(monkeypatch):
+    renders = []
+    monkeypatch.setattr(_tt1, 'chart_cache', RenderCache('route', max_disk=0))
+    monkeypatch.setattr(_tt1.render_pool, 'render', lambda function, definition: renders.append(definition) or b'png')
+    app = Flask(__name__)
+    app.register_blueprint(_tt1.tt1_routes)
+    client = app.test_client()
+    response = client.get('/fluid_state_img?x_log=1')
+    etag = response.headers['ETag']
+    assert response.data == b'png' and renders[0]['x_log'] is True
+    assert client.get('/fluid_state_img?x_log=1', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/fluid_state_img?x_log=1').data == b'png'
+    assert client.get('/fluid_state_img').headers['ETag'] != etag
+    assert len(renders) == 2
+
+
+def test_every_error_reaches_the_waiting_calls():
+    cache = RenderCache('waiting', max_disk=0)
+    started, release = threading.Event(), threading.Event()
+
+    def render():
+        started.set()
+        release.wait()
+        raise KeyboardInterrupt  # not an Exception, the waiting calls must not get None
+    errors = []
+
+    def call():
+        try:
+            cache.get('a', render)
+        except BaseException as e:
+            errors.append(type(e))
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    while cache.statistics['waits'] < 2:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert errors == [KeyboardInterrupt] * 3
+    assert cache.get('a', lambda: b'image') == b'image' and cache._flights == {}
+
+
+def test_chart_errors(monkeypatch):
+    def render(function, definition):
+        raise ValueError('no chart') if definition['x_property'] == 'nope' else RuntimeError('a bug')
+    monkeypatch.setattr(_tt1, 'chart_cache', RenderCache('route_errors', max_disk=0))
+    monkeypatch.setattr(_tt1.render_pool, 'render', render)
+    app = Flask(__name__)
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    app.register_blueprint(_tt1.tt1_routes)
+    client = app.test_client()
+    assert client.get('/fluid_state_img?x_property=nope').status_code == 400
+    assert client.get('/fluid_state_img').status_code == 500
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from app.routes._render_pool import RenderPool, RenderPoolBusy
+from tt.fluid_state import render_chart
+from tt.fluid_state import _thermo_chart
+
+DEFINITION = {'kind': 'pv', 'fluid': 'Water', 'state': {'p': 100, 'v': 0.02}, 'processes': [['p', 'T', 400]],
+              'x_property': 'v', 'x_unit': 'm**3/kg', 'y_property': 'p', 'y_unit': 'bar', 'x_log': True,
+              'y_log': True}
+
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(workers=1, max_pending=1, timeout=30, queue_timeout=0.2)
+    yield pool
+    pool.shutdown()
+
+
+def test_render_chart_reuses_one_figure_per_thread():
+    png = render_chart(DEFINITION)
+    figure = _thermo_chart._figures.figure
+    assert png.startswith(b'\x89PNG') and render_chart(DEFINITION) == png
+    assert _thermo_chart._figures.figure is figure and not figure.axes
+
+
+def test_render_chart_without_pyplot():
+    code = (f'import sys; from tt.fluid_state import render_chart; render_chart({DEFINITION!r}); '
+            f'print("matplotlib.pyplot" in sys.modules)')
+    root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                          cwd=root).stdout.strip() == 'False'
+
+
+def test_threads_render_the_same_image():
+    expected = render_chart(DEFINITION)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(render_chart(DEFINITION))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [expected] * 4
+
+
+def test_pool_renders_and_limits_pending_renders(pool):
+    assert pool.render(pow, 2, 10) == 1024
+    thread = threading.Thread(target=pool.render, args=(time.sleep, 1))
+    thread.start()
+    time.sleep(0.1)
+    with pytest.raises(RenderPoolBusy):
+        pool.render(pow, 2, 10)
+    thread.join()
+    assert pool.render(pow, 2, 3) == 8  # the slot is released
+
+
+def test_pool_timeout(pool):
+    with pytest.raises(TimeoutError):
+        pool.render(time.sleep, 1, timeout=0.1)
@@ -0,0 +1,41 @@
+import os
+import numpy as np
+import pytest
+from CoolProp.CoolProp import PropsSI
+from tt.cache import coolprop_version
+from tt.fluid_state import SaturationDome, get_saturation_dome
+from tt.fluid_state import _saturation
+
+
+def test_dome_states():
+    dome = get_saturation_dome('Water', 'T', 20)
+    assert len(dome.liquid) == len(dome.vapor) == len(dome.triple_line) == 20
+    np.testing.assert_array_equal(dome.liquid.x.magnitude, 0)
+    np.testing.assert_array_equal(dome.vapor.x.magnitude, 1)
+    T = dome.vapor.T.magnitude[5]
+    assert dome.vapor.value('h')[5] == pytest.approx(PropsSI('Hmass', 'T', T, 'Q', 1, 'Water'), rel=1e-9)
+    assert dome.branch(0) is dome.liquid
+    with pytest.raises(ValueError):
+        dome.branch(0.5)
+
+
+def test_dome_is_shared_and_kept_on_disk(monkeypatch):
+    dome = get_saturation_dome('Water', 'p', 15)
+    assert get_saturation_dome('Water', 'p', 15) is dome
+    path = _saturation._dome_file(('Water', 'HEOS', 'p', 'linear', 15))
+    assert os.path.basename(os.path.dirname(path)) == coolprop_version()
+    monkeypatch.setattr(_saturation, '_domes', type(_saturation._domes)())
+    monkeypatch.setattr(SaturationDome, 'build', None)  # must be read from the file
+    loaded = get_saturation_dome('Water', 'p', 15)
+    assert loaded is not dome
+    np.testing.assert_array_equal(loaded.vapor.value('s'), dome.vapor.value('s'))
+    assert list(loaded.liquid.phase) == list(dome.liquid.phase)
+
+
+def test_least_recently_used_domes_are_dropped(monkeypatch):
+    monkeypatch.setattr(_saturation, 'max_saturation_domes', 2)
+    first = get_saturation_dome('Water', 'T', 5)
+    get_saturation_dome('Water', 'T', 6)
+    get_saturation_dome('Water', 'T', 7)
+    assert len(_saturation._domes) == 2
+    assert get_saturation_dome('Water', 'T', 5) is not first
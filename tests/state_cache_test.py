@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from tt.fluid_state import FluidState, SolverError, get_state_cache, set_state_cache
+from tt.fluid_state import _state_cache
+from tt.fluid_state._engine import CoolPropEngine
+from tt.fluid_state._state_cache import StateCache, _quantize
+
+
+@pytest.fixture
+def engine():
+    return CoolPropEngine('Water')
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StateCache(str(tmp_path / 'states.sqlite'))
+
+
+@pytest.fixture
+def unconfigured(monkeypatch):
+    for name in ('TT_STATE_CACHE', 'TT_STATE_CACHE_TOLERANCE', 'TT_STATE_CACHE_MAX_ENTRIES'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(_state_cache, '_state_cache', None)
+    monkeypatch.setattr(_state_cache, '_configured', False)
+
+
+@pytest.mark.parametrize('tolerance', [1e-9, 5e-6, 1e-3])
+def test_quantization_grid_follows_the_tolerance(tolerance):
+    values = np.array([1e-3, 1., 3e5, -2e7])
+    keys = _quantize(values, tolerance)
+    np.testing.assert_allclose(keys, values, rtol=tolerance)
+    neighbours = values * (1 + 0.1 * tolerance)
+    assert np.sum(_quantize(neighbours, tolerance) == keys) >= 3
+    np.testing.assert_array_less(np.abs(keys), np.abs(_quantize(values * (1 + 2 * tolerance), tolerance)))
+    np.testing.assert_array_equal(_quantize(np.array([0., np.inf, np.nan]), tolerance)[:2], [0, np.inf])
+
+
+def test_states_are_stored_and_found(engine, cache):
+    inputs = {'P': np.array([1e5, 1e6, 1e7]), 'T': np.array([300., 500., 700.])}
+    outputs = ['Hmass', 'Smass', 'phase']
+    expected = engine.evaluate_array(inputs, outputs)
+    first = cache.evaluate_array(engine, inputs, outputs)
+    second = cache.evaluate_array(engine, {pn: v * (1 + 1e-12) for pn, v in inputs.items()}, outputs)
+    np.testing.assert_array_equal(first['Hmass'], expected['Hmass'])
+    np.testing.assert_array_equal(second['Smass'], expected['Smass'])
+    assert list(second['phase']) == list(expected['phase'])
+    assert cache.statistics['hits'] == 3 and cache.statistics['stores'] == 3 and len(cache) == 9
+    assert cache.evaluate(engine, {'P': 1e5, 'T': 300.}, outputs)['Hmass'] == expected['Hmass'][0]
+
+
+def test_failed_states_are_not_stored(engine, cache):
+    with pytest.raises(SolverError) as e:
+        cache.evaluate_array(engine, {'T': np.array([500., 500.]), 'Hmass': np.array([2.5e6, 3e6])}, ['P'])
+    np.testing.assert_array_equal(e.value.failed, [False, True])
+    assert cache.statistics['stores'] == 1
+
+
+def test_eviction(engine, tmp_path):
+    cache = StateCache(str(tmp_path / 'small.sqlite'), max_entries=40)
+    cache.evaluate_array(engine, {'P': np.full(50, 1e5), 'T': np.linspace(300, 400, 50)}, ['Hmass'])
+    cache.evaluate_array(engine, {'P': np.full(5, 2e5), 'T': np.linspace(300, 400, 5)}, ['Hmass'])
+    assert len(cache) <= 40 and cache.statistics['evictions'] > 0
+
+
+def test_setting_is_passed_through_the_environment(unconfigured, tmp_path, monkeypatch):
+    path = str(tmp_path / 'env.sqlite')
+    cache = set_state_cache(True, path, tolerance=5e-8, max_entries=1234)
+    assert get_state_cache() is cache
+    monkeypatch.setattr(_state_cache, '_configured', False)  # like a process started later
+    monkeypatch.setattr(_state_cache, '_state_cache', None)
+    cache = get_state_cache()
+    assert (cache.path, cache.tolerance, cache.max_entries) == (path, 5e-8, 1234)
+    assert set_state_cache(False) is None and get_state_cache() is None
+
+
+def test_fluid_states_use_the_cache(unconfigured, tmp_path):
+    cache = set_state_cache(True, str(tmp_path / 'fluid_states.sqlite'))
+    try:
+        h = FluidState('Water', {'T': 400, 'p': 10}).h
+        assert FluidState('Water', {'T': 400, 'p': 10}).h == h
+        assert cache.statistics['hits'] >= 1
+    finally:
+        set_state_cache(False)
+
+
+def test_warm_started_solutions_are_not_stored(engine, cache):
+    inputs = {'T': np.array([500.]), 'Hmass': np.array([2.9e6])}
+    cold = cache.evaluate_array(engine, inputs, ['P'])
+    assert cache.statistics['stores'] == 1
+    warm = cache.evaluate_array(engine, inputs, ['P'], {'T': 500., 'Dmass': 5.})
+    assert warm['P'][0] == pytest.approx(cold['P'][0], rel=1e-8)
+    assert cache.statistics['stores'] == 1 and cache.statistics['hits'] == 0
+    cache.evaluate_array(engine, {'P': np.array([1e5]), 'T': np.array([300.])}, ['Hmass'], {'T': 300., 'Dmass': 1.})
+    assert cache.statistics['stores'] == 2  # native pairs do not use the warm start
+
+
+def test_default_path_is_keyed_by_the_coolprop_version():
+    from tt.cache import coolprop_version
+    assert StateCache().path.endswith(f'states-{coolprop_version()}.sqlite')
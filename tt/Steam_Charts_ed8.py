@@ -1,9 +1,9 @@
 import CoolProp
 from CoolProp.CoolProp import PropsSI
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 import matplotlib.patches as patches
+from .fluid_state import get_saturation_dome, get_saturation_ancillaries, get_backend, coolprop_fluid_name
 
 
 Tc = PropsSI("Tcrit", "Water")
@@ -15,19 +15,22 @@ class SteamCharts:
     '''information regarding the pump and turbine conditions are stored
     here including the isentropic efficiencies'''
 
-    def __init__(self, t_steam, p_steam): # t in °C, p in bar
+    def __init__(self, t_steam, p_steam, backend=None): # t in °C, p in bar, backend e.g. 'IF97' (see set_backend)
+        self.backend = get_backend("Water", backend)
+        self.fluid = coolprop_fluid_name("Water", backend)
         self.T = t_steam + 273.15
         self.p = p_steam * 1e5
         self.saturated = 'False'
+        ancillaries = get_saturation_ancillaries("Water", self.backend)
         if self.p < Pc:
-            self.T1_sat = PropsSI("T","P",self.p,"Q",0,"HEOS::Water")
+            self.T1_sat = float(ancillaries.T_sat(self.p))
             if abs(self.T-self.T1_sat) < 0.2:
                 self.saturated = 'True'
         else:
             self.T1_sat = Tc - 10
 
         if self.T < Tc:
-            self.p1_sat = PropsSI("P","T",self.T,"Q",0,"HEOS::Water")
+            self.p1_sat = float(ancillaries.p_sat(self.T))
         else:
             self.p1_sat = Pc - 10
 
@@ -50,106 +53,134 @@ class SteamCharts:
             self.p_under = p_diff - 0.2 * self.p
         else:
             self.p_under = -p_diff - 0.2 * self.p    
-        
-    def T_v_plot(self):
+
+    @staticmethod
+    def _figure(show):
+        # only shown charts use pyplot, the others are drawn on a Figure with an Agg canvas
+        if show:
+            import matplotlib.pyplot as plt
+            fig = plt.figure()
+        else:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            fig = Figure()
+            FigureCanvasAgg(fig)
+        return fig, fig.add_subplot(1, 1, 1)
+
+    def T_v_plot(self, show=True):
         Temps = np.linspace(self.T1_sat + self.T_under, self.T + self.T_over,200)
-        fig = plt.figure()
+        fig, ax = self._figure(show)
         # plotting the isobar in T_v diagram
-        plt.semilogx(1/PropsSI("D","P",self.p,"T",Temps,"HEOS::Water"), Temps, label = 'Pressure = '+ str(self.p/1e5)+ ' bar, ')
+        ax.semilogx(1/PropsSI("D","P",self.p,"T",Temps,self.fluid), Temps, label = 'Pressure = '+ str(self.p/1e5)+ ' bar, ')
         if self.saturated == 'False':
-            plt.semilogx(1/PropsSI("D","P",self.p,"T",self.T,"HEOS::Water"), self.T, 'ro', \
+            ax.semilogx(1/PropsSI("D","P",self.p,"T",self.T,self.fluid), self.T, 'ro', \
                      label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
         else:
             v = float(input('The state is saturated. Enter the speoific volume in m^3/kg '))
-            plt.semilogx(v, self.T, 'ro', label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
+            ax.semilogx(v, self.T, 'ro', label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
                 
     
         # plotting the saturation states
-        Tc = PropsSI("Tcrit", "Water")
-        T_range = np.linspace(273.16, Tc, 200)
-        V_liquid = 1/PropsSI("D","T",T_range,"Q",0,"HEOS::Water")
-        V_vapor = 1/PropsSI("D","T",T_range,"Q",1,"HEOS::Water")
-        plt.semilogx(V_liquid, T_range)
-        plt.semilogx(V_vapor, T_range)
-
-        plt.xlabel('specific Volume (v) in m^3/kg')
-        plt.ylabel('Temperature [deg K]')
-        plt.legend(loc = 'best')
-        plt.show(block = False)
-
-    def p_v_plot(self):
+        dome = get_saturation_dome("Water", "T", 200, backend=self.backend)
+        T_range = dome.liquid.value('T')
+        V_liquid = dome.liquid.value('v')
+        V_vapor = dome.vapor.value('v')
+        ax.semilogx(V_liquid, T_range)
+        ax.semilogx(V_vapor, T_range)
+
+        ax.set_xlabel('specific Volume (v) in m^3/kg')
+        ax.set_ylabel('Temperature [deg K]')
+        ax.legend(loc = 'best')
+        if show:
+            import matplotlib.pyplot as plt
+            plt.show(block=False)
+        return fig
+
+    def p_v_plot(self, show=True):
         Press = np.linspace(self.p + self.p_under, self.p + self.p_over,200)
-        fig = plt.figure()
+        fig, ax = self._figure(show)
         # plotting the isotherm in P_v diagram
-        plt.semilogx(1/PropsSI("D","P",Press,"T",self.T,"HEOS::Water"), Press/1e5, label = 'Temperature = '+ str(self.T)+ ' K, ')
+        ax.semilogx(1/PropsSI("D","P",Press,"T",self.T,self.fluid), Press/1e5, label = 'Temperature = '+ str(self.T)+ ' K, ')
         if self.saturated == 'False':
-            plt.semilogx(1/PropsSI("D","P",self.p,"T",self.T,"HEOS::Water"), self.p/1e5, 'ro', \
+            ax.semilogx(1/PropsSI("D","P",self.p,"T",self.T,self.fluid), self.p/1e5, 'ro', \
                      label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
         else:
             v = float(input('The state is saturated. Enter the speoific volume in m^3/kg '))
-            plt.semilogx(v, self.p/1e5, 'ro', label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
+            ax.semilogx(v, self.p/1e5, 'ro', label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
     
         # plotting the saturation states 
-        P_range = np.logspace(np.log10(611), np.log10(Pc), 1000) # 611 is just above the triple point pressure
-        V_liquid = 1/PropsSI("D","P",P_range,"Q",0,"HEOS::Water")
-        V_vapor = 1/PropsSI("D","P",P_range,"Q",1,"HEOS::Water")
-        plt.semilogx(V_liquid, P_range/1e5)
-        plt.semilogx(V_vapor, P_range/1e5)
-        plt.gca().set_ylim(bottom = 0) # had problems with neg. pressures when above critical pt
-
-        plt.xlabel('specific Volume (v) in m^3/kg')
-        plt.ylabel('Pressure [bar]')
-        plt.legend(loc = 'best')
-        plt.show(block = False)
-
-    def logp_v_plot(self):
+        dome = get_saturation_dome("Water", "p", 1000, "log", self.backend)
+        P_range = dome.liquid.value('p')
+        V_liquid = dome.liquid.value('v')
+        V_vapor = dome.vapor.value('v')
+        ax.semilogx(V_liquid, P_range/1e5)
+        ax.semilogx(V_vapor, P_range/1e5)
+        ax.set_ylim(bottom = 0) # had problems with neg. pressures when above critical pt
+
+        ax.set_xlabel('specific Volume (v) in m^3/kg')
+        ax.set_ylabel('Pressure [bar]')
+        ax.legend(loc = 'best')
+        if show:
+            import matplotlib.pyplot as plt
+            plt.show(block=False)
+        return fig
+
+    def logp_v_plot(self, show=True):
         Press = np.linspace(self.p + self.p_under, self.p + self.p_over,200)
-        fig = plt.figure()
+        fig, ax = self._figure(show)
         # plotting the isotherm in P_v diagram
-        plt.loglog(1/PropsSI("D","P",Press,"T",self.T,"HEOS::Water"), Press/1e5, label = 'Temperature = '+ str(self.T)+ ' K, ')
+        ax.loglog(1/PropsSI("D","P",Press,"T",self.T,self.fluid), Press/1e5, label = 'Temperature = '+ str(self.T)+ ' K, ')
         if self.saturated == 'False':
-            plt.loglog(1/PropsSI("D","P",self.p,"T",self.T,"HEOS::Water"), self.p/1e5, 'ro', \
+            ax.loglog(1/PropsSI("D","P",self.p,"T",self.T,self.fluid), self.p/1e5, 'ro', \
                      label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
         else:
             v = float(input('The state is saturated. Enter the speoific volume in m^3/kg '))
-            plt.loglog(v, self.p/1e5, 'ro', label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
+            ax.loglog(v, self.p/1e5, 'ro', label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
     
         # plotting the saturation states 
-        P_range = np.logspace(np.log10(611), np.log10(Pc), 1000) # 611 is just above the triple point pressure
-        V_liquid = 1/PropsSI("D","P",P_range,"Q",0,"HEOS::Water")
-        V_vapor = 1/PropsSI("D","P",P_range,"Q",1,"HEOS::Water")
-        plt.loglog(V_liquid, P_range/1e5)
-        plt.loglog(V_vapor, P_range/1e5)
-        plt.gca().set_ylim(bottom = 0) # had problems with neg. pressures when above critical pt
-
-        plt.xlabel('specific Volume (v) in m^3/kg')
-        plt.ylabel('Pressure [bar]')
-        plt.legend(loc = 'best')
-        plt.show(block = False)
+        dome = get_saturation_dome("Water", "p", 1000, "log", self.backend)
+        P_range = dome.liquid.value('p')
+        V_liquid = dome.liquid.value('v')
+        V_vapor = dome.vapor.value('v')
+        ax.loglog(V_liquid, P_range/1e5)
+        ax.loglog(V_vapor, P_range/1e5)
+        ax.set_ylim(bottom = 0) # had problems with neg. pressures when above critical pt
+
+        ax.set_xlabel('specific Volume (v) in m^3/kg')
+        ax.set_ylabel('Pressure [bar]')
+        ax.legend(loc = 'best')
+        if show:
+            import matplotlib.pyplot as plt
+            plt.show(block=False)
+        return fig
     
-    def T_s_plot(self):
+    def T_s_plot(self, show=True):
         Temps = np.linspace(self.T1_sat + self.T_under, self.T + self.T_over,200)
-        fig = plt.figure()
+        fig, ax = self._figure(show)
         # plotting the isobar in T_s diagram
-        plt.plot(PropsSI("Smass","P",self.p,"T",Temps,"HEOS::Water"), Temps, label = 'Pressure = '+ str(self.p/1e5)+ ' bar, ')
+        ax.plot(PropsSI("Smass","P",self.p,"T",Temps,self.fluid), Temps, label = 'Pressure = '+ str(self.p/1e5)+ ' bar, ')
         if self.saturated == 'False':
-            plt.plot(PropsSI("Smass","P",self.p,"T",self.T,"HEOS::Water"), self.T, 'ro', \
+            ax.plot(PropsSI("Smass","P",self.p,"T",self.T,self.fluid), self.T, 'ro', \
                      label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
         else:
             s = float(input('The state is saturated. Enter the speoific entropy in J/(kg K) '))
-            plt.plot(s, self.T, 'ro', label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
+            ax.plot(s, self.T, 'ro', label = 'P = '+ str(self.p/1e5)+ ' bar, ' + 'T = '+ str(self.T)+ ' K')
 
         # plotting the saturation states
-        T_range = np.linspace(273.16, Tc, 200)
-        S_liquid = PropsSI("S","T",T_range,"Q",0,"HEOS::Water")
-        S_vapor = PropsSI("S","T",T_range,"Q",1,"HEOS::Water")
-        plt.plot(S_liquid, T_range)
-        plt.plot(S_vapor, T_range)
-
-        plt.xlabel('specific Entropy (s) in J/(kg K)')
-        plt.ylabel('Temperature [deg K]')
-        plt.legend(loc = 'best')
-        plt.show(block = False)
+        dome = get_saturation_dome("Water", "T", 200, backend=self.backend)
+        T_range = dome.liquid.value('T')
+        S_liquid = dome.liquid.value('s')
+        S_vapor = dome.vapor.value('s')
+        ax.plot(S_liquid, T_range)
+        ax.plot(S_vapor, T_range)
+
+        ax.set_xlabel('specific Entropy (s) in J/(kg K)')
+        ax.set_ylabel('Temperature [deg K]')
+        ax.legend(loc = 'best')
+        if show:
+            import matplotlib.pyplot as plt
+            plt.show(block=False)
+        return fig
 
 if __name__ == "__main__":
     sc = SteamCharts(300, 100)
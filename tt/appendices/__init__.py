@@ -0,0 +1,2 @@
+from ._interpolation import TableInterpolator, TableRangeError
+from ._tables import AppendixTable, GridTable, appendix_tables, get_appendix_table, load_workbook
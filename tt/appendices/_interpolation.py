@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class TableRangeError(ValueError):
+    """Values of a key column outside the range of an appendix table, as_dict() describes them for API responses."""
+
+    def __init__(self, key: str, unit: str, valid_range: tuple, values: np.ndarray, indices: np.ndarray):
+        self.key = key
+        self.unit = unit
+        self.valid_range = valid_range
+        self.values = values
+        self.indices = indices
+        super().__init__(f'{len(values)} value(s) of {key} are outside the table range {valid_range[0]} to '
+                         f'{valid_range[1]} {unit}: {values[:10].tolist()}')
+
+    def as_dict(self) -> dict:
+        return {'error': 'out of range', 'property': self.key, 'unit': self.unit, 'min': self.valid_range[0],
+                'max': self.valid_range[1], 'values': self.values.tolist(), 'indices': self.indices.tolist()}
+
+
+class TableInterpolator:
+    """Linear interpolation of all columns of a table in one key column.
+
+    The rows are sorted by the key once. A lookup of any number of values is one binary search shared by all
+    columns and one vectorized interpolation of whole rows.
+    """
+    gather_size = 10000  # larger arrays are interpolated column by column, which is faster for them
+
+    def __init__(self, key: str, data: dict, units: dict = None):
+        self.key = key
+        self.unit = '' if units is None else units.get(key, '')
+        self.columns = list(data.keys())
+        x = np.asarray(data[key], dtype=float)
+        order = np.argsort(x, kind='stable')
+        self.x = x[order]
+        # the last row is repeated with a zero step, so the upper end of the table needs no special case
+        rows = np.array([np.asarray(data[c], dtype=float)[order] for c in self.columns])
+        self._rows = np.hstack([rows, rows[:, -1:]])
+        self._steps = np.ascontiguousarray(np.diff(self._rows, axis=1))
+        dx = np.diff(self.x)
+        with np.errstate(divide='ignore'):
+            self._inverse_dx = np.append(np.where(dx > 0, 1 / dx, 0), 0)
+
+    def __repr__(self):
+        return f'TableInterpolator({self.key}, {len(self.x)} rows)'
+
+    @property
+    def valid_range(self) -> tuple:
+        return float(self.x[0]), float(self.x[-1])
+
+    def columns_at(self, values, strict: bool = True) -> np.ndarray:
+        """Interpolated columns of shape (number of columns,) + values.shape.
+
+        Values outside the table (or nan) raise a TableRangeError, with strict=False their columns are nan.
+        """
+        values = np.asarray(values, dtype=float)
+        invalid = ~((values >= self.x[0]) & (values <= self.x[-1]))
+        any_invalid = np.any(invalid)
+        if any_invalid and strict:
+            raise TableRangeError(self.key, self.unit, self.valid_range, np.atleast_1d(values[invalid]),
+                                  np.argwhere(np.atleast_1d(invalid)).squeeze(-1))
+        if any_invalid:
+            values = np.where(invalid, self.x[0], values)
+        i = np.searchsorted(self.x, values, side='right') - 1
+        t = (values - self.x[i]) * self._inverse_dx[i]
+        if values.size <= self.gather_size:
+            columns = self._rows[:, i] + self._steps[:, i] * t
+        else:
+            columns = np.empty((len(self.columns),) + values.shape)
+            for row, step, column in zip(self._rows, self._steps, columns):
+                np.multiply(step.take(i), t, out=column)
+                column += row.take(i)
+        if any_invalid:
+            columns[:, invalid] = np.nan
+        return columns
+
+    def __call__(self, values) -> dict:
+        """Returns {column: value or list of values} like the state of an appendix table."""
+        return {c: column.tolist() for c, column in zip(self.columns, self.columns_at(values))}
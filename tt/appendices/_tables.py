@@ -0,0 +1,215 @@
+"""Tables of the appendix workbooks in tt/appendices/data, compiled to numpy columns.
+
+A sheet holds either a table, columns with a header like 'T (°C)' starting in the first cell and ending at the first
+empty or text column, or a grid of one property over two keys. The first header cell of a grid names the property
+and both keys, e.g. 'v (m3/kg): p (bar) \\ T (°C)', the other header cells are the values of the second key.
+Leading text columns of a table (e.g. the substance in A-16) are keys of its rows.
+"""
+import os
+import re
+import threading
+import numpy as np
+from ..cache import read_cached
+from ._interpolation import TableInterpolator, TableRangeError
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+
+
+def _split_header(header: str) -> tuple:
+    """'T (°C)' -> ('T', '°C'), 'Cp' -> ('Cp', '')"""
+    match = re.fullmatch(r'(.*?)\s*\((.*)\)', str(header).strip())
+    return (match.group(1), match.group(2)) if match else (str(header).strip(), '')
+
+
+class AppendixTable:
+    """Numeric columns of a sheet with their units and the text key columns of its rows."""
+
+    def __init__(self, name: str, columns: dict, units: dict, keys: dict = None):
+        self.name = name
+        self.columns = columns
+        self.units = units
+        self.keys = {} if keys is None else keys
+        self._interpolators = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'AppendixTable({self.name}, {len(self)} rows)'
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    @property
+    def properties(self) -> list:
+        return list(self.columns.keys())
+
+    def interpolator(self, key: str) -> TableInterpolator:
+        """The interpolator of all columns in the column key, built once per table and key."""
+        interpolator = self._interpolators.get(key)
+        if interpolator is None:
+            if key not in self.columns:
+                raise ValueError(f'{key} is not a property of the table {self.name}, use one of {self.properties}')
+            with self._lock:
+                interpolator = self._interpolators.setdefault(key, TableInterpolator(key, self.columns, self.units))
+        return interpolator
+
+    def lookup(self, key: str, value) -> dict:
+        """All columns at value (number or array) of the column key, raises a TableRangeError outside the table."""
+        return self.interpolator(key)(value)
+
+    def row(self, name: str, key: str = None) -> dict:
+        """The row with name in the text column key (by default the first one), e.g. table.row('H2O-fl')."""
+        if not self.keys:
+            raise ValueError(f'the table {self.name} has no text key column')
+        key = next(iter(self.keys)) if key is None else key
+        if key not in self.keys:
+            raise ValueError(f'{key} is not a key column of the table {self.name}, use one of {list(self.keys)}')
+        try:
+            i = self.keys[key].index(name)
+        except ValueError:
+            raise ValueError(f'{name} is not in the column {key} of the table {self.name}, use one of '
+                             f'{self.keys[key]}') from None
+        return {**{k: c[i] for k, c in self.keys.items()}, **{p: float(c[i]) for p, c in self.columns.items()}}
+
+
+class GridTable:
+    """A property on a rectilinear grid of two keys, e.g. v(p, T) of superheated steam, interpolated bilinearly.
+
+    The grid cell of a lookup is found with one binary search per key on the sorted axes, the weights use the
+    precomputed inverse cell widths.
+    """
+
+    def __init__(self, name: str, keys: tuple, axes: tuple, values: np.ndarray, units: dict = None):
+        self.name = name
+        self.keys = keys
+        self.units = {} if units is None else units
+        orders = [np.argsort(np.asarray(a, dtype=float), kind='stable') for a in axes]
+        self.axes = tuple(np.asarray(a, dtype=float)[o] for a, o in zip(axes, orders))
+        if any(len(a) < 2 or np.any(np.diff(a) <= 0) for a in self.axes):
+            raise ValueError(f'the keys of the grid {name} must have at least 2 distinct values')
+        self.values = np.asarray(values, dtype=float)[np.ix_(*orders)]
+        self._inverse_dx = tuple(1 / np.diff(a) for a in self.axes)
+
+    def __repr__(self):
+        return f'GridTable({self.name}, {self.keys[0]}: {len(self.axes[0])} x {self.keys[1]}: {len(self.axes[1])})'
+
+    @property
+    def valid_range(self) -> dict:
+        return {k: (float(a[0]), float(a[-1])) for k, a in zip(self.keys, self.axes)}
+
+    def _cell(self, axis: int, values: np.ndarray) -> tuple:
+        x = self.axes[axis]
+        invalid = ~((values >= x[0]) & (values <= x[-1]))
+        if np.any(invalid):
+            key = self.keys[axis]
+            raise TableRangeError(key, self.units.get(key, ''), (float(x[0]), float(x[-1])),
+                                  np.atleast_1d(values[invalid]), np.argwhere(np.atleast_1d(invalid)).squeeze(-1))
+        i = np.minimum(np.searchsorted(x, values, side='right') - 1, len(x) - 2)
+        return i, (values - x[i]) * self._inverse_dx[axis][i]
+
+    def __call__(self, x, y):
+        """The property at the keys x and y (numbers or arrays which broadcast), raises a TableRangeError."""
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        (i, tx), (j, ty) = self._cell(0, x), self._cell(1, y)
+        v = self.values
+        value = (v[i, j] * (1 - ty) + v[i, j + 1] * ty) * (1 - tx) + \
+            (v[i + 1, j] * (1 - ty) + v[i + 1, j + 1] * ty) * tx
+        return value if value.ndim else float(value)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+
+def _compile_sheet(name: str, frame) -> dict:
+    """The plain data of a table or grid sheet, None for sheets without one."""
+    import pandas as pd
+    if frame.empty:
+        return None
+    headers = list(frame.columns)
+    grid_columns = 0
+    while grid_columns + 1 < len(headers) and _is_number(headers[grid_columns + 1]):
+        grid_columns += 1
+    if grid_columns >= 2:
+        frame = frame.iloc[:, :grid_columns + 1].apply(pd.to_numeric, errors='coerce')
+        frame = frame[frame.iloc[:, 0].notna()]  # empty cells (e.g. outside the phase of the table) stay nan
+        prop, _, keys = str(headers[0]).rpartition(':')
+        keys = [_split_header(k) for k in keys.split('\\')]
+        if len(keys) != 2:
+            raise ValueError(f'the first cell of the grid {name} must name the property and both keys like '
+                             f'"v (m3/kg): p (bar) \\ T (°C)"')
+        prop, unit = _split_header(prop or name)
+        return {'kind': 'grid', 'name': prop, 'keys': (keys[0][0], keys[1][0]),
+                'axes': (frame.iloc[:, 0].to_numpy(float), np.array(headers[1:grid_columns + 1], dtype=float)),
+                'values': frame.iloc[:, 1:].to_numpy(float),
+                'units': {keys[0][0]: keys[0][1], keys[1][0]: keys[1][1], prop: unit}}
+
+    filled = frame.iloc[:, 0].notna().to_numpy()
+    n_rows = len(filled) if filled.all() else int(np.argmin(filled))
+    columns, units, keys = {}, {}, {}
+    for header in headers:
+        if str(header).startswith('Unnamed'):
+            break
+        values = frame[header].iloc[:n_rows]
+        numbers = pd.to_numeric(values, errors='coerce')
+        prop, unit = _split_header(header)
+        if numbers.notna().any() and (numbers.notna() | values.isna()).all():
+            columns[prop] = numbers.to_numpy(float)
+            units[prop] = unit
+        elif not columns and values.map(lambda v: isinstance(v, str)).all():
+            keys[prop] = [v.strip() for v in values]
+        else:
+            break
+    if not columns or n_rows == 0:
+        return None
+    return {'kind': 'table', 'name': name, 'columns': columns, 'units': units, 'keys': keys}
+
+
+def _compile_workbook(path: str) -> dict:
+    import pandas as pd
+    sheets = pd.read_excel(path, sheet_name=None)
+    compiled = {name: _compile_sheet(name, frame) for name, frame in sheets.items()}
+    return {name: data for name, data in compiled.items() if data is not None}
+
+
+def _table(data: dict):
+    if data['kind'] == 'grid':
+        return GridTable(data['name'], data['keys'], data['axes'], data['values'], data['units'])
+    return AppendixTable(data['name'], data['columns'], data['units'], data['keys'])
+
+
+_workbooks = {}
+_workbooks_lock = threading.Lock()
+
+
+def load_workbook(path: str) -> dict:
+    """All tables of a workbook as {sheet name: AppendixTable or GridTable}.
+
+    The workbook is read with pandas once and kept compiled in the tt cache folder, see tt.cache.read_cached.
+    """
+    path = os.path.realpath(path)
+    tables = _workbooks.get(path)
+    if tables is None:
+        with _workbooks_lock:
+            tables = _workbooks.get(path)
+            if tables is None:
+                compiled = read_cached(path, _compile_workbook, 'appendix tables')
+                tables = _workbooks[path] = {name: _table(data) for name, data in compiled.items()}
+    return tables
+
+
+def appendix_tables() -> dict:
+    """The tables of all workbooks in tt/appendices/data by sheet name, e.g. 'A-1', 'A-16' or 'a73_Air'."""
+    tables = {}
+    for file_name in sorted(os.listdir(DATA_PATH)):
+        if file_name.endswith('.xlsx') and not file_name.startswith('~$'):
+            for name, table in load_workbook(os.path.join(DATA_PATH, file_name)).items():
+                tables.setdefault(name, table)
+    return tables
+
+
+def get_appendix_table(name: str):
+    """Returns the AppendixTable or GridTable of a sheet of the appendix workbooks."""
+    tables = appendix_tables()
+    if name not in tables:
+        raise ValueError(f'{name} is not an appendix table, use one of {list(tables)}')
+    return tables[name]
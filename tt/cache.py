@@ -0,0 +1,125 @@
+"""Binary cache of the spreadsheets shipped with tt and the import time budget of the package.
+
+Run ``python -m tt.cache`` once at build or deploy time to compile all caches and check the import time.
+The cache folder defaults to ~/.cache/tt and can be changed with the environment variable TT_CACHE_DIR.
+"""
+import hashlib
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+IMPORT_BUDGET = 1.0  # seconds for importing tt.fluid_state and the appendix tables with warm caches
+_MODULES = ['tt.fluid_state', 'tt.appendices.A1', 'tt.appendices.A3']
+
+
+def get_cache_dir(*sub_dirs) -> str:
+    path = os.path.join(os.environ.get('TT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'tt')),
+                        *sub_dirs)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+_coolprop_version = None
+
+
+def coolprop_version() -> str:
+    """Installed CoolProp version for the keys of caches of computed fluid data, read without importing CoolProp."""
+    global _coolprop_version
+    if _coolprop_version is None:
+        try:
+            from importlib.metadata import version
+            _coolprop_version = version('CoolProp')
+        except ImportError:  # also a missing package metadata
+            import CoolProp
+            _coolprop_version = CoolProp.__version__
+    return _coolprop_version
+
+
+def _cache_file(path: str, *key) -> str:
+    digest = hashlib.sha1(repr((os.path.abspath(path),) + key).encode()).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(path))[0].replace(' ', '_')
+    return os.path.join(get_cache_dir('tables'), f'{name}-{digest}.pickle')
+
+
+def read_excel(path: str, sheet_name: str, usecols=None) -> dict:
+    """Returns the columns of an excel sheet as {column name: list of values}."""
+    def build(path):
+        import pandas as pd
+        data = pd.read_excel(path, sheet_name=sheet_name, usecols=usecols)
+        return {c: data[c].tolist() for c in data.columns}
+    return read_cached(path, build, sheet_name, usecols)
+
+
+def read_cached(path: str, build, *key):
+    """Returns build(path), which is computed once and kept in a pickle file.
+
+    The pickle file is rebuilt when the modification time or size of the file at path changes, key distinguishes
+    several results of the same file.
+    """
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cache_file = _cache_file(path, *key)
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = pickle.load(f)
+        if cached['signature'] == signature:
+            return cached['data']
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+        pass
+
+    data = build(path)
+    write_pickle(cache_file, {'signature': signature, 'data': data})
+    return data
+
+
+def write_pickle(path: str, obj):
+    """Writes atomically, a cache which can not be written (e.g. read only file system) is skipped."""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def measure_import_time(modules=None) -> float:
+    """Returns the seconds a fresh interpreter needs to import the modules."""
+    modules = _MODULES if modules is None else modules
+    code = 'import time; t = time.perf_counter(); ' + '; '.join(f'import {m}' for m in modules) + \
+           '; print(time.perf_counter() - t)'
+    root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get('PYTHONPATH', '')]))
+    output = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def compile_all():
+    """Builds all caches by importing the modules which read the spreadsheets and compiling all appendix tables."""
+    measure_import_time()
+    from .appendices import appendix_tables
+    appendix_tables()
+
+
+def main(args=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m tt.cache', description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET, help='import time budget in seconds')
+    args = parser.parse_args(args)
+
+    t = time.perf_counter()
+    compile_all()
+    print(f'caches compiled in {get_cache_dir()} ({time.perf_counter() - t:.2f} s)')
+
+    import_time = measure_import_time()
+    print(f'import time: {import_time:.3f} s (budget {args.budget:.3f} s)')
+    return 0 if import_time <= args.budget else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,24 @@
 import pint
 import os
+from ..cache import get_cache_dir
 
-ureg = pint.UnitRegistry()
-_properties_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Properties.xlsx')
+ureg = pint.UnitRegistry(cache_folder=get_cache_dir('pint'))
+_properties_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'properties.xlsx')
 
+from ._engine import get_backend, set_backend, coolprop_fluid_name
+from ._state_cache import StateCache, set_state_cache, get_state_cache
+from ._fluid_info import FluidInfo, get_fluid_info, preload_fluids
+from ._solver import PairSolver, SolverError
 from ._fluid_state import FluidState
+from ._fluid_state_array import FluidStateArray
+from ._property_table import PropertyTable, get_property_table
+from ._saturation import SaturationDome, get_saturation_dome
+from ._ancillaries import SaturationAncillaries, get_saturation_ancillaries
+from ._iso_line_sampler import IsoLineSampler
 from ._abstract_fluid import AbstractFluid
 from ._fluid import Fluid
 from ._process import Process
-from ._thermo_chart import ThermoChart
\ No newline at end of file
+from ._rankine_cycle import RankineCycle
+from ._evaluate_many import evaluate_many
+from ._thermo_chart import ThermoChart, render_chart
+from ._benchmark import benchmark_backends, benchmark_grid
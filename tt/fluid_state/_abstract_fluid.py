@@ -1,48 +1,64 @@
-from CoolProp.CoolProp import PropsSI
 import numpy as np
-from . import ureg, FluidState
+from . import ureg, FluidState, FluidStateArray
+from ._fluid_info import get_fluid_info
+from ._engine import get_backend
+from ._saturation import SaturationDome, get_saturation_dome
+from ._iso_line_sampler import IsoLineSampler
 
 
 class AbstractFluid:
-    def __init__(self, fluid_name):
+    def __init__(self, fluid_name, backend: str = None):
         self.fluid_name = fluid_name
+        self.backend = get_backend(fluid_name, backend)
+        self.fluid_info = get_fluid_info(fluid_name)
 
-        T_crit = PropsSI('T_critical', fluid_name) * ureg.K
-        p_crit = PropsSI('p_critical', fluid_name) * ureg.Pa
-        properties_crit = {'T': T_crit, 'p': p_crit}
-        self.critical_point = FluidState(fluid_name=fluid_name, properties=properties_crit)
+    @property
+    def critical_point(self) -> FluidState:
+        return self.fluid_info.critical_point
 
-        T_triple = PropsSI('T_triple', fluid_name) * ureg.K
-        properties_triple_liquid = {'x': 0, 'T': T_triple}
-        self.triple_point_liquid = FluidState(fluid_name=fluid_name, properties=properties_triple_liquid)
-        properties_triple_vapor = {'x': 1, 'T': T_triple}
-        self.triple_point_vapor = FluidState(fluid_name=fluid_name, properties=properties_triple_vapor)
+    @property
+    def triple_point_liquid(self) -> FluidState:
+        return self.fluid_info.triple_point_liquid
 
-    def get_saturation_line(self, x: int, space_property: str, space: str = 'linear', n_points: int = 10):
-        if x is 0:
+    @property
+    def triple_point_vapor(self) -> FluidState:
+        return self.fluid_info.triple_point_vapor
+
+    def get_saturation_dome(self, space_property: str = 'p', space: str = 'linear',
+                            n_points: int = 100) -> SaturationDome:
+        return get_saturation_dome(self.fluid_name, space_property, n_points, space, self.backend)
+
+    def get_saturation_line(self, x: int, space_property: str, space: str = 'linear',
+                            n_points: int = 10, sampler: IsoLineSampler = None) -> FluidStateArray:
+        """With a sampler the line is sampled adaptively, otherwise it is read from the saturation dome."""
+        if sampler is None:
+            return self.get_saturation_dome(space_property, space, n_points).branch(x)
+        if x == 0:
             prop_min = self.triple_point_liquid.get_property(space_property)
-        elif x is 1:
+        elif x == 1:
             prop_min = self.triple_point_vapor.get_property(space_property)
         else:
             raise ValueError('property x of saturation_line must be 0 or 1')
         prop_max = self.critical_point.get_property(space_property)
-        return self.get_iso_line('x', x, space_property, prop_min, prop_max, space, n_points)
+        return self.get_iso_line('x', x, space_property, prop_min, prop_max, space, n_points, sampler)
 
-    def get_triple_line(self, space: str = 'linear', n_points: int = 10):
-        prop_min = self.triple_point_liquid.v
-        prop_max = self.triple_point_vapor.v
-        iso_prop = self.triple_point_vapor.p
-        return self.get_iso_line('p', iso_prop, 'v', prop_min, prop_max, space, n_points)
+    def get_triple_line(self, space: str = 'linear', n_points: int = 10) -> FluidStateArray:
+        return self.get_saturation_dome('p', space, n_points).triple_line
 
     def get_iso_line(self, iso_property_name, iso_property_value, space_property,
-                     space_min=None, space_max=None, space='linear', n_points=10):
+                     space_min=None, space_max=None, space='linear', n_points=10,
+                     sampler: IsoLineSampler = None) -> FluidStateArray:
+        """n_points evenly spaced states, or as many as the sampler needs for its tolerance."""
+        if sampler is not None:
+            return sampler.sample(self, iso_property_name, iso_property_value, space_property, space_min,
+                                  space_max, space)
         space_unit = space_min.units
         space_max = space_max.to(space_unit)
         if space == 'linear':
-            range = [m * space_unit for m in np.linspace(space_min.magnitude, space_max.magnitude, n_points)]
+            range = np.linspace(space_min.magnitude, space_max.magnitude, n_points) * space_unit
         elif space == 'log':
-            range = [m * space_unit for m in np.logspace(np.log10(space_max.magnitude), np.log10(space_min.magnitude), n_points)]
+            range = np.logspace(np.log10(space_max.magnitude), np.log10(space_min.magnitude), n_points) * space_unit
         else:
             raise ValueError(f'"{space}" is not valid for property "space"')
-        properties = [{iso_property_name: iso_property_value, space_property: v} for v in range]
-        return [FluidState(fluid_name=self.fluid_name, properties=p) for p in properties]
\ No newline at end of file
+        properties = {iso_property_name: iso_property_value, space_property: range}
+        return FluidStateArray(fluid_name=self.fluid_name, properties=properties, backend=self.backend)
\ No newline at end of file
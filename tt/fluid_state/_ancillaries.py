@@ -0,0 +1,231 @@
+import os
+import threading
+import numpy as np
+from . import ureg, FluidState
+from ._engine import get_engine, get_backend
+from ._fluid_info import get_fluid_info
+from ..cache import get_cache_dir, coolprop_version
+
+
+class SaturationAncillaries:
+    """Interpolated saturation curves and critical isotherm of a fluid for fast vectorized lookups.
+
+    The saturated states are tabulated on nodes of u = (1 - T / T_critical) ** (1 / 3), in which the densities of
+    both branches are almost linear up to the critical point, and interpolated cubically (p and the vapor density
+    logarithmically). The critical isotherm h(p) and s(p) is tabulated on log p and interpolated linearly. All
+    values are in coolprop (SI) units.
+
+    max_errors holds the largest error of each curve at the midpoints between the nodes, relative to the value
+    (p, T, densities) or to the range of the curve (h, s). For water p_sat and T_sat are within 2e-8, the other
+    saturation curves within 1e-4 (1e-7 more than 1 mK below the critical point) and the critical isotherm within
+    5e-4.
+    """
+    SATURATION = ['P', 'Dmass_liquid', 'Dmass_vapor', 'Hmass_liquid', 'Hmass_vapor', 'Smass_liquid', 'Smass_vapor']
+    ISOTHERM = ['Hmass', 'Smass']
+
+    def __init__(self, fluid_name: str, backend: str, u: np.ndarray, saturation: dict, p_isotherm: np.ndarray,
+                 isotherm: dict, max_errors: dict = None):
+        self.fluid_name = fluid_name
+        self.backend = backend
+        constants = get_fluid_info(fluid_name).constants
+        self.T_critical = constants['T_critical']
+        self.p_critical = constants['p_critical']
+        self.u = u
+        self.saturation = saturation
+        self._log_p = np.log(saturation['P'])
+        self._log_rho_vapor = np.log(saturation['Dmass_vapor'])
+        self.p_isotherm = p_isotherm
+        self._log_p_isotherm = np.log(p_isotherm)
+        self.isotherm = isotherm
+        self.max_errors = {} if max_errors is None else max_errors
+
+    def __repr__(self):
+        return f'SaturationAncillaries({self.fluid_name}, {len(self.u)} nodes)'
+
+    @classmethod
+    def build(cls, fluid_name: str, backend: str = 'HEOS', n_nodes: int = 1000) -> 'SaturationAncillaries':
+        engine = get_engine(fluid_name, backend)
+        c = get_fluid_info(fluid_name).constants
+        u_max = (1 - c['T_triple'] / c['T_critical']) ** (1 / 3)
+        u = np.linspace(0, u_max, 2 * n_nodes - 1)
+        saturation = cls._saturation_states(engine, c, u)
+        p_isotherm = np.union1d(np.geomspace(c['p_triple'], min(c['P_max'], 10 * c['p_critical']), n_nodes),
+                                c['p_critical'] * (1 + np.geomspace(1e-6, 0.5, n_nodes // 4) *
+                                                   np.array([[-1], [1]])).ravel())
+        isotherm = engine.evaluate_array({'T': c['T_critical'], 'P': p_isotherm}, cls.ISOTHERM)
+
+        # every second node is kept for the tables, the others measure the interpolation error
+        ancillaries = cls(fluid_name, backend, u[::2], {n: v[::2] for n, v in saturation.items()},
+                          p_isotherm[::2], {n: v[::2] for n, v in isotherm.items()})
+        with np.errstate(invalid='ignore'):
+            T = c['T_critical'] * (1 - u[1::2] ** 3)
+            errors = {'p_sat': ancillaries.p_sat(T) / saturation['P'][1::2] - 1,
+                      'T_sat': ancillaries.T_sat(saturation['P'][1::2]) / T - 1}
+            # h and s are compared to their range, as they cross zero
+            errors.update({n: (ancillaries._interpolate_saturation(n, u[1::2]) - saturation[n][1::2]) /
+                           (np.abs(saturation[n][1::2]) if n.startswith('Dmass') else np.ptp(saturation[n]))
+                           for n in cls.SATURATION if n != 'P'})
+            errors.update({f'{n}_isotherm': (ancillaries.isotherm_value(n, p_isotherm[1::2]) - isotherm[n][1::2]) /
+                           np.ptp(isotherm[n]) for n in cls.ISOTHERM})
+        ancillaries.max_errors = {n: float(np.nanmax(np.abs(e))) for n, e in errors.items()}
+        return ancillaries
+
+    @classmethod
+    def _saturation_states(cls, engine, c: dict, u: np.ndarray) -> dict:
+        T = c['T_critical'] * (1 - u ** 3)
+        outputs = ['P', 'Dmass', 'Hmass', 'Smass']
+        liquid = engine.evaluate_array({'T': T, 'Q': 0}, outputs)
+        vapor = engine.evaluate_array({'T': T, 'Q': 1}, outputs)
+        saturation = {'P': liquid['P']}
+        for o in outputs[1:]:
+            saturation[f'{o}_liquid'] = liquid[o]
+            saturation[f'{o}_vapor'] = vapor[o]
+        # the saturation flash fails at the critical point itself
+        critical = engine.evaluate({'T': c['T_critical'], 'Dmass': c['rhomass_critical']}, outputs)
+        saturation['P'][0] = c['p_critical']
+        for o in outputs[1:]:
+            saturation[f'{o}_liquid'][0] = saturation[f'{o}_vapor'][0] = critical[o]
+        failed = np.flatnonzero(np.any([np.isnan(v) for v in saturation.values()], axis=0))
+        for v in saturation.values():
+            v[failed] = np.interp(u[failed], np.delete(u, failed), np.delete(v, failed))
+        return saturation
+
+    def save(self, path: str):
+        tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+        try:
+            np.savez(tmp_path, u=self.u, p_isotherm=self.p_isotherm,
+                     max_errors=np.array([list(self.max_errors.keys()), list(self.max_errors.values())]),
+                     **{f'saturation.{n}': v for n, v in self.saturation.items()},
+                     **{f'isotherm.{n}': v for n, v in self.isotherm.items()})
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    @classmethod
+    def load(cls, path: str, fluid_name: str, backend: str) -> 'SaturationAncillaries':
+        with np.load(path) as arrays:
+            names, errors = arrays['max_errors']
+            return cls(fluid_name, backend, arrays['u'], {n: arrays[f'saturation.{n}'] for n in cls.SATURATION},
+                       arrays['p_isotherm'], {n: arrays[f'isotherm.{n}'] for n in cls.ISOTHERM},
+                       dict(zip(names.tolist(), errors.astype(float).tolist())))
+
+    def _u(self, T):
+        with np.errstate(invalid='ignore'):
+            return np.cbrt(1 - np.asarray(T, dtype=float) / self.T_critical)
+
+    def _interpolate_saturation(self, name: str, u) -> np.ndarray:
+        u = np.asarray(u, dtype=float)
+        outside = ~((u >= self.u[0]) & (u <= self.u[-1]))
+        if name == 'P':
+            values = np.exp(self._cubic(u, self._log_p))
+        elif name == 'Dmass_vapor':
+            values = np.exp(self._cubic(u, self._log_rho_vapor))
+        else:
+            values = self._cubic(u, self.saturation[name])
+        return np.where(outside, np.nan, values)
+
+    def _cubic(self, u: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Cubic interpolation through the four nearest of the evenly spaced u nodes."""
+        position = np.clip(np.nan_to_num(u / (self.u[1] - self.u[0])), 0, len(self.u) - 1)
+        i = np.clip(np.floor(position).astype(int), 1, len(self.u) - 3)
+        t = position - i
+        return (-t * (t - 1) * (t - 2) / 6 * values[i - 1] + (t + 1) * (t - 1) * (t - 2) / 2 * values[i] -
+                (t + 1) * t * (t - 2) / 2 * values[i + 1] + (t + 1) * t * (t - 1) / 6 * values[i + 2])
+
+    def p_sat(self, T) -> np.ndarray:
+        """Saturation pressure in Pa at T in K, nan outside of triple to critical point."""
+        return self._interpolate_saturation('P', self._u(T))
+
+    def T_sat(self, p) -> np.ndarray:
+        """Saturation temperature in K at p in Pa, nan outside of triple to critical point."""
+        log_p = np.log(np.asarray(p, dtype=float))
+        u = np.interp(log_p, self._log_p[::-1], self.u[::-1])
+        slope = np.diff(self._log_p) / (self.u[1] - self.u[0])
+        for _ in range(2):  # newton steps on the cubic ln p(u)
+            i = np.clip(np.searchsorted(self.u, u) - 1, 0, len(slope) - 1)
+            u = np.clip(u - (self._cubic(u, self._log_p) - log_p) / slope[i], self.u[0], self.u[-1])
+        outside = ~((log_p >= self._log_p[-1]) & (log_p <= self._log_p[0]))
+        return np.where(outside, np.nan, self.T_critical * (1 - u ** 3))
+
+    def saturated(self, name: str, T) -> np.ndarray:
+        """Value of a saturation curve (see SATURATION, e.g. 'Dmass_liquid') at T in K."""
+        if name not in self.SATURATION:
+            raise ValueError(f'{name} not in {self.SATURATION}')
+        return self._interpolate_saturation(name, self._u(T))
+
+    def isotherm_value(self, name: str, p) -> np.ndarray:
+        """Hmass or Smass on the critical isotherm at p in Pa."""
+        log_p = np.log(np.asarray(p, dtype=float))
+        outside = ~((log_p >= self._log_p_isotherm[0]) & (log_p <= self._log_p_isotherm[-1]))
+        return np.where(outside, np.nan, np.interp(log_p, self._log_p_isotherm, self.isotherm[name]))
+
+    def classify(self, properties: dict, si: bool = False, tolerance: float = 1e-6) -> np.ndarray:
+        """Returns the coolprop phase names of states given by (T, p), (p, h) or (p, s) arrays without flashing.
+
+        properties are given like for FluidState. States of (T, p) within tolerance (relative) of the saturation
+        pressure are 'twophase'. States outside of the tabulated range are 'unknown'.
+        """
+        values = {}
+        for pn, value in properties.items():
+            p = FluidState.property_info.get(pn)
+            if p is None or p.coolprop_sign not in ('T', 'P', 'Hmass', 'Smass'):
+                raise ValueError(f'{pn} is not a possible property name, use T, p, h or s')
+            if type(value) is ureg.Quantity:
+                value = value.to(p.coolprop_unit).magnitude
+            elif not si:
+                value = np.asarray(value, dtype=float) * p.factor
+            values[p.coolprop_sign] = np.asarray(value, dtype=float)
+        if len(values) != 2 or 'P' not in values:
+            raise ValueError(f'properties must be (T, p), (p, h) or (p, s) but {list(properties)} were given')
+        (_, p), (name, y) = sorted(values.items(), key=lambda item: item[0] != 'P')
+        p, y = np.broadcast_arrays(p, y)
+        phases = np.full(p.shape, 'unknown', dtype=object)
+        below = p < self.p_critical
+
+        with np.errstate(invalid='ignore'):
+            if name == 'T':
+                p_sat = self.p_sat(y)
+                supercritical_T = y >= self.T_critical
+                two_phase = np.abs(p / p_sat - 1) <= tolerance
+                phases[~supercritical_T & (p > p_sat)] = 'liquid'
+                phases[~supercritical_T & (p < p_sat)] = 'gas'
+                valid = (y >= self.T_critical * (1 - self.u[-1] ** 3)) & (p >= self.p_isotherm[0]) & \
+                    (p <= self.p_isotherm[-1])
+            else:
+                u = self._u(self.T_sat(p))
+                liquid = y < self._interpolate_saturation(f'{name}_liquid', u)
+                vapor = y > self._interpolate_saturation(f'{name}_vapor', u)
+                supercritical_T = y >= self.isotherm_value(name, p)
+                two_phase = below & ~liquid & ~vapor
+                phases[below & liquid] = 'liquid'
+                phases[below & vapor] = 'gas'
+                valid = np.isfinite(self.isotherm_value(name, p)) & np.isfinite(y)
+            phases[below & supercritical_T] = 'supercritical_gas'
+            phases[~below & supercritical_T] = 'supercritical'
+            phases[~below & ~supercritical_T] = 'supercritical_liquid'
+            phases[below & ~supercritical_T & two_phase] = 'twophase'
+        phases[~valid] = 'unknown'
+        return phases
+
+
+_ancillaries = {}
+_ancillaries_lock = threading.Lock()
+
+
+def get_saturation_ancillaries(fluid_name: str, backend: str = None) -> SaturationAncillaries:
+    """Returns the shared ancillaries of a fluid, built once and kept in the tt cache folder."""
+    backend = get_backend(fluid_name, backend)
+    key = (fluid_name, backend)
+    ancillaries = _ancillaries.get(key)
+    if ancillaries is not None:
+        return ancillaries
+    with _ancillaries_lock:
+        if key not in _ancillaries:
+            path = os.path.join(get_cache_dir('ancillaries', coolprop_version()),
+                                f'{fluid_name.replace("::", "__")}-{backend}.npz')
+            try:
+                _ancillaries[key] = SaturationAncillaries.load(path, fluid_name, backend)
+            except (OSError, ValueError, KeyError):
+                _ancillaries[key] = SaturationAncillaries.build(fluid_name, backend)
+                _ancillaries[key].save(path)
+    return _ancillaries[key]
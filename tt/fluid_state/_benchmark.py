@@ -0,0 +1,67 @@
+import time
+import numpy as np
+from ._engine import CoolPropEngine, get_engine
+from ._fluid_info import get_fluid_info
+
+BENCHMARK_OUTPUTS = ['T', 'P', 'Dmass', 'Hmass', 'Smass', 'Cpmass']
+
+
+def benchmark_grid(fluid_name: str, n: int = 40) -> dict:
+    """Standard states of the benchmark as {inputs: {coolprop_property_name: ndarray}} with n x n states each.
+
+    'pT' spans the liquid, vapor and supercritical region from the triple point to 1.6 T_critical and
+    4 p_critical, 'ph' the same pressures and the enthalpies of these temperatures including two-phase states.
+    """
+    c = get_fluid_info(fluid_name).constants
+    p = np.geomspace(c['p_triple'], min(c['P_max'], 4 * c['p_critical']), n)
+    T = np.linspace(c['T_triple'] * 1.001, min(c['T_max'], 1.6 * c['T_critical']), n)
+    engine = get_engine(fluid_name, 'HEOS')
+    h_min = engine.evaluate({'Q': 0, 'T': T[0]}, ['Hmass'])['Hmass']
+    h_max = engine.evaluate({'P': p[0], 'T': T[-1]}, ['Hmass'])['Hmass']
+    grid = {'pT': np.meshgrid(p, T, indexing='ij'), 'ph': np.meshgrid(p, np.linspace(h_min, h_max, n), indexing='ij')}
+    return {kind: {'P': x.ravel(), 'T' if kind == 'pT' else 'Hmass': y.ravel()} for kind, (x, y) in grid.items()}
+
+
+def _new_engine(fluid_name: str, backend: str):
+    """An engine without kept saturated states, so earlier evaluations do not speed up the benchmark."""
+    if backend == 'table':
+        from ._property_table import TableEngine
+        return TableEngine(fluid_name)
+    return CoolPropEngine(fluid_name, backend)
+
+
+def benchmark_backends(fluid_name: str = 'Water', backends: tuple = ('HEOS', 'IF97', 'table'),
+                       reference: str = 'HEOS', n: int = 40, outputs: list = None) -> 'pd.DataFrame':
+    """Throughput and maximum deviation from the reference backend of each backend on the benchmark_grid.
+
+    Returns a DataFrame with a row per backend and input pair: states per second, the number of states the
+    backend fails on (but the reference does not) and the maximum relative deviation of every output, relative to
+    the value or 1e-3 of the median magnitude of the output for values near 0 (like h and s near the reference
+    state). Property tables are built before the time is taken.
+    """
+    import pandas as pd
+    outputs = BENCHMARK_OUTPUTS if outputs is None else outputs
+    rows = []
+    for kind, inputs in benchmark_grid(fluid_name, n).items():
+        expected = _new_engine(fluid_name, reference).evaluate_array(inputs, outputs)
+        for backend in backends:
+            engine = _new_engine(fluid_name, backend)
+            engine.evaluate_array({pn: v[:1] for pn, v in inputs.items()}, outputs)  # loads tables and libraries
+            start = time.perf_counter()
+            values = engine.evaluate_array(inputs, outputs)
+            duration = time.perf_counter() - start
+            row = {'backend': backend, 'inputs': kind, 'states': len(inputs['P']),
+                   'states/s': len(inputs['P']) / duration,
+                   'failed': int(np.count_nonzero(np.isfinite(expected['T']) & ~np.isfinite(values['T'])))}
+            for o in outputs:
+                scale = np.maximum(np.abs(expected[o]), 1e-3 * np.nanmedian(np.abs(expected[o])))
+                with np.errstate(invalid='ignore'):
+                    deviation = np.abs(values[o] - expected[o]) / scale
+                row[o] = np.nanmax(deviation) if np.any(np.isfinite(deviation)) else np.nan
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    from tabulate import tabulate
+    print(tabulate(benchmark_backends(), headers='keys', tablefmt='orgtbl', floatfmt='.3g', showindex=False))
@@ -0,0 +1,368 @@
+import threading
+import numpy as np
+from ._solver import PairSolver, SolverError
+
+CP = None  # CoolProp.CoolProp, imported with the first engine since loading its fluid library takes seconds
+
+
+def _import_coolprop():
+    global CP
+    if CP is None:
+        import CoolProp.CoolProp
+        CP = CoolProp.CoolProp
+    return CP
+
+
+class CoolPropEngine:
+    """Evaluates states of one fluid with coolprop's low level AbstractState interface.
+
+    Every thread gets its own reusable AbstractState. A state is flashed once in update() and all requested
+    outputs are read from that single solution. Input pairs which are not in NATIVE_PAIRS are solved with a
+    PairSolver; if such a state does not exist a SolverError is raised instead of returning nan.
+    """
+    PHASE_NAMES = ['liquid', 'supercritical', 'supercritical_gas', 'supercritical_liquid', 'critical_point', 'gas',
+                   'twophase', 'unknown', 'not_imposed']
+    n_updates = 0
+
+    _phases = {}  # coolprop phase index -> phase name
+
+    _parameter_indices = {}
+
+    # inputs and outputs of two-phase states which are derived from the saturated states with the lever rule, cv
+    # and cp are not linear in the quality, so requests with them are flashed
+    LEVER_INPUTS = ['Q', 'Dmass', 'Hmass', 'Smass', 'Umass']
+    LEVER_OUTPUTS = ['T', 'P', 'Q', 'Dmass', 'Hmass', 'Smass', 'Umass', 'Helmholtzmass', 'Gmass', 'phase']
+    max_saturation_states = 10000  # T and P values with kept saturated states
+
+    # input pairs coolprop's HEOS and REFPROP backends flash directly
+    NATIVE_PAIRS = {frozenset(pair) for mass, molar in (('mass', 'mass'), ('molar', 'molar')) for pair in
+                    [('P', 'T'), ('Q', 'T'), ('P', 'Q'), (f'D{mass}', 'T'), (f'D{mass}', 'P'), (f'H{mass}', 'P'),
+                     ('P', f'S{mass}'), ('P', f'U{mass}'), (f'S{mass}', 'T'), (f'D{mass}', f'H{mass}'),
+                     (f'D{mass}', f'S{mass}'), (f'D{mass}', f'U{mass}'), (f'H{mass}', f'S{mass}')]}
+    _molar_inputs = {'Dmolar': ('Dmass', 1), 'Hmolar': ('Hmass', -1), 'Smolar': ('Smass', -1),
+                     'Umolar': ('Umass', -1)}  # molar input -> (mass specific input, exponent of the molar mass)
+
+    def __init__(self, fluid_name: str, backend: str = 'HEOS'):
+        self.fluid_name = fluid_name
+        self.backend = backend
+        self._local = threading.local()
+        self._saturation_states = {}
+        self._solvers = {}
+        _import_coolprop()
+        if not self._phases:
+            CoolPropEngine._phases = {int(CP.get_phase_index(f'phase_{n}')): n for n in self.PHASE_NAMES}
+
+    def __repr__(self):
+        return f'CoolPropEngine({self.backend}::{self.fluid_name})'
+
+    @property
+    def abstract_state(self) -> 'CP.AbstractState':
+        state = getattr(self._local, 'abstract_state', None)
+        if state is None:
+            state = CP.AbstractState(self.backend, self.fluid_name)
+            self._local.abstract_state = state
+        return state
+
+    @classmethod
+    def parameter_index(cls, coolprop_property_name: str) -> int:
+        if coolprop_property_name not in cls._parameter_indices:
+            cls._parameter_indices[coolprop_property_name] = CP.get_parameter_index(coolprop_property_name)
+        return cls._parameter_indices[coolprop_property_name]
+
+    def update(self, inputs: dict, warm_start: dict = None) -> 'CP.AbstractState':
+        """Flashes the state for exactly two inputs given as {coolprop_property_name: value in coolprop units}.
+
+        warm_start is a nearby state like {'T': ..., 'Dmass': ...} to start from if the pair has to be solved.
+        """
+        if frozenset(inputs) in self.NATIVE_PAIRS or self.backend not in ('HEOS', 'REFPROP'):
+            return self._update(inputs)
+        inputs = {self._molar_inputs[n][0] if n in self._molar_inputs else n:
+                  v * self.constant('molar_mass') ** self._molar_inputs[n][1] if n in self._molar_inputs else v
+                  for n, v in inputs.items()}
+        if frozenset(inputs) in self.NATIVE_PAIRS:
+            return self._update(inputs)
+        solver = self.solver(tuple(sorted(inputs)))
+        solver.solve(float(inputs[solver.known]), float(inputs[solver.target]), warm_start)
+        return self.abstract_state
+
+    def solves(self, names) -> bool:
+        """True if states of these inputs are solved with a PairSolver (and profit from a warm start)."""
+        if self.backend not in ('HEOS', 'REFPROP'):
+            return False
+        return frozenset(self._molar_inputs[n][0] if n in self._molar_inputs else n for n in names) \
+            not in self.NATIVE_PAIRS
+
+    def solver(self, names: tuple) -> PairSolver:
+        solver = self._solvers.get(names)
+        if solver is None:
+            solver = self._solvers.setdefault(names, PairSolver(self, names))
+        return solver
+
+    def _update(self, inputs: dict) -> 'CP.AbstractState':
+        """Flashes a pair coolprop supports."""
+        (name_1, value_1), (name_2, value_2) = inputs.items()
+        pair, value_1, value_2 = CP.generate_update_pair(self.parameter_index(name_1), float(value_1),
+                                                         self.parameter_index(name_2), float(value_2))
+        state = self.abstract_state
+        CoolPropEngine.n_updates += 1
+        try:
+            state.update(pair, value_1, value_2)
+        except IndexError as e:  # IF97 reports inputs out of its range and undefined outputs this way
+            raise ValueError(str(e))
+        return state
+
+    def output(self, coolprop_property_name: str):
+        """Reads an output of the last updated state of the current thread."""
+        state = self.abstract_state
+        try:
+            if coolprop_property_name == 'phase':
+                return self._phases[int(state.phase())]
+            return state.keyed_output(self.parameter_index(coolprop_property_name))
+        except IndexError as e:
+            raise ValueError(str(e))
+
+    def constant(self, coolprop_property_name: str) -> float:
+        """Returns a state independent property of the fluid like T_critical or molar_mass."""
+        return self.abstract_state.keyed_output(self.parameter_index(coolprop_property_name))
+
+    def evaluate(self, inputs: dict, outputs: list, warm_start: dict = None) -> dict:
+        """Returns {output: value} for one state, outputs which coolprop can not determine are nan."""
+        try:
+            self.update(inputs, warm_start)
+        except SolverError:
+            raise
+        except ValueError:
+            return {o: np.nan for o in outputs}
+        values = {}
+        for o in outputs:
+            try:
+                values[o] = self.output(o)
+            except ValueError:
+                values[o] = np.nan
+        return values
+
+    def evaluate_array(self, inputs: dict, outputs: list, warm_start: dict = None) -> dict:
+        """Returns {output: ndarray} for arrays of inputs, every state is flashed once for all outputs.
+
+        Two-phase states given by T or P and one of LEVER_INPUTS are not flashed but interpolated linearly in the
+        quality between the saturated states if their T or P occurs repeatedly in the array (the values depend only
+        on the array, not on earlier requests). Solved pairs start from the previous state of the array. If some
+        states have no solution, a SolverError with the mask of these states and the values of all others is raised
+        after the whole array is evaluated.
+        """
+        names = list(inputs.keys())
+        columns = np.broadcast_arrays(*[np.asarray(inputs[n], dtype=float) for n in names])
+        values = {o: np.full(columns[0].shape, 'unknown', dtype=object) if o == 'phase' else
+                  np.full(columns[0].shape, np.nan) for o in outputs}
+        flash = np.ones(columns[0].shape, dtype=bool)
+        failed = np.zeros(columns[0].shape, dtype=bool)
+        lever_inputs = self._lever_inputs(inputs, outputs)
+        if lever_inputs is not None:
+            pivot, other = lever_inputs
+            two_phase, lever_values = self._lever_rule(pivot, columns[names.index(pivot)], other,
+                                                       columns[names.index(other)], outputs)
+            for o in outputs:
+                values[o][two_phase] = lever_values[o]
+            flash = ~two_phase
+        for i, _ in self._update_each(names, columns, flash, failed, warm_start):
+            for o in outputs:
+                try:
+                    values[o][i] = self.output(o)
+                except ValueError:
+                    pass
+        self._raise_failed(names, failed, values)
+        return values
+
+    def evaluate_derivatives(self, inputs: dict, derivatives: list, warm_start: dict = None) -> list:
+        """Returns an ndarray (0-d for scalar inputs) per derivative, every state is flashed once for all of them.
+
+        derivatives are tuples of coolprop property names, (of, wrt, constant) for first and (of, wrt_1,
+        constant_1, wrt_2, constant_2) for second partial derivatives. Two-phase states use coolprop's two-phase
+        derivatives, which exist only for a few combinations like (Dmass, Hmass, P), the others are nan.
+        """
+        names = list(inputs.keys())
+        columns = np.broadcast_arrays(*[np.asarray(inputs[n], dtype=float) for n in names])
+        indices = [tuple(self.parameter_index(n) for n in d) for d in derivatives]
+        if any(len(d) not in (3, 5) for d in indices):
+            raise ValueError('derivatives must be given as (of, wrt, constant) or (of, wrt_1, constant_1, wrt_2, '
+                             'constant_2)')
+        values = [np.full(columns[0].shape, np.nan) for _ in derivatives]
+        failed = np.zeros(columns[0].shape, dtype=bool)
+        for i, state in self._update_each(names, columns, np.ones(columns[0].shape, dtype=bool), failed,
+                                          warm_start):
+            two_phase = self._phases.get(int(state.phase())) == 'twophase'
+            for value, d in zip(values, indices):
+                try:
+                    if len(d) == 3:
+                        value[i] = state.first_two_phase_deriv(*d) if two_phase else state.first_partial_deriv(*d)
+                    else:
+                        value[i] = state.second_two_phase_deriv(*d) if two_phase else state.second_partial_deriv(*d)
+                except (ValueError, IndexError):
+                    pass
+        self._raise_failed(names, failed, values)
+        return values
+
+    def _update_each(self, names: list, columns: list, mask: np.ndarray, failed: np.ndarray, warm_start: dict):
+        """Yields (index, updated AbstractState) of the masked states, solved pairs start from the last state."""
+        solved = self.solves(names)
+        for i in np.ndindex(columns[0].shape):
+            if not mask[i]:
+                continue
+            try:
+                state = self.update({n: c[i] for n, c in zip(names, columns)}, warm_start)
+            except SolverError:
+                failed[i] = True
+                continue
+            except ValueError:
+                continue
+            if solved:
+                warm_start = {'T': state.T(), 'Dmass': state.rhomass()}
+            yield i, state
+
+    def _raise_failed(self, names: list, failed: np.ndarray, values):
+        if np.any(failed):
+            raise SolverError(f'{np.count_nonzero(failed)} of {failed.size} states of {self.fluid_name} with the '
+                              f'inputs {names} have no solution', failed, values)
+
+    def _lever_inputs(self, inputs: dict, outputs: list):
+        """Returns the names (T or P, lever input) if two-phase states of these inputs can use the lever rule."""
+        if len(inputs) != 2 or not set(outputs) <= set(self.LEVER_OUTPUTS):
+            return None
+        name_1, name_2 = inputs.keys()
+        for pivot, other in ((name_1, name_2), (name_2, name_1)):
+            if pivot in ('T', 'P') and other in self.LEVER_INPUTS:
+                return pivot, other
+        return None
+
+    def _saturation_states_at(self, pivot: str, value: float) -> tuple:
+        """Returns the saturated liquid and vapor states ({output: value}) at a T or P, or (None, None)."""
+        key = (pivot, value)
+        states = self._saturation_states.get(key)
+        if states is None:
+            states = tuple(self.evaluate({pivot: value, 'Q': q}, self.LEVER_OUTPUTS[:-1]) for q in (0, 1))
+            if any(np.isnan(s['T']) for s in states):
+                states = (None, None)  # above the critical point or below the triple point
+            if len(self._saturation_states) >= self.max_saturation_states:
+                self._saturation_states.clear()
+            self._saturation_states[key] = states
+        return states
+
+    @staticmethod
+    def _quality(other: str, value, liquid: dict, vapor: dict):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if other == 'Q':
+                return value
+            elif other == 'Dmass':
+                return (1 / value - 1 / liquid['Dmass']) / (1 / vapor['Dmass'] - 1 / liquid['Dmass'])
+            return (value - liquid[other]) / (vapor[other] - liquid[other])
+
+    @staticmethod
+    def _lever_values(x, liquid: dict, vapor: dict, outputs: list) -> dict:
+        """Two-phase states of quality x from the saturated states."""
+        def lever(o, interpolated):
+            return np.where(x == 0, liquid[o], np.where(x == 1, vapor[o], interpolated))
+
+        values = {}
+        for o in outputs:
+            if o == 'phase':
+                values[o] = 'twophase'
+            elif o == 'Q':
+                values[o] = x
+            elif o == 'Dmass':
+                values[o] = lever(o, 1 / (1 / liquid[o] + x * (1 / vapor[o] - 1 / liquid[o])))
+            else:
+                values[o] = lever(o, liquid[o] + x * (vapor[o] - liquid[o]))
+        return values
+
+    def _lever_rule(self, pivot: str, pivot_values: np.ndarray, other: str, other_values: np.ndarray,
+                    outputs: list) -> tuple:
+        """Returns the mask of the states which are derived with the lever rule and {output: their values}."""
+        unique, inverse, counts = np.unique(pivot_values, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(pivot_values.shape)
+        names = self.LEVER_OUTPUTS[:-1]
+        liquid = {o: np.full(len(unique), np.nan) for o in names}
+        vapor = {o: np.full(len(unique), np.nan) for o in names}
+        if other == 'Q':
+            # saturated states (x = 0 or 1) are cheaper to flash directly
+            wet = np.zeros(len(unique), dtype=bool)
+            wet[inverse[(other_values > 0) & (other_values < 1)]] = True
+        else:
+            wet = np.ones(len(unique), dtype=bool)
+        # two saturation flashes only pay off for several states at the same T or P
+        for k in np.flatnonzero(wet & (counts > 1)):
+            states = self._saturation_states_at(pivot, float(unique[k]))
+            if states[0] is not None:
+                for o in names:
+                    liquid[o][k], vapor[o][k] = states[0][o], states[1][o]
+        liquid = {o: v[inverse] for o, v in liquid.items()}
+        vapor = {o: v[inverse] for o, v in vapor.items()}
+        x = self._quality(other, other_values, liquid, vapor)
+        with np.errstate(invalid='ignore'):
+            two_phase = (x >= 0) & (x <= 1) & ~np.isnan(liquid['T'])
+        return two_phase, self._lever_values(x[two_phase], {o: v[two_phase] for o, v in liquid.items()},
+                                             {o: v[two_phase] for o, v in vapor.items()}, outputs)
+
+_engines = {}
+_engines_lock = threading.Lock()
+default_backend = 'HEOS'  # backend of all fluids without an own backend, see set_backend
+_fluid_backends = {}
+
+
+def set_backend(backend: str, fluid_name: str = None):
+    """Sets the backend of a fluid, or with fluid_name None the default backend of all other fluids.
+
+    Backends are coolprop's, e.g. 'HEOS', 'IF97', 'REFPROP', 'INCOMP' or tabular ones like 'BICUBIC&HEOS', and
+    'table' (see get_engine). backend None removes the backend of a fluid. A backend given to a FluidState, Fluid,
+    chart etc. or as prefix of the fluid name ('IF97::Water') takes precedence.
+    """
+    global default_backend
+    if backend is not None and backend != 'table':
+        _import_coolprop()
+        try:
+            CP.AbstractState(backend, 'Water' if fluid_name is None else fluid_name)
+        except ValueError as e:
+            raise ValueError(f'backend {backend} is not available for {fluid_name or "Water"}: {e}')
+    if fluid_name is None:
+        if backend is None:
+            raise ValueError('the default backend can not be None')
+        default_backend = backend
+    elif backend is None:
+        _fluid_backends.pop(fluid_name, None)
+    else:
+        _fluid_backends[fluid_name] = backend
+
+
+def get_backend(fluid_name: str, backend: str = None) -> str:
+    """Returns the backend used for a fluid: the prefix of the fluid name, backend, the fluid's or the default."""
+    if '::' in fluid_name:
+        return fluid_name.split('::', 1)[0]
+    if backend is not None:
+        return backend
+    return _fluid_backends.get(fluid_name, default_backend)
+
+
+def coolprop_fluid_name(fluid_name: str, backend: str = None) -> str:
+    """Fluid name with backend prefix for coolprop's high level functions like PropsSI, e.g. 'IF97::Water'."""
+    backend = get_backend(fluid_name, backend)
+    return f'{"HEOS" if backend == "table" else backend}::{fluid_name.split("::", 1)[-1]}'
+
+
+def get_engine(fluid_name: str, backend: str = None) -> CoolPropEngine:
+    """Returns the shared engine of a fluid and backend (see get_backend).
+
+    The backend 'table' interpolates (p, h) and (p, T) inputs from precomputed property tables.
+    """
+    backend = get_backend(fluid_name, backend)
+    fluid_name = fluid_name.split('::', 1)[-1]
+    key = (backend, fluid_name)
+    engine = _engines.get(key)
+    if engine is None:
+        with _engines_lock:
+            if key not in _engines:
+                if backend == 'table':
+                    from ._property_table import TableEngine
+                    _engines[key] = TableEngine(fluid_name)
+                else:
+                    _engines[key] = CoolPropEngine(fluid_name, backend)
+            engine = _engines[key]
+    return engine
@@ -0,0 +1,151 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+from . import ureg, FluidState
+from ._fluid_state_array import FluidStateArray
+from ._solver import SolverError
+
+MIN_SHARD_SIZE = 2000  # smaller batches are evaluated in the calling process
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        return _executors[workers]
+
+
+def _discard_executor(workers: int):
+    with _executors_lock:
+        executor = _executors.pop(workers, None)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _output_unit(property_name: str):
+    """Unit of the values of FluidState.value (coolprop units)."""
+    p = FluidState.property_info[property_name]
+    return p.coolprop_unit if p.coolprop_use else ureg.Quantity(1, p.unit).to_base_units().units
+
+
+def _evaluate(states: FluidStateArray, outputs: list, values: np.ndarray) -> np.ndarray:
+    """Writes the outputs of states to the rows of values and returns the mask of the states without solution."""
+    failed = np.zeros(len(states), dtype=bool)
+    if any(FluidState.property_info[o].coolprop_sign in FluidState._state_outputs for o in outputs):
+        failed |= states.flash(strict=False)  # one flash for all state outputs
+    for row, o in zip(values, outputs):
+        try:
+            row[:] = states.value(o)
+        except SolverError as e:
+            failed |= e.failed
+            row[:] = e.values[FluidState.property_info[o].coolprop_sign]
+    return failed
+
+
+def _evaluate_shard(fluid_name: str, backend: str, names: list, outputs: list, memory_name: str, n: int,
+                    start: int, end: int):
+    """Evaluates the states start:end of the shared memory block of evaluate_many in a worker process."""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    _evaluate_block(memory.buf, fluid_name, backend, names, outputs, n, start, end)
+    memory.close()
+
+
+def _block_views(buffer, n: int, n_inputs: int, n_outputs: int) -> tuple:
+    """inputs (n_inputs x n), values (n_outputs x n) and failed (n) in one buffer."""
+    inputs = np.ndarray((n_inputs, n), dtype=float, buffer=buffer)
+    values = np.ndarray((n_outputs, n), dtype=float, buffer=buffer, offset=inputs.nbytes)
+    failed = np.ndarray(n, dtype=bool, buffer=buffer, offset=inputs.nbytes + values.nbytes)
+    return inputs, values, failed
+
+
+def _evaluate_block(buffer, fluid_name: str, backend: str, names: list, outputs: list, n: int, start: int,
+                    end: int):
+    inputs, values, failed = _block_views(buffer, n, len(names), len(outputs))
+    cp_inputs = {pn: np.array(column[start:end]) for pn, column in zip(names, inputs)}
+    states = FluidStateArray._from_columns(FluidStateArray, fluid_name, backend, cp_inputs, {}, False)
+    failed[start:end] = _evaluate(states, outputs, values[:, start:end])
+
+
+def _evaluate_shared(fluid_name: str, backend: str, names: list, columns: list, outputs: list, workers: int,
+                     shard_size: int) -> tuple:
+    """Evaluates shards of the states in the worker processes, returns the values and the failed mask."""
+    n = columns[0].size
+    memory = shared_memory.SharedMemory(create=True, size=(len(names) + len(outputs)) * n * 8 + n)
+    try:
+        inputs, values, failed = _block_views(memory.buf, n, len(names), len(outputs))
+        for i, column in enumerate(columns):
+            inputs[i] = column.ravel()
+        executor = _get_executor(workers)
+        futures = [executor.submit(_evaluate_shard, fluid_name, backend, names, outputs, memory.name, n, start,
+                                   min(start + shard_size, n)) for start in range(0, n, shard_size)]
+        try:
+            for future in futures:
+                future.result()
+        except BrokenProcessPool:
+            _discard_executor(workers)
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+        values, failed = np.array(values), np.array(failed)
+        del inputs
+    finally:
+        try:
+            memory.close()
+        except BufferError:
+            pass  # views referenced by a traceback, the block is unmapped with them
+        memory.unlink()
+    return values, failed
+
+
+def evaluate_many(fluid_name: str, inputs: dict, outputs: list, workers: int = None, si: bool = False,
+                  backend: str = None, strict: bool = True) -> dict:
+    """Evaluates the outputs of many states on all cores and returns {output: Quantity array} in input order.
+
+    inputs are two properties like for FluidStateArray (arrays are broadcast, plain numbers are in the units of
+    Properties.xlsx or with si=True in coolprop units). The states are split into shards evaluated by worker
+    processes (default TT_EVALUATION_WORKERS or the number of cores), inputs and results are exchanged through
+    shared memory. Results are in the units of Properties.xlsx, or coolprop units with si=True.
+
+    States with nan inputs have nan outputs. If states have no solution and strict is True, a SolverError with the
+    mask of these states (failed) and the results (values, nan for the failed states) is raised after all states
+    are evaluated.
+    """
+    for o in outputs:
+        p = FluidState.property_info.get(o)
+        if p is None or not (p.coolprop_use or o in ('v', 'cp_molar')):
+            raise ValueError(f'{o} is not a possible output, use a specific property like h, s, v or x')
+    states = FluidStateArray(fluid_name, inputs, si=si, backend=backend)
+    names = list(states._cp_inputs.keys())
+    columns = np.broadcast_arrays(*states._cp_inputs.values())
+    shape = columns[0].shape
+    n = columns[0].size
+    workers = workers or int(os.environ.get('TT_EVALUATION_WORKERS', 0)) or os.cpu_count() or 1
+    shard_size = max(MIN_SHARD_SIZE, math.ceil(n / (4 * workers)))  # several shards per worker balance the load
+
+    if workers == 1 or n <= shard_size:
+        values = np.empty((len(outputs), n))
+        states = FluidStateArray._from_columns(FluidStateArray, states.fluid_name, states.backend,
+                                               {pn: np.ravel(c) for pn, c in zip(names, columns)}, {}, False)
+        failed = _evaluate(states, outputs, values)
+    else:
+        values, failed = _evaluate_shared(states.fluid_name, states.backend, names, columns, outputs, workers,
+                                          shard_size)
+
+    results = {}
+    for o, row in zip(outputs, values):
+        value = ureg.Quantity(row.reshape(shape), _output_unit(o))
+        results[o] = value if si and FluidState.property_info[o].coolprop_use else value.to(
+            FluidState.property_info[o].unit)
+    failed = failed.reshape(shape)
+    if strict and np.any(failed):
+        raise SolverError(f'{np.count_nonzero(failed)} of {n} states of {fluid_name} with the inputs {names} have no '
+                          f'solution', failed, results)
+    return results
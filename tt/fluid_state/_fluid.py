@@ -1,9 +1,9 @@
 from . import ureg, FluidState, AbstractFluid
 
 class Fluid(AbstractFluid, FluidState):
-    def __init__(self, fluid_name: str, properties: dict, amount):
-        AbstractFluid.__init__(self, fluid_name=fluid_name)
-        FluidState.__init__(self, fluid_name=fluid_name, properties=properties)
+    def __init__(self, fluid_name: str, properties: dict, amount, backend: str = None):
+        AbstractFluid.__init__(self, fluid_name=fluid_name, backend=backend)
+        FluidState.__init__(self, fluid_name=fluid_name, properties=properties, backend=backend)
         self._amount = amount
 
     @property
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+from ._engine import get_engine
+from ..cache import get_cache_dir, coolprop_version
+
+
+class FluidInfo:
+    """State independent data of a fluid (critical and triple point, molar mass and limits) in coolprop units.
+
+    FluidInfos are shared by all Fluid, Process and ThermoChart instances, use get_fluid_info to get one. The data
+    is that of the HEOS backend, whichever backend the states of the fluid use, except for a fluid name with a
+    backend prefix like 'IF97::Water', whose data is that of the prefixed backend.
+    """
+    CONSTANTS = ['T_critical', 'p_critical', 'rhomass_critical', 'rhomolar_critical', 'T_triple', 'p_triple',
+                 'molar_mass', 'T_min', 'T_max', 'P_min', 'P_max']
+
+    def __init__(self, fluid_name: str, constants: dict):
+        self.fluid_name = fluid_name
+        self.constants = constants
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'FluidInfo({self.fluid_name})'
+
+    @classmethod
+    def from_coolprop(cls, fluid_name: str) -> 'FluidInfo':
+        engine = get_engine(fluid_name, 'HEOS')
+        return cls(fluid_name, {c: engine.constant(c) for c in cls.CONSTANTS})
+
+    def _get_state(self, name: str, properties: dict) -> 'FluidState':
+        from ._fluid_state import FluidState
+        state = self._states.get(name)
+        if state is None:
+            with self._lock:
+                state = self._states.setdefault(name, FluidState(self.fluid_name, properties, si=True, backend='HEOS'))
+        return state
+
+    @property
+    def critical_point(self) -> 'FluidState':
+        return self._get_state('critical_point', {'T': self.constants['T_critical'],
+                                                  'p': self.constants['p_critical']})
+
+    @property
+    def triple_point_liquid(self) -> 'FluidState':
+        return self._get_state('triple_point_liquid', {'x': 0, 'T': self.constants['T_triple']})
+
+    @property
+    def triple_point_vapor(self) -> 'FluidState':
+        return self._get_state('triple_point_vapor', {'x': 1, 'T': self.constants['T_triple']})
+
+
+_fluid_infos = {}
+_fluid_infos_lock = threading.Lock()
+persist_fluid_infos = True  # keep computed FluidInfos in the tt cache folder
+
+
+def _info_file(fluid_name: str) -> str:
+    return os.path.join(get_cache_dir('fluids', coolprop_version()), f'{fluid_name.replace("::", "__")}.json')
+
+
+def get_fluid_info(fluid_name: str) -> FluidInfo:
+    """Returns the shared FluidInfo of a fluid, which is computed only once per process (or read from disk)."""
+    info = _fluid_infos.get(fluid_name)
+    if info is not None:
+        return info
+    with _fluid_infos_lock:
+        info = _fluid_infos.get(fluid_name)
+        if info is None:
+            info = _load_fluid_info(fluid_name)
+            _fluid_infos[fluid_name] = info
+    return info
+
+
+def _load_fluid_info(fluid_name: str) -> FluidInfo:
+    path = _info_file(fluid_name)
+    if persist_fluid_infos:
+        try:
+            with open(path) as f:
+                constants = json.load(f)
+            if all(c in constants for c in FluidInfo.CONSTANTS):
+                return FluidInfo(fluid_name, constants)
+        except (OSError, ValueError):
+            pass
+    info = FluidInfo.from_coolprop(fluid_name)
+    if persist_fluid_infos:
+        try:
+            with open(f'{path}.{os.getpid()}.tmp', 'w') as f:
+                json.dump(info.constants, f, indent=2)
+            os.replace(f'{path}.{os.getpid()}.tmp', path)
+        except OSError:
+            pass
+    return info
+
+
+def preload_fluids(fluid_names: list) -> list:
+    """Computes (or loads) the FluidInfos of several fluids, e.g. when a worker starts."""
+    return [get_fluid_info(n) for n in fluid_names]
@@ -1,45 +1,69 @@
-import CoolProp.CoolProp as CP
-from CoolProp.CoolProp import PropsSI
-import pandas as pd
-from tabulate import tabulate
 import numpy as np
 from . import ureg, _properties_path
+from ._engine import get_engine, get_backend
+from ._state_cache import get_state_cache
+from ._fluid_info import get_fluid_info
+from ._properties import compile_properties, read_properties, PropertiesTable
 
 
 class FluidState:
-    properties = pd.read_excel(_properties_path, sheet_name='Properties')
-    properties.set_index('sign', inplace=True)
-    for i, r in properties.iterrows():
-        properties.loc[i, 'unit'] = ureg.Unit(properties.loc[i, 'unit'])
-        try:
-            properties.loc[i, 'coolprop_unit'] = ureg.Unit(properties.loc[i, 'coolprop_unit'])
-        except Exception:
-            pass
-
-    def __init__(self, fluid_name: str, properties: dict):
+    _property_rows = read_properties(_properties_path)
+    property_info = compile_properties(_property_rows)
+    properties = PropertiesTable(_property_rows)
+
+    # molar coolprop property -> (mass specific coolprop property, exponent of the molar mass)
+    _mass_to_molar = {'Smolar': ('Smass', 1), 'Umolar': ('Umass', 1), 'Hmolar': ('Hmass', 1),
+                      'Cvmolar': ('Cvmass', 1), 'Helmholtzmolar': ('Helmholtzmass', 1), 'Gmolar': ('Gmass', 1),
+                      'Dmolar': ('Dmass', -1)}
+    _molar_to_mass = {mass: (molar, factor) for molar, (mass, factor) in _mass_to_molar.items()}
+    _fluid_constant_names = ['T_critical', 'p_critical', 'rhomass_critical', 'rhomolar_critical',
+                             'T_triple', 'p_triple', 'molar_mass']
+    # outputs read from the single flash of a state
+    _state_outputs = ['T', 'P', 'Dmass', 'Hmass', 'Smass', 'Umass', 'Q', 'Cvmass', 'Cpmass',
+                      'Helmholtzmass', 'Gmass', 'phase']
+    # properties which can be differentiated and be the variables of partial derivatives
+    _derivative_properties = ['p', 'T', 'rho', 'h', 's', 'u', 'g', 'cv', 'cp', 'rho_molar', 'h_molar', 's_molar',
+                              'u_molar', 'g_molar', 'cv_molar']
+    _coolprop_units = {p.coolprop_sign: p.coolprop_unit for p in property_info.values() if p.coolprop_use}
+    coolprop_calls = 0
+    _warm_start = None  # nearby state {'T': ..., 'Dmass': ...} for input pairs coolprop can not flash directly
+
+    def __init__(self, fluid_name: str, properties: dict, si: bool = False, backend: str = None):
+        """Plain numbers in properties are in the units of Properties.xlsx or, with si=True, in coolprop (SI) units.
+
+        backend selects the evaluation engine, e.g. 'HEOS', 'IF97' or 'table', by default the backend set for the
+        fluid (see set_backend).
+        """
         self.fluid_name = fluid_name
-        self.cp_inputs = {}
+        self.backend = get_backend(fluid_name, backend)
+        self._cp_inputs = {}
+        self._cp_values = {}
+        self._flashed = False
         for pn, value in properties.items():
             if pn == 'v':
                 value = 1 / value
                 pn = 'rho'
 
-            if pn not in self.properties.loc[self.properties.valid_input == True].index:
+            p = self.property_info.get(pn)
+            if p is None or not p.valid_input:
                 raise ValueError(f'{pn} is not a possible property name')
 
-            p = self.properties.loc[pn]
             if type(value) is ureg.Quantity:
-                value = value.to(p['coolprop_unit'])
-            else:
+                value = value.to(p.coolprop_unit).magnitude
+            elif not si:
                 try:
-                    value = (value * p.unit).to(p['coolprop_unit'])
+                    value = value * p.factor
                 except Exception as e:
                     raise ValueError(f'{value} is not a possible value for property name {pn}')
 
-            self.cp_inputs[p['coolprop_sign']] = value
+            self._cp_inputs[p.coolprop_sign] = value
 
-        if len(self.cp_inputs) != 2:
-            raise ValueError(f'properties must have exactly 2 key value pairs but {len(self.cp_inputs)} were given')
+        if len(self._cp_inputs) != 2:
+            raise ValueError(f'properties must have exactly 2 key value pairs but {len(self._cp_inputs)} were given')
+
+    @property
+    def cp_inputs(self) -> dict:
+        return {pn: ureg.Quantity(value, self._coolprop_units[pn]) for pn, value in self._cp_inputs.items()}
 
     @property
     def T(self) -> ureg.Quantity:
@@ -66,8 +90,8 @@ class FluidState:
         return 1 / self.rho
 
     @property
-    def phase(self) -> ureg.Quantity:
-        return self.get_property_from_coolprop('phase')
+    def phase(self) -> str:
+        return self.get_cached_value('phase')
 
     @property
     def s(self) -> ureg.Quantity:
@@ -137,45 +161,128 @@ class FluidState:
     def get_property(self, property_name: str):
         if property_name == 'm':
             return self.m
+        p = self.property_info.get(property_name)
+        if p is None:
+            raise ValueError(f"'{property_name}' is no valid property name")
+        if not p.coolprop_use:
+            return getattr(self, property_name)
+        return ureg.Quantity(self.value(property_name) / p.factor, p.unit)
+
+    def value(self, property_name: str):
+        """Returns a property as plain number (or ndarray) in coolprop (SI) units without creating a Quantity."""
+        p = self.property_info.get(property_name)
+        if p is None:
+            raise ValueError(f"'{property_name}' is no valid property name")
+        if p.coolprop_use:
+            if p.coolprop_sign in self._cp_inputs:
+                return self._cp_inputs[p.coolprop_sign]
+            return self.get_cached_value(p.coolprop_sign)
+        if property_name == 'v':
+            return 1 / self.value('rho')
+        if property_name == 'cp_molar':
+            return self.value('cp') * self.value('M')
+        return self.get_property(property_name).to_base_units().magnitude
+
+    def values(self, property_names: list) -> tuple:
+        """Returns properties as plain numbers in coolprop (SI) units, e.g. h, s, T = state.values(['h', 's', 'T'])"""
+        return tuple(self.value(pn) for pn in property_names)
+
+    def partial_derivative(self, of: str, wrt: str, constant: str) -> ureg.Quantity:
+        """Analytic first partial derivative, e.g. (dh/dT)_p = state.partial_derivative('h', 'T', 'p')."""
+        return self.partial_derivatives([(of, wrt, constant)])[0]
+
+    def second_partial_derivative(self, of: str, wrt_1: str, constant_1: str, wrt_2: str,
+                                  constant_2: str) -> ureg.Quantity:
+        """Analytic second partial derivative d/d(wrt_2)|constant_2 of (d(of)/d(wrt_1))|constant_1."""
+        return self.partial_derivatives([(of, wrt_1, constant_1, wrt_2, constant_2)])[0]
+
+    def partial_derivatives(self, derivatives: list) -> list:
+        """Returns Quantities of several partial derivatives, all evaluated from a single flash of the state.
+
+        derivatives are tuples of property names, (of, wrt, constant) for first and (of, wrt_1, constant_1, wrt_2,
+        constant_2) for second derivatives. Derivatives which do not exist, e.g. most of the two-phase region,
+        are nan.
+        """
+        info = []
+        for d in derivatives:
+            if len(d) not in (3, 5):
+                raise ValueError(f'{d} is not a valid derivative, use (of, wrt, constant) or '
+                                 f'(of, wrt_1, constant_1, wrt_2, constant_2)')
+            for pn in d:
+                if pn not in self._derivative_properties:
+                    raise ValueError(f'{pn} is not a possible property name of a derivative, use one of '
+                                     f'{self._derivative_properties}')
+            info.append([self.property_info[pn] for pn in d])
+        values = get_engine(self.fluid_name, self.backend).evaluate_derivatives(
+            self._cp_inputs, [tuple(p.coolprop_sign for p in ps) for ps in info], self._warm_start)
+        FluidState.coolprop_calls += 1
+        derivative_values = []
+        for value, ps in zip(values, info):
+            cp_unit, unit = ps[0].coolprop_unit / ps[1].coolprop_unit, ps[0].unit / ps[1].unit
+            if len(ps) == 5:
+                cp_unit, unit = cp_unit / ps[3].coolprop_unit, unit / ps[3].unit
+            value = value if np.ndim(value) else float(value)
+            derivative_values.append(ureg.Quantity(value, cp_unit).to(unit))
+        return derivative_values
+
+    def get_cached_value(self, coolprop_property_name: str) -> float:
+        """Returns a coolprop property in coolprop units, calling coolprop at most once per state and property."""
+        if coolprop_property_name in self._cp_values:
+            return self._cp_values[coolprop_property_name]
+
+        if coolprop_property_name in self._cp_inputs:
+            value = self._cp_inputs[coolprop_property_name]
+        elif coolprop_property_name in self._fluid_constant_names:
+            value = get_fluid_info(self.fluid_name).constants[coolprop_property_name]
+        elif coolprop_property_name in self._mass_to_molar:
+            # derived from the molar mass: molar value = mass specific value * M
+            mass_name, factor = self._mass_to_molar[coolprop_property_name]
+            value = self.get_cached_value(mass_name) * self.get_cached_value('molar_mass') ** factor
+        elif self._molar_to_mass.get(coolprop_property_name, (None,))[0] in self._cp_inputs:
+            # mass specific value of a molar input
+            molar_name, factor = self._molar_to_mass[coolprop_property_name]
+            value = self._cp_inputs[molar_name] / self.get_cached_value('molar_mass') ** factor
+        elif coolprop_property_name in self._state_outputs and not self._flashed:
+            # one flash for all state outputs
+            FluidState.coolprop_calls += 1
+            self._cp_values.update(self._flash())
+            self._cp_values.update(self._cp_inputs)
+            self._flashed = True
+            return self._cp_values[coolprop_property_name]
         else:
-            p = self.properties.loc[property_name]
-            cp_pn = p['coolprop_sign']
-            cp_unit = p['coolprop_unit']
-            try:
-                if not p.coolprop_use:
-                    return getattr(self, property_name)
-                else:
-                    if cp_pn in self.cp_inputs.keys():
-                        v = self.cp_inputs[cp_pn]
-                    else:
-                        v = self.get_property_from_coolprop(cp_pn)
-                        v = v * cp_unit
-                    return v.to(p['unit'])
-            except Exception as e:
-                if cp_pn not in self.properties.coolprop_sign.tolist():
-                    raise ValueError(f"'{property_name}' is no valid property name")
-                else:
-                    raise e
+            value = self.get_property_from_coolprop(coolprop_property_name)
+
+        self._cp_values[coolprop_property_name] = value
+        return value
+
+    def _flash(self) -> dict:
+        engine = get_engine(self.fluid_name, self.backend)
+        cache = get_state_cache()
+        if cache is not None:
+            return cache.evaluate(engine, self._cp_inputs, self._state_outputs, self._warm_start)
+        return engine.evaluate(self._cp_inputs, self._state_outputs, self._warm_start)
+
+    @classmethod
+    def reset_coolprop_calls(cls) -> int:
+        """Resets the counter of coolprop calls and returns its value before the reset."""
+        calls = FluidState.coolprop_calls
+        FluidState.coolprop_calls = 0
+        return calls
 
     def get_property_from_coolprop(self, coolprop_property_name: str):
-        if coolprop_property_name in ['T_critical', 'p_critical', 'rhomass_critical', 'rhomolar_critical',
-                                      'T_triple', 'p_triple']:  # todo: add reducing point?
-            return PropsSI(coolprop_property_name, self.fluid_name)
-        pns = list(self.cp_inputs.keys())
-        values = list(self.cp_inputs.values())
-        try:
-            if coolprop_property_name == 'phase':
-                return CP.PhaseSI(pns[0], values[0].magnitude, pns[1], values[1].magnitude, self.fluid_name)
-            else:
-                return PropsSI(coolprop_property_name, pns[0], values[0].magnitude, pns[1], values[1].magnitude,
-                               self.fluid_name)
-        except Exception as e:
-            return np.nan
+        FluidState.coolprop_calls += 1
+        engine = get_engine(self.fluid_name, self.backend)
+        if coolprop_property_name in self._fluid_constant_names:  # todo: add reducing point?
+            return engine.constant(coolprop_property_name)
+        return engine.evaluate(self._cp_inputs, [coolprop_property_name],
+                               self._warm_start)[coolprop_property_name]
 
     def summary(self):
+        from tabulate import tabulate
         print(f'\nSummary for {self}')
         t_header = ['Property', 'Value', 'Unit']
         t_data = []
-        for p, r in self.properties.iterrows():
-            t_data.append([p, self.get_property(p).magnitude, self.get_property(p).units])
+        for p in self.property_info:
+            value = self.get_property(p)
+            t_data.append([p, value.magnitude, value.units])
         print(tabulate(t_data, t_header, tablefmt="orgtbl", floatfmt=".2f"))
\ No newline at end of file
@@ -0,0 +1,118 @@
+import numpy as np
+from . import ureg, FluidState
+from ._engine import get_engine
+from ._solver import SolverError
+from ._state_cache import get_state_cache
+
+
+class FluidStateArray(FluidState):
+    """N states of one fluid stored as numpy columns.
+
+    Properties are returned as a single Quantity wrapping an ndarray. All states are flashed in one batch the
+    first time a state property is requested.
+    """
+
+    def __init__(self, fluid_name: str, properties: dict, si: bool = False, backend: str = None):
+        properties = {pn: value if type(value) is ureg.Quantity else np.asarray(value, dtype=float)
+                      for pn, value in properties.items()}
+        FluidState.__init__(self, fluid_name=fluid_name, properties=properties, si=si, backend=backend)
+        names = list(self._cp_inputs.keys())
+        columns = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=float)) for v in self._cp_inputs.values()])
+        self._cp_inputs = {pn: np.array(c) for pn, c in zip(names, columns)}
+
+    @classmethod
+    def from_states(cls, states: list) -> 'FluidStateArray':
+        """Combines FluidStates with the same input properties into one array."""
+        if len(states) == 0:
+            raise ValueError('at least one state is needed')
+        fluid_name = states[0].fluid_name
+        names = list(states[0]._cp_inputs.keys())
+        if any(s.fluid_name != fluid_name or list(s._cp_inputs.keys()) != names for s in states):
+            raise ValueError('all states must be of the same fluid and defined by the same properties')
+        cp_inputs = {pn: np.array([s._cp_inputs[pn] for s in states], dtype=float) for pn in names}
+        return cls._from_columns(cls, fluid_name, states[0].backend, cp_inputs, {}, False)
+
+    @staticmethod
+    def _from_columns(cls, fluid_name: str, backend: str, cp_inputs: dict, cp_values: dict, flashed: bool):
+        state = cls.__new__(cls)
+        state.fluid_name = fluid_name
+        state.backend = backend
+        state._cp_inputs = cp_inputs
+        state._cp_values = cp_values
+        state._flashed = flashed
+        return state
+
+    def __len__(self):
+        return len(next(iter(self._cp_inputs.values())))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, item):
+        cls = FluidState if isinstance(item, (int, np.integer)) else FluidStateArray
+        state = self._from_columns(cls, self.fluid_name, self.backend,
+                                   {pn: v[item] for pn, v in self._cp_inputs.items()},
+                                   {pn: v if np.ndim(v) == 0 else v[item] for pn, v in self._cp_values.items()},
+                                   self._flashed)
+        if cls is FluidStateArray and getattr(self, '_failed', None) is not None:
+            state._failed = self._failed[item]
+        return state
+
+    def __repr__(self):
+        keys = list(self._cp_inputs.keys())
+        return f'{self.fluid_name}[{len(self)}]({keys[0]} / {keys[1]})'
+
+    def flash(self, strict: bool = True) -> np.ndarray:
+        """Flashes all states in one batch (once) and returns the mask of the states without solution.
+
+        With strict these states raise a SolverError, otherwise their state properties are nan.
+        """
+        if not self._flashed:
+            try:
+                self.get_cached_value('phase')
+            except SolverError as e:
+                if strict:
+                    raise
+                self._cp_values.update(e.values)
+                self._cp_values.update(self._cp_inputs)
+                self._flashed = True
+                self._failed = np.asarray(e.failed, dtype=bool)
+        failed = getattr(self, '_failed', None)
+        if failed is None:
+            return np.zeros(len(self), dtype=bool)
+        if strict and np.any(failed):
+            raise SolverError(f'{np.count_nonzero(failed)} of {len(self)} states of {self.fluid_name} have no '
+                              f'solution', failed, {pn: v for pn, v in self._cp_values.items() if np.ndim(v)})
+        return failed
+
+    def _flash(self) -> dict:
+        engine = get_engine(self.fluid_name, self.backend)
+        cache = get_state_cache()
+        if cache is not None:
+            return cache.evaluate_array(engine, self._cp_inputs, self._state_outputs, self._warm_start)
+        return engine.evaluate_array(self._cp_inputs, self._state_outputs, self._warm_start)
+
+    def get_property_from_coolprop(self, coolprop_property_name: str):
+        FluidState.coolprop_calls += 1
+        engine = get_engine(self.fluid_name, self.backend)
+        if coolprop_property_name in self._fluid_constant_names:
+            return engine.constant(coolprop_property_name)
+        return engine.evaluate_array(self._cp_inputs, [coolprop_property_name],
+                                     self._warm_start)[coolprop_property_name]
+
+    def summary(self):
+        """Prints one row per state with all state properties (not the constants of the fluid)."""
+        from tabulate import tabulate
+        print(f'\nSummary for {self}')
+        columns = []
+        for p in self.property_info:
+            try:
+                value = self.get_property(p)
+            except AttributeError:
+                continue  # amounts like m or H are properties of a Fluid
+            if np.ndim(value.magnitude):
+                columns.append((p, value))
+        t_header = ['State'] + [f'{p} [{value.units:~}]' for p, value in columns]
+        t_data = [[i] + [value.magnitude[i] for _, value in columns] for i in range(len(self))]
+        print(tabulate(t_data, t_header, tablefmt="orgtbl", floatfmt=".2f"))
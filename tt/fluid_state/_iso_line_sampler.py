@@ -0,0 +1,164 @@
+import numpy as np
+from . import ureg, FluidState, FluidStateArray
+
+
+class IsoLineSampler:
+    """Samples iso lines densely only where they bend in the coordinates of a chart.
+
+    An interval of the line is split while its midpoint is further than tolerance from the straight line between
+    its ends. tolerance is a fraction of the extent of the line on each axis, either one value or (x, y). Points
+    where the line enters or leaves the two-phase region are inserted. n_evaluations is the number of states
+    evaluated by the last call of sample.
+    """
+    min_interval = 1e-6  # intervals shorter than this fraction of the line are not split
+
+    def __init__(self, x_property: str, x_unit: str, y_property: str, y_unit: str, x_log: bool = False,
+                 y_log: bool = False, tolerance=1e-3, n_initial: int = 9, max_points: int = 1000):
+        self.x_property = x_property
+        self.x_unit = ureg.Unit(x_unit)
+        self.y_property = y_property
+        self.y_unit = ureg.Unit(y_unit)
+        self.x_log = x_log
+        self.y_log = y_log
+        self.tolerance = np.broadcast_to(np.asarray(tolerance, dtype=float), (2,))
+        self.n_initial = n_initial
+        self.max_points = max_points
+        self.n_evaluations = 0
+
+    @classmethod
+    def from_pixels(cls, x_property: str, x_unit: str, y_property: str, y_unit: str, x_log: bool = False,
+                    y_log: bool = False, pixels: float = 0.5, size: tuple = (640, 480), **kwargs) -> 'IsoLineSampler':
+        """Sampler with a tolerance of pixels on axes of size (width, height) in pixels."""
+        return cls(x_property, x_unit, y_property, y_unit, x_log, y_log,
+                   tolerance=(pixels / size[0], pixels / size[1]), **kwargs)
+
+    def sample(self, fluid, iso_property_name: str, iso_property_value, space_property: str, space_min, space_max,
+               space: str = 'linear') -> FluidStateArray:
+        """Returns the states of the iso line between space_min and space_max (Quantities) of an AbstractFluid."""
+        space_unit = space_min.units
+        bounds = np.array([space_min.magnitude, space_max.to(space_unit).magnitude], dtype=float)
+        if space == 'log':
+            if np.any(bounds <= 0):
+                raise ValueError(f'log space needs positive limits of "{space_property}"')
+            bounds = np.log(bounds)
+        elif space != 'linear':
+            raise ValueError(f'"{space}" is not valid for property "space"')
+
+        def evaluate(t):
+            values = bounds[0] + np.asarray(t, dtype=float) * (bounds[1] - bounds[0])
+            values = np.exp(values) if space == 'log' else values
+            self.n_evaluations += len(values)
+            line = FluidStateArray(fluid.fluid_name, {iso_property_name: iso_property_value,
+                                                      space_property: values * space_unit},
+                                   backend=fluid.backend)
+            line.flash(strict=False)  # states without a solution are left out of the chart as nan
+            return line, self._chart_coordinates(line), np.asarray(line.phase) == 'twophase'
+
+        self.n_evaluations = 0
+        t = np.linspace(0, 1, self.n_initial)
+        line, xy, two_phase = evaluate(t)
+        batches = [(t, line, xy, two_phase)]
+        if iso_property_name in ('p', 'T'):
+            batches += self._saturation_crossings(fluid, iso_property_name, iso_property_value, space_property,
+                                                  space_unit, bounds, space)
+        active = np.diff(self._merge_points(batches)[0]) > self.min_interval
+
+        while np.any(active) and self.n_evaluations < self.max_points:
+            t, xy = self._merge_points(batches)[:2]
+            starts = np.flatnonzero(active)[:self.max_points - self.n_evaluations]
+            t_mid = (t[starts] + t[starts + 1]) / 2
+            line, xy_mid, two_phase = evaluate(t_mid)
+            batches.append((t_mid, line, xy_mid, two_phase))
+            scale = self._scale(np.vstack([xy, xy_mid]))
+            split = self._deviation(xy[starts] * scale, xy[starts + 1] * scale, xy_mid * scale) > 1
+            split &= (t[starts + 1] - t[starts]) > self.min_interval
+            active = np.zeros(len(t) - 1 + len(t_mid), dtype=bool)
+            positions = starts + np.arange(len(starts))  # index of each split interval after the insertion
+            active[positions] = split
+            active[positions + 1] = split
+
+        if iso_property_name not in ('p', 'T'):
+            self._bisect_phase_changes(batches, evaluate)
+        return self._merge_lines([b[1] for b in batches], self._merge_points(batches)[3])
+
+    def _chart_coordinates(self, line: FluidStateArray) -> np.ndarray:
+        x = line.get_property(self.x_property).to(self.x_unit).magnitude
+        y = line.get_property(self.y_property).to(self.y_unit).magnitude
+        return np.column_stack([np.log10(x) if self.x_log else x, np.log10(y) if self.y_log else y])
+
+    def _scale(self, xy):
+        extent = np.nanmax(xy, axis=0) - np.nanmin(xy, axis=0)
+        return 1 / np.where(extent > 0, extent, 1) / self.tolerance
+
+    @staticmethod
+    def _deviation(a, b, m):
+        """Distance of the points m from the segments a-b."""
+        ab = b - a
+        length = np.hypot(ab[:, 0], ab[:, 1])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            distance = np.abs(ab[:, 0] * (m - a)[:, 1] - ab[:, 1] * (m - a)[:, 0]) / length
+        return np.where(length > 0, distance, np.hypot(*(m - a).T))
+
+    @staticmethod
+    def _merge_points(batches):
+        t = np.concatenate([b[0] for b in batches])
+        order = np.argsort(t, kind='stable')
+        return t[order], np.vstack([b[2] for b in batches])[order], np.concatenate([b[3] for b in batches])[order], \
+            order
+
+    @staticmethod
+    def _merge_lines(lines, order) -> FluidStateArray:
+        inputs = {pn: np.concatenate([line._cp_inputs[pn] for line in lines])[order] for pn in lines[0]._cp_inputs}
+        names = set.intersection(*[set(line._cp_values) for line in lines])
+        values = {pn: np.concatenate([np.broadcast_to(line._cp_values[pn], (len(line),)) for line in lines])[order]
+                  for pn in names}
+        return FluidStateArray._from_columns(FluidStateArray, lines[0].fluid_name, lines[0].backend, inputs, values,
+                                             all(line._flashed for line in lines))
+
+    def _saturation_crossings(self, fluid, iso_property_name, iso_property_value, space_property, space_unit,
+                              bounds, space) -> list:
+        """Batches of the saturated liquid and vapor states on the line.
+
+        They are flashed with the iso property and x, as iso p and T lines have a constant T or p inside the
+        two-phase region which can not be used as input.
+        """
+        self.n_evaluations += 2
+        saturated = FluidStateArray(fluid.fluid_name, {iso_property_name: iso_property_value,
+                                                       'x': np.array([0., 1.])}, backend=fluid.backend)
+        values = saturated.get_property(space_property).to(space_unit).magnitude
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = ((np.log(values) if space == 'log' else values) - bounds[0]) / (bounds[1] - bounds[0])
+        if t[0] == t[1]:
+            # the liquid comes first on lines of rising T or falling p
+            liquid_first = (space_property == 'T') == (bounds[1] > bounds[0])
+            t = t + (np.array([0., 1e-12]) if liquid_first else np.array([1e-12, 0.]))
+        inside = np.isfinite(t) & (t > 0) & (t < 1)
+        if not np.any(inside):
+            return []
+        iso_name = next(pn for pn in saturated._cp_inputs if pn != 'Q')
+        space_name = FluidState.property_info['rho' if space_property == 'v' else space_property].coolprop_sign
+        cp_values = {pn: np.broadcast_to(v, (2,))[inside] for pn, v in saturated._cp_values.items()}
+        line = FluidStateArray._from_columns(FluidStateArray, fluid.fluid_name, fluid.backend,
+                                             {iso_name: saturated._cp_inputs[iso_name][inside],
+                                              space_name: saturated.get_cached_value(space_name)[inside]},
+                                             cp_values, True)
+        return [(t[inside], line, self._chart_coordinates(line), np.ones(int(inside.sum()), dtype=bool))]
+
+    def _bisect_phase_changes(self, batches, evaluate, max_iterations: int = 40):
+        """Narrows the intervals in which the line enters or leaves the two-phase region below the tolerance."""
+        t, xy, two_phase = self._merge_points(batches)[:3]
+        scale = self._scale(xy)
+        starts = np.flatnonzero(two_phase[:-1] != two_phase[1:])
+        low, high = t[starts], t[starts + 1]
+        low_xy, high_xy, low_two_phase = xy[starts], xy[starts + 1], two_phase[starts]
+        for _ in range(max_iterations):
+            open_ = np.hypot(*((high_xy - low_xy) * scale).T) > 0.1
+            if not np.any(open_) or self.n_evaluations >= self.max_points:
+                break
+            t_mid = (low[open_] + high[open_]) / 2
+            line, xy_mid, two_phase_mid = evaluate(t_mid)
+            batches.append((t_mid, line, xy_mid, two_phase_mid))
+            is_low = two_phase_mid == low_two_phase[open_]
+            index = np.flatnonzero(open_)
+            low[index[is_low]], low_xy[index[is_low]] = t_mid[is_low], xy_mid[is_low]
+            high[index[~is_low]], high_xy[index[~is_low]] = t_mid[~is_low], xy_mid[~is_low]
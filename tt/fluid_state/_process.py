@@ -1,5 +1,5 @@
-from tabulate import tabulate
 from . import Fluid
+from ._engine import get_engine
 
 class Process:
     def __init__(self, fluid: Fluid, iso_property_name: str, changing_property_name: str, changing_property_value):
@@ -20,13 +20,18 @@ class Process:
         iso_property_value = fluid.get_property(iso_property_name)
         properties = {changing_property_name: changing_property_value,
                       iso_property_name: iso_property_value}
-        return Fluid(fluid_name=fluid.fluid_name, amount=fluid.m, properties=properties)
+        state = Fluid(fluid_name=fluid.fluid_name, amount=fluid.m, properties=properties, backend=fluid.backend)
+        # pairs coolprop can not flash directly are solved starting from the initial state
+        if get_engine(state.fluid_name, state.backend).solves(state._cp_inputs):
+            state._warm_start = {'T': fluid.value('T'), 'Dmass': fluid.value('rho')}
+        return state
 
     def summary(self):
+        from tabulate import tabulate
         print(f'\nSummary for {self}')
         t_header = ['Property', 'From', 'To', 'Difference', 'Unit', 'Iso']
         t_data = []
-        for p, r in Fluid.properties.iterrows():
+        for p in Fluid.property_info:
             iso_prop = '*' if p == self.iso_property_name else ''
             t_data.append([p, self.state_1.get_property(p).magnitude, self.state_2.get_property(p).magnitude,
                            self.get_difference_of(p).magnitude, self.state_1.get_property(p).units, iso_prop])
@@ -0,0 +1,46 @@
+from collections import namedtuple
+from . import ureg
+from ..cache import read_excel
+
+PropertyInfo = namedtuple('PropertyInfo', ['sign', 'description', 'unit', 'valid_input', 'coolprop_use',
+                                           'coolprop_sign', 'coolprop_unit', 'factor'])
+PropertyInfo.__doc__ = """Metadata of a property, factor converts a magnitude in unit into coolprop_unit."""
+
+
+class PropertiesTable:
+    """Class attribute which builds the pandas table of the properties on first access."""
+
+    def __init__(self, rows: list):
+        self._rows = rows
+        self._table = None
+
+    def __get__(self, instance, owner):
+        if self._table is None:
+            import pandas as pd
+            table = pd.DataFrame(self._rows).set_index('sign')
+            table['unit'] = [ureg.Unit(u) for u in table['unit']]
+            table['coolprop_unit'] = [ureg.Unit(u) if isinstance(u, str) else u for u in table['coolprop_unit']]
+            self._table = table
+        return self._table
+
+
+def read_properties(path: str) -> list:
+    """Returns the rows of the properties workbook as dicts."""
+    columns = read_excel(path, sheet_name='Properties')
+    return [dict(zip(columns.keys(), values)) for values in zip(*columns.values())]
+
+
+def compile_properties(rows) -> dict:
+    """Compiles rows of the properties table (dicts with the columns of Properties.xlsx) into {sign: PropertyInfo}."""
+    property_info = {}
+    for r in rows:
+        unit = ureg.Unit(r['unit'])
+        coolprop_sign = r['coolprop_sign'] if isinstance(r['coolprop_sign'], str) else None
+        coolprop_unit = ureg.Unit(r['coolprop_unit']) if isinstance(r['coolprop_unit'], str) else None
+        factor = (1 * unit).to(coolprop_unit).magnitude if coolprop_unit is not None else None
+        property_info[r['sign']] = PropertyInfo(sign=r['sign'], description=r['description'], unit=unit,
+                                                valid_input=bool(r['valid_input']),
+                                                coolprop_use=bool(r['coolprop_use']),
+                                                coolprop_sign=coolprop_sign, coolprop_unit=coolprop_unit,
+                                                factor=factor)
+    return property_info
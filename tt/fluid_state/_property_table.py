@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+from ._engine import get_engine, CoolPropEngine
+from ..cache import get_cache_dir, coolprop_version
+
+
+class PropertyTable:
+    """Grid of state properties of one fluid over (log p, h) or (log p, T), interpolated bicubically.
+
+    The grid nodes are evaluated once with the HEOS backend and saved as .npy files, which are opened memory mapped
+    so several worker processes share one copy. Points whose interpolation stencil leaves the grid, contains a
+    failed node or crosses a phase boundary are not interpolated (their values are nan) and must be evaluated with
+    the exact backend.
+
+    With a tolerance, an output is only interpolated in the phases where validate found a relative error within
+    the tolerance, in the other phases (and phases without validation samples) it is not interpolated either.
+    """
+    KINDS = {'ph': ('P', 'Hmass'), 'pT': ('P', 'T')}
+    OUTPUTS = ['T', 'P', 'Dmass', 'Hmass', 'Smass', 'Umass', 'Q', 'Cvmass', 'Cpmass', 'Helmholtzmass', 'Gmass']
+
+    def __init__(self, fluid_name: str, kind: str, p_axis: np.ndarray, y_axis: np.ndarray, data: dict,
+                 phases: np.ndarray, validation: dict = None, tolerance: float = None):
+        if kind not in self.KINDS:
+            raise ValueError(f'kind "{kind}" not in {list(self.KINDS)}')
+        self.fluid_name = fluid_name
+        self.kind = kind
+        self.inputs = self.KINDS[kind]
+        self.p_axis = p_axis
+        self.y_axis = y_axis
+        self.data = data
+        self.phases = phases
+        self.validation = {} if validation is None else validation
+        self.tolerance = tolerance
+        self._accept()
+
+    def _accept(self):
+        """Phase codes in which each output is interpolated, None for all phases."""
+        self._accepted = {}
+        if self.tolerance is None:
+            return
+        for o in self.OUTPUTS:
+            errors = [self.validation.get(n, {}).get(o) for n in CoolPropEngine.PHASE_NAMES]
+            self._accepted[o] = np.array([i for i, e in enumerate(errors) if e is not None and e <= self.tolerance],
+                                         dtype=np.int8)
+
+    @property
+    def rejected(self) -> dict:
+        """{phase: outputs} whose validation error is above the tolerance, they are evaluated exactly."""
+        if self.tolerance is None:
+            return {}
+        return {n: [o for o in self.OUTPUTS if i not in self._accepted[o]]
+                for i, n in enumerate(CoolPropEngine.PHASE_NAMES) if n in self.validation}
+
+    def __repr__(self):
+        return f'PropertyTable({self.fluid_name}, {self.kind}, {self.phases.shape})'
+
+    @classmethod
+    def build(cls, fluid_name: str, kind: str, p_range: tuple, y_range: tuple,
+              shape: tuple = (200, 200)) -> 'PropertyTable':
+        """Evaluates the grid nodes with HEOS, p_range in Pa and y_range in J/kg (kind 'ph') or K (kind 'pT')."""
+        p_axis = np.logspace(np.log10(p_range[0]), np.log10(p_range[1]), shape[0])
+        y_axis = np.linspace(y_range[0], y_range[1], shape[1])
+        p, y = np.meshgrid(p_axis, y_axis, indexing='ij')
+        name_p, name_y = cls.KINDS[kind]
+        values = get_engine(fluid_name, 'HEOS').evaluate_array({name_p: p, name_y: y}, cls.OUTPUTS + ['phase'])
+        phase_codes = {n: i for i, n in enumerate(CoolPropEngine.PHASE_NAMES) if n != 'unknown'}
+        phases = np.vectorize(lambda n: phase_codes.get(n, -1), otypes=[np.int8])(values.pop('phase'))
+        return cls(fluid_name, kind, p_axis, y_axis, values, phases)
+
+    def save(self, path: str):
+        """Writes the table to a new folder which then replaces path at once.
+
+        The files of a table at path are never written, other processes may have them memory mapped.
+        """
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        try:
+            np.save(os.path.join(tmp_path, 'p_axis.npy'), self.p_axis)
+            np.save(os.path.join(tmp_path, 'y_axis.npy'), self.y_axis)
+            np.save(os.path.join(tmp_path, 'phases.npy'), self.phases)
+            for name, values in self.data.items():
+                np.save(os.path.join(tmp_path, f'{name}.npy'), values)
+            with open(os.path.join(tmp_path, 'table.json'), 'w') as f:
+                json.dump({'fluid_name': self.fluid_name, 'kind': self.kind, 'outputs': list(self.data.keys()),
+                           'validation': self.validation, 'tolerance': self.tolerance}, f, indent=2)
+            try:
+                os.replace(tmp_path, path)  # path does not exist or is an empty folder
+            except OSError:
+                # an incomplete table, its files are unlinked but stay valid for processes which mapped them
+                old_path = f'{path}.{os.getpid()}.old'
+                os.replace(path, old_path)
+                os.replace(tmp_path, path)
+                shutil.rmtree(old_path, ignore_errors=True)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str = 'r') -> 'PropertyTable':
+        with open(os.path.join(path, 'table.json')) as f:
+            meta = json.load(f)
+        data = {n: np.load(os.path.join(path, f'{n}.npy'), mmap_mode=mmap_mode) for n in meta['outputs']}
+        return cls(meta['fluid_name'], meta['kind'], np.load(os.path.join(path, 'p_axis.npy')),
+                   np.load(os.path.join(path, 'y_axis.npy')), data,
+                   np.load(os.path.join(path, 'phases.npy'), mmap_mode=mmap_mode), meta['validation'],
+                   meta.get('tolerance'))
+
+    def _stencil(self, p, y):
+        """Returns the indices and weights of the 4x4 Catmull-Rom stencils and the mask of interpolable points."""
+        log_p = np.log(np.asarray(p, dtype=float))
+        y = np.asarray(y, dtype=float)
+        u = (log_p - np.log(self.p_axis[0])) / (np.log(self.p_axis[-1]) - np.log(self.p_axis[0])) * \
+            (len(self.p_axis) - 1)
+        v = (y - self.y_axis[0]) / (self.y_axis[-1] - self.y_axis[0]) * (len(self.y_axis) - 1)
+        with np.errstate(invalid='ignore'):
+            valid = (u >= 1) & (u < len(self.p_axis) - 2) & (v >= 1) & (v < len(self.y_axis) - 2)
+        u = np.where(valid, u, 1)
+        v = np.where(valid, v, 1)
+        i, j = np.floor(u).astype(int), np.floor(v).astype(int)
+        offsets = np.arange(-1, 3)
+        rows = (i[..., None] + offsets)[..., :, None]
+        cols = (j[..., None] + offsets)[..., None, :]
+        phases = self.phases[rows, cols].reshape(i.shape + (16,))
+        valid &= np.all(phases == phases[..., :1], axis=-1) & (phases[..., 0] >= 0)
+        weights = self._weights(u - i)[..., :, None] * self._weights(v - j)[..., None, :]
+        return rows, cols, weights, valid, phases[..., 0]
+
+    @staticmethod
+    def _weights(t):
+        t = t[..., None]
+        return np.concatenate([(-t ** 3 + 2 * t ** 2 - t) / 2, (3 * t ** 3 - 5 * t ** 2 + 2) / 2,
+                               (-3 * t ** 3 + 4 * t ** 2 + t) / 2, (t ** 3 - t ** 2) / 2], axis=-1)
+
+    def interpolate(self, p, y, outputs: list) -> dict:
+        """Returns {output: ndarray} for arrays of p and h (or T), not interpolable points are nan (phase None)."""
+        return self._interpolate(p, y, outputs)[0]
+
+    def _interpolate(self, p, y, outputs: list) -> tuple:
+        """Returns the values and the mask of the points with all outputs interpolated."""
+        rows, cols, weights, valid, phase_codes = self._stencil(p, y)
+        # heat capacities are not smooth inside the two-phase region and are always evaluated exactly there
+        smooth_cp = valid & (phase_codes != CoolPropEngine.PHASE_NAMES.index('twophase'))
+        values = {}
+        all_valid = valid
+        for o in outputs:
+            if o == 'phase':
+                names = np.array(CoolPropEngine.PHASE_NAMES, dtype=object)
+                values[o] = np.where(valid, names[phase_codes], None)
+                continue
+            valid_o = smooth_cp if o in ('Cvmass', 'Cpmass') else valid
+            if o in self._accepted:
+                valid_o = valid_o & np.isin(phase_codes, self._accepted[o])
+            all_valid = all_valid & valid_o
+            if o in self.inputs:
+                values[o] = np.where(valid_o, p if o == 'P' else y, np.nan)
+            elif o == 'Dmass':
+                # the specific volume is (almost) linear in h inside the two-phase region, the density is not
+                interpolated = np.sum(1 / np.asarray(self.data[o][rows, cols]) * weights, axis=(-2, -1))
+                values[o] = np.where(valid_o, 1 / interpolated, np.nan)
+            else:
+                interpolated = np.sum(np.asarray(self.data[o][rows, cols]) * weights, axis=(-2, -1))
+                values[o] = np.where(valid_o, interpolated, np.nan)
+        return values, all_valid
+
+    def validate(self, n_samples: int = 2000, seed: int = 0) -> dict:
+        """Compares random points of the grid with HEOS and returns {phase: {output: max relative error}}.
+
+        Errors are relative to the value, values smaller than 1e-3 of the median magnitude of an output use that
+        fraction of the median as reference. The result is kept in the validation attribute and saved with the table,
+        with a tolerance it selects the interpolated outputs of each phase.
+        """
+        rng = np.random.default_rng(seed)
+        p = np.exp(rng.uniform(np.log(self.p_axis[1]), np.log(self.p_axis[-2]), n_samples))
+        y = rng.uniform(self.y_axis[1], self.y_axis[-2], n_samples)
+        self._accepted = {}  # validates all outputs
+        table = self.interpolate(p, y, self.OUTPUTS + ['phase'])
+        exact = get_engine(self.fluid_name, 'HEOS').evaluate_array({self.inputs[0]: p, self.inputs[1]: y},
+                                                                   self.OUTPUTS)
+        report = {}
+        for phase in sorted(set(n for n in table['phase'] if n is not None)):
+            mask = table['phase'] == phase
+            report[phase] = {'n_samples': int(mask.sum())}
+            for o in self.OUTPUTS:
+                scale = 1e-3 * np.nanmedian(np.abs(self.data[o])) if np.any(np.isfinite(self.data[o])) else 1
+                error = np.abs(table[o][mask] - exact[o][mask]) / np.maximum(np.abs(exact[o][mask]), scale)
+                report[phase][o] = float(np.nanmax(error)) if np.any(np.isfinite(error)) else None
+        report['not_interpolated'] = {'n_samples': int(np.sum(table['phase'] == None))}  # noqa: E711
+        self.validation = report
+        self._accept()
+        return report
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def _default_ranges(fluid_name: str, kind: str) -> tuple:
+    from ._fluid_info import get_fluid_info
+    c = get_fluid_info(fluid_name).constants
+    p_range = (c['p_triple'], min(c['P_max'], 10 * c['p_critical']))
+    if kind == 'pT':
+        return p_range, (c['T_min'], c['T_max'])
+    engine = get_engine(fluid_name, 'HEOS')
+    h_min = engine.evaluate({'Q': 0, 'T': c['T_triple']}, ['Hmass'])['Hmass']
+    h_max = engine.evaluate({'P': p_range[0], 'T': c['T_max']}, ['Hmass'])['Hmass']
+    return p_range, (h_min, h_max)
+
+
+def get_property_table(fluid_name: str, kind: str, p_range: tuple = None, y_range: tuple = None,
+                       shape: tuple = (200, 200), tolerance: float = 1e-3) -> PropertyTable:
+    """Returns a memory mapped table from the tt cache folder, building, validating and saving it if needed.
+
+    Outputs are interpolated only in the phases where their validated relative error is within tolerance.
+    """
+    if p_range is None or y_range is None:
+        default_p_range, default_y_range = _default_ranges(fluid_name, kind)
+        p_range = default_p_range if p_range is None else p_range
+        y_range = default_y_range if y_range is None else y_range
+    key = (fluid_name, kind, tuple(float(v) for v in p_range), tuple(float(v) for v in y_range), tuple(shape),
+           float(tolerance))
+    table = _tables.get(key)
+    if table is not None:
+        return table
+    with _tables_lock:
+        if key not in _tables:
+            digest = hashlib.sha1(repr(key + (coolprop_version(),)).encode()).hexdigest()[:12]
+            path = get_cache_dir('property_tables', f'{fluid_name.replace("::", "__")}-{kind}-{digest}')
+            try:
+                _tables[key] = PropertyTable.load(path)
+            except (OSError, ValueError, KeyError):
+                table = PropertyTable.build(fluid_name, kind, p_range, y_range, shape)
+                table.tolerance = tolerance
+                table.validate()
+                table.save(path)
+                _tables[key] = PropertyTable.load(path)
+    return _tables[key]
+
+
+class TableEngine:
+    """Engine interface of the 'table' backend: inputs (p, h) and (p, T) are interpolated from PropertyTables,
+    all other inputs and points which can not be interpolated are evaluated with HEOS."""
+
+    def __init__(self, fluid_name: str):
+        self.fluid_name = fluid_name
+        self.backend = 'table'
+        self.exact = get_engine(fluid_name, 'HEOS')
+
+    def __repr__(self):
+        return f'TableEngine({self.fluid_name})'
+
+    def _table(self, inputs: dict):
+        names = set(inputs.keys())
+        for kind, kind_inputs in PropertyTable.KINDS.items():
+            if names == set(kind_inputs):
+                return get_property_table(self.fluid_name, kind)
+        return None
+
+    def constant(self, coolprop_property_name: str) -> float:
+        return self.exact.constant(coolprop_property_name)
+
+    def solves(self, names) -> bool:
+        return all(set(names) != set(k) for k in PropertyTable.KINDS.values()) and self.exact.solves(names)
+
+    def evaluate(self, inputs: dict, outputs: list, warm_start: dict = None) -> dict:
+        if self._table(inputs) is None:
+            return self.exact.evaluate(inputs, outputs, warm_start)
+        values = self.evaluate_array({n: np.atleast_1d(v) for n, v in inputs.items()}, outputs)
+        return {o: v[0] for o, v in values.items()}
+
+    def evaluate_derivatives(self, inputs: dict, derivatives: list, warm_start: dict = None) -> list:
+        return self.exact.evaluate_derivatives(inputs, derivatives, warm_start)
+
+    def evaluate_array(self, inputs: dict, outputs: list, warm_start: dict = None) -> dict:
+        table = self._table(inputs)
+        if table is None or not set(outputs) <= set(PropertyTable.OUTPUTS + ['phase']):
+            return self.exact.evaluate_array(inputs, outputs, warm_start)
+        p, y = np.broadcast_arrays(*[np.asarray(inputs[n], dtype=float) for n in table.inputs])
+        values, valid = table._interpolate(p, y, outputs)
+        missing = ~valid
+        if np.any(missing):
+            exact = self.exact.evaluate_array({table.inputs[0]: p[missing], table.inputs[1]: y[missing]}, outputs)
+            for o in outputs:
+                values[o][missing] = exact[o]
+        return values
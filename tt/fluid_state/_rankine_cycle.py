@@ -0,0 +1,136 @@
+import numpy as np
+from . import ureg, FluidStateArray
+
+
+def _magnitude(value, unit: str) -> np.ndarray:
+    if type(value) is ureg.Quantity:
+        return np.asarray(value.to(unit).magnitude, dtype=float)
+    return np.asarray(value, dtype=float)
+
+
+class RankineCycle:
+    """Steam power cycle of pump, boiler with superheater, optional reheat, turbine and condenser.
+
+    All parameters may be arrays, they are broadcast and every combination is one cycle, e.g. 100k combinations
+    of boiler pressure, live steam temperature and condenser pressure are evaluated at once. Plain numbers are in
+    the units of Properties.xlsx (p in bar, T in K). Without p_reheat the steam expands from the live steam state
+    to the condenser pressure, with p_reheat the high pressure turbine expands to p_reheat and the steam is heated
+    again to T_reheat (default T_live). Both turbines have the isentropic efficiency eta_turbine.
+
+    The states are 1 saturated liquid leaving the condenser, 2 leaving the pump, 3 live steam, 4 leaving the high
+    pressure turbine, 5 after the reheat and 6 leaving the turbine (without reheat states 4 and 5 equal 3). Each is
+    flashed once per distinct input pair, cycles which share parameters share their states. Cycles with states
+    which have no solution have nan results.
+    """
+    def __init__(self, p_boiler, T_live, p_condenser, eta_turbine=1., eta_pump=1., p_reheat=None, T_reheat=None,
+                 fluid_name: str = 'Water', backend: str = None):
+        self.fluid_name = fluid_name
+        self.backend = backend
+        p_reheat = np.nan if p_reheat is None else p_reheat
+        T_reheat = T_live if T_reheat is None else T_reheat
+        parameters = np.broadcast_arrays(_magnitude(p_boiler, 'bar'), _magnitude(T_live, 'K'),
+                                         _magnitude(p_condenser, 'bar'), _magnitude(eta_turbine, ''),
+                                         _magnitude(eta_pump, ''), _magnitude(p_reheat, 'bar'),
+                                         _magnitude(T_reheat, 'K'))
+        self.shape = parameters[0].shape
+        p_b, T_live, p_c, self.eta_turbine, self.eta_pump, p_rh, T_rh = (np.ravel(p) for p in parameters)
+        # without reheat the "reheat" is at the live steam state, so states 4 and 5 are state 3
+        no_reheat = np.isnan(p_rh)
+        p_rh, T_rh = np.where(no_reheat, p_b, p_rh), np.where(no_reheat, T_live, T_rh)
+
+        states = {'1': self._states({'p': p_c, 'x': np.zeros_like(p_c)})}
+        h_1, s_1 = states['1'].value('h'), states['1'].value('s')
+        h_2 = h_1 + (self._states({'p': p_b, 's': s_1}).value('h') - h_1) / self.eta_pump
+        # h_2 is known, the state is flashed only if other properties are requested
+        states['2'] = FluidStateArray(self.fluid_name, {'p': p_b, 'h': h_2}, backend=self.backend)
+        states['3'] = self._states({'p': p_b, 'T': T_live})
+        if np.all(no_reheat):
+            states['4'] = states['5'] = states['3']
+        else:
+            states['4'] = self._expand(states['3'], p_rh)
+            states['5'] = self._states({'p': p_rh, 'T': T_rh})
+        states['6'] = self._expand(states['5'], p_c)
+        self.states = states
+
+    def __repr__(self):
+        return f'RankineCycle({self.fluid_name}, {int(np.prod(self.shape))} cycles)'
+
+    def _states(self, properties: dict) -> FluidStateArray:
+        """The states of the input columns, every distinct input pair is flashed once."""
+        (name_1, column_1), (name_2, column_2) = properties.items()
+        order = np.lexsort((column_2, column_1))
+        column_1, column_2 = column_1[order], column_2[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (column_1[1:] != column_1[:-1]) | (column_2[1:] != column_2[:-1])
+        inverse = np.empty(len(order), dtype=int)
+        inverse[order] = np.cumsum(first) - 1
+        states = FluidStateArray(self.fluid_name, {name_1: column_1[first], name_2: column_2[first]},
+                                 backend=self.backend)
+        states.flash(strict=False)
+        return states[inverse]
+
+    def _expand(self, inlet: FluidStateArray, p: np.ndarray) -> FluidStateArray:
+        """Turbine outlet at p with the isentropic efficiency eta_turbine."""
+        h_in = inlet.value('h')
+        h_isentropic = self._states({'p': p, 's': inlet.value('s')}).value('h')
+        return self._states({'p': p, 'h': h_in - self.eta_turbine * (h_in - h_isentropic)})
+
+    def _h(self, state: str) -> np.ndarray:
+        return self.states[state].value('h')
+
+    def _result(self, values: np.ndarray, unit: str = 'J/kg') -> ureg.Quantity:
+        return ureg.Quantity(values.reshape(self.shape), unit)
+
+    @property
+    def w_turbine(self) -> ureg.Quantity:
+        """Specific work of both turbines."""
+        return self._result(self._h('3') - self._h('4') + self._h('5') - self._h('6'))
+
+    @property
+    def w_pump(self) -> ureg.Quantity:
+        return self._result(self._h('2') - self._h('1'))
+
+    @property
+    def w_net(self) -> ureg.Quantity:
+        return self.w_turbine - self.w_pump
+
+    @property
+    def q_in(self) -> ureg.Quantity:
+        """Specific heat of boiler, superheater and reheat."""
+        return self._result(self._h('3') - self._h('2') + self._h('5') - self._h('4'))
+
+    @property
+    def q_out(self) -> ureg.Quantity:
+        return self._result(self._h('6') - self._h('1'))
+
+    @property
+    def efficiency(self) -> ureg.Quantity:
+        """Thermal efficiency w_net / q_in."""
+        return (self.w_net / self.q_in).to('')
+
+    @property
+    def x_turbine_exit(self) -> ureg.Quantity:
+        """Steam quality leaving the turbine, -1 for superheated steam (like x of FluidState)."""
+        return self._result(self.states['6'].value('x'), '')
+
+    def results(self) -> dict:
+        """All results as plain arrays in SI units."""
+        return {name: getattr(self, name).to_base_units().magnitude for name in
+                ('efficiency', 'w_net', 'w_turbine', 'w_pump', 'q_in', 'q_out', 'x_turbine_exit')}
+
+    def summary(self):
+        """Prints the states and results of a single cycle, or one row of results per cycle."""
+        from tabulate import tabulate
+        print(f'\nSummary for {self}')
+        if self.shape != ():
+            results = self.results()
+            t_data = [[index] + [value[index] for value in results.values()] for index in np.ndindex(self.shape)]
+            print(tabulate(t_data, ['Cycle'] + [f'{name} (SI)' for name in results], tablefmt="orgtbl",
+                           floatfmt=".4f"))
+            return
+        t_header = ['State', 'p [bar]', 'T [K]', 'h [kJ/kg]', 's [kJ/(kg K)]', 'x']
+        t_data = [[name, s.p.magnitude[0], s.T.magnitude[0], s.h.to('kJ/kg').magnitude[0],
+                   s.s.to('kJ/(kg K)').magnitude[0], s.x.magnitude[0]] for name, s in self.states.items()]
+        print(tabulate(t_data, t_header, tablefmt="orgtbl", floatfmt=".2f"))
+        print(tabulate([[name, value] for name, value in self.results().items()], ['Result', 'Value (SI)'],
+                       tablefmt="orgtbl", floatfmt=".4f"))
@@ -0,0 +1,128 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from . import FluidState, FluidStateArray
+from ._engine import get_backend
+from ..cache import get_cache_dir, coolprop_version
+
+
+class SaturationDome:
+    """Saturated liquid and vapor lines of a fluid from the triple to the critical point and the triple line.
+
+    The lines are FluidStateArrays with all state properties already evaluated. Domes are shared, use
+    get_saturation_dome to get one and do not modify their arrays.
+    """
+    BRANCHES = ['liquid', 'vapor', 'triple_line']
+
+    def __init__(self, fluid_name: str, backend: str, space_property: str, space: str, n_points: int,
+                 liquid: FluidStateArray, vapor: FluidStateArray, triple_line: FluidStateArray):
+        self.fluid_name = fluid_name
+        self.backend = backend
+        self.space_property = space_property
+        self.space = space
+        self.n_points = n_points
+        self.liquid = liquid
+        self.vapor = vapor
+        self.triple_line = triple_line
+
+    def __repr__(self):
+        return f'SaturationDome({self.fluid_name}, {self.space_property}, {self.space}, {self.n_points})'
+
+    def branch(self, x: int) -> FluidStateArray:
+        if x == 0:
+            return self.liquid
+        elif x == 1:
+            return self.vapor
+        raise ValueError('property x of saturation_line must be 0 or 1')
+
+    @classmethod
+    def build(cls, fluid_name: str, backend: str, space_property: str, space: str,
+              n_points: int) -> 'SaturationDome':
+        from ._abstract_fluid import AbstractFluid
+        fluid = AbstractFluid(fluid_name, backend=backend)
+        prop_max = fluid.critical_point.get_property(space_property)
+        lines = {'liquid': fluid.get_iso_line('x', 0, space_property,
+                                              fluid.triple_point_liquid.get_property(space_property), prop_max,
+                                              space, n_points),
+                 'vapor': fluid.get_iso_line('x', 1, space_property,
+                                             fluid.triple_point_vapor.get_property(space_property), prop_max,
+                                             space, n_points),
+                 'triple_line': fluid.get_iso_line('p', fluid.triple_point_vapor.p, 'v',
+                                                   fluid.triple_point_liquid.v, fluid.triple_point_vapor.v,
+                                                   space, n_points)}
+        for line in lines.values():
+            line.value('T')  # evaluates all state properties in one batch
+        return cls(fluid_name, backend, space_property, space, n_points, **lines)
+
+    def save(self, path: str):
+        arrays = {}
+        for b in self.BRANCHES:
+            line = getattr(self, b)
+            arrays[f'{b}.inputs'] = np.array(list(line._cp_inputs.keys()))
+            arrays.update({f'{b}.input.{pn}': v for pn, v in line._cp_inputs.items()})
+            arrays.update({f'{b}.value.{pn}': np.asarray(v, dtype=str if pn == 'phase' else float)
+                           for pn, v in line._cp_values.items()})
+        tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+        try:
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    @classmethod
+    def load(cls, path: str, fluid_name: str, backend: str, space_property: str, space: str,
+             n_points: int) -> 'SaturationDome':
+        with np.load(path) as arrays:
+            lines = {}
+            for b in cls.BRANCHES:
+                cp_inputs = {pn: arrays[f'{b}.input.{pn}'] for pn in arrays[f'{b}.inputs']}
+                prefix = f'{b}.value.'
+                cp_values = {k[len(prefix):]: arrays[k].astype(object) if k.endswith('.phase') else arrays[k]
+                             for k in arrays.files if k.startswith(prefix)}
+                lines[b] = FluidStateArray._from_columns(FluidStateArray, fluid_name, backend, cp_inputs, cp_values,
+                                                         True)
+        return cls(fluid_name, backend, space_property, space, n_points, **lines)
+
+
+_domes = OrderedDict()
+_domes_lock = threading.Lock()
+max_saturation_domes = 32  # domes kept in memory, the least recently used are dropped first
+persist_saturation_domes = True  # keep computed domes in the tt cache folder
+
+
+def _dome_file(key: tuple) -> str:
+    fluid_name, backend, space_property, space, n_points = key
+    return os.path.join(get_cache_dir('saturation', coolprop_version()),
+                        f'{fluid_name.replace("::", "__")}-{backend}-{space_property}-{space}-{n_points}.npz')
+
+
+def get_saturation_dome(fluid_name: str, space_property: str = 'p', n_points: int = 100, space: str = 'linear',
+                        backend: str = None) -> SaturationDome:
+    """Returns the saturation dome spaced by n_points values of space_property (tt property name).
+
+    A dome is computed only once: it is kept in memory and in the tt cache folder as numpy arrays.
+    """
+    if space_property not in FluidState.property_info:
+        raise ValueError(f'{space_property} is not a possible property name')
+    key = (fluid_name, get_backend(fluid_name, backend), space_property, space, int(n_points))
+    with _domes_lock:
+        dome = _domes.get(key)
+        if dome is not None:
+            _domes.move_to_end(key)
+            return dome
+        path = _dome_file(key)
+        dome = None
+        if persist_saturation_domes:
+            try:
+                dome = SaturationDome.load(path, *key)
+            except (OSError, ValueError, KeyError):
+                pass
+        if dome is None:
+            dome = SaturationDome.build(*key)
+            if persist_saturation_domes:
+                dome.save(path)
+        _domes[key] = dome
+        while len(_domes) > max_saturation_domes:
+            _domes.popitem(last=False)
+    return dome
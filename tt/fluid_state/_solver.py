@@ -0,0 +1,141 @@
+import numpy as np
+
+
+class SolverError(ValueError):
+    """No state matches the inputs. For arrays failed is the mask of these states and values the other results."""
+
+    def __init__(self, message: str, failed: np.ndarray = None, values: dict = None):
+        super().__init__(message)
+        self.failed = failed
+        self.values = values
+
+
+class PairSolver:
+    """Finds the state of an input pair which coolprop can not flash directly.
+
+    One of the inputs (or the quality) is combined with an unknown, the density or the temperature, to a pair
+    coolprop supports. The unknown is iterated with a bracketed newton method until the other input matches. With a
+    warm start (a nearby state, e.g. the previous point of a line) the iteration starts there and the root next to
+    it is taken, otherwise the range of the unknown is scanned and the root of the lowest density or temperature is
+    taken. Roots above the maximum pressure or temperature of the equation of state are no solution.
+    """
+    # known input for the inner flash with the density, in order of preference
+    _DENSITY_PARTNERS = ['T', 'Umass', 'Smass', 'P', 'Hmass']
+    n_grid = 32
+    tolerance = 1e-10
+    max_iterations = 50
+    n_iterations = 0  # inner flashes of all solvers
+
+    def __init__(self, engine, names: tuple):
+        self.engine = engine
+        constants = {c: engine.constant(c) for c in ('T_critical', 'T_triple', 'rhomass_critical', 'T_max', 'P_max')}
+        self.limits = {'T': constants['T_max'], 'P': constants['P_max']}
+        if 'Q' in names:
+            self.unknown, self.known = 'T', 'Q'
+            self.bounds = (constants['T_triple'], constants['T_critical'] * (1 - 1e-9))
+            self.log = False
+        else:
+            self.unknown = 'Dmass'
+            self.known = next(n for n in self._DENSITY_PARTNERS if n in names)
+            self.bounds = (np.log(1e-7 * constants['rhomass_critical']), np.log(5 * constants['rhomass_critical']))
+            self.log = True
+        if self.known not in names:
+            raise SolverError(f'input pair {names} is not supported')
+        self.target = next(n for n in names if n != self.known)
+
+    def _residual(self, z: float, known_value: float, target_value: float) -> float:
+        """Flashes (unknown, known) and returns the relative deviation of the target, nan if the flash fails."""
+        PairSolver.n_iterations += 1
+        try:
+            state = self.engine._update({self.unknown: np.exp(z) if self.log else z, self.known: known_value})
+            return state.keyed_output(self.engine.parameter_index(self.target)) / target_value - 1 \
+                if target_value != 0 else state.keyed_output(self.engine.parameter_index(self.target))
+        except ValueError:
+            return np.nan
+
+    def solve(self, known_value: float, target_value: float, warm_start: dict = None) -> float:
+        """Returns the unknown (density or temperature) of the state, raises a SolverError if there is none.
+
+        The AbstractState of the engine is left at the solution.
+        """
+        z0 = None
+        if warm_start is not None and np.isfinite(warm_start.get(self.unknown, np.nan)):
+            z0 = np.log(warm_start[self.unknown]) if self.log else warm_start[self.unknown]
+            z0 = min(max(z0, self.bounds[0]), self.bounds[1])
+            bracket = self._local_bracket(z0, known_value, target_value)
+        else:
+            bracket = None
+        if bracket is None:
+            bracket = self._grid_bracket(z0, known_value, target_value)
+        if bracket is None:
+            raise SolverError(f'no state with {self.known} = {known_value} and {self.target} = {target_value}')
+        z = self._newton(*bracket, known_value, target_value)
+        unknown = np.exp(z) if self.log else z
+        state = self.engine._update({self.unknown: unknown, self.known: known_value})
+        for name, value in (('T', state.T()), ('P', state.p())):
+            if value > self.limits[name] * (1 + 1e-9):
+                raise SolverError(f'the state with {self.known} = {known_value} and {self.target} = {target_value} '
+                                  f'has {name} = {value:.6g} above the limit {self.limits[name]:.6g} of the '
+                                  f'equation of state')
+        return unknown
+
+    def _local_bracket(self, z0, known_value, target_value):
+        """Steps away from z0 in the downhill direction with growing steps until the residual changes its sign."""
+        r0 = self._residual(z0, known_value, target_value)
+        if not np.isfinite(r0):
+            return None
+        if r0 == 0:
+            return z0, r0, z0, r0
+        step = 1e-4 * (self.bounds[1] - self.bounds[0])
+        r_probe = self._residual(min(z0 + step, self.bounds[1]), known_value, target_value)
+        if not np.isfinite(r_probe):
+            return None
+        direction = 1 if (r_probe - r0) * r0 < 0 else -1
+        z_low, r_low = z0, r0
+        for _ in range(30):
+            z = min(max(z_low + direction * step, self.bounds[0]), self.bounds[1])
+            r = self._residual(z, known_value, target_value)
+            if not np.isfinite(r):
+                return None
+            if r * r0 <= 0:
+                return (z_low, r_low, z, r) if z_low < z else (z, r, z_low, r_low)
+            if z in self.bounds:
+                return None
+            z_low, r_low = z, r
+            step *= 4
+        return None
+
+    def _grid_bracket(self, z0, known_value, target_value):
+        z = np.linspace(*self.bounds, self.n_grid)
+        r = np.array([self._residual(zi, known_value, target_value) for zi in z])
+        sign_change = np.flatnonzero(np.isfinite(r[:-1]) & np.isfinite(r[1:]) & (r[:-1] * r[1:] <= 0))
+        if len(sign_change) == 0:
+            return None
+        i = sign_change[0] if z0 is None else sign_change[np.argmin(np.abs(z[sign_change] - z0))]
+        return z[i], r[i], z[i + 1], r[i + 1]
+
+    def _newton(self, z_low, r_low, z_high, r_high, known_value, target_value) -> float:
+        """Newton iteration with secant slopes which falls back to bisection when it leaves the bracket."""
+        if r_low == 0 or z_low == z_high:
+            return z_low
+        if r_high == 0:
+            return z_high
+        z, r = (z_low, r_low) if abs(r_low) < abs(r_high) else (z_high, r_high)
+        slope = (r_high - r_low) / (z_high - z_low)
+        for _ in range(self.max_iterations):
+            z_new = z - r / slope if slope != 0 else np.nan
+            if not z_low < z_new < z_high:
+                z_new = (z_low + z_high) / 2
+            r_new = self._residual(z_new, known_value, target_value)
+            if not np.isfinite(r_new):
+                raise SolverError(f'flash failed at {self.unknown} = {z_new} while solving {self.known} = '
+                                  f'{known_value} and {self.target} = {target_value}')
+            if abs(r_new) < self.tolerance or z_high - z_low < self.tolerance * max(1., abs(z_new)):
+                return z_new
+            if r_new * r_low < 0:
+                z_high, r_high = z_new, r_new
+            else:
+                z_low, r_low = z_new, r_new
+            slope = (r_new - r) / (z_new - z) if z_new != z else (r_high - r_low) / (z_high - z_low)
+            z, r = z_new, r_new
+        raise SolverError(f'no convergence for {self.known} = {known_value} and {self.target} = {target_value}')
@@ -0,0 +1,261 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from ._solver import SolverError
+from ..cache import coolprop_version, get_cache_dir
+
+
+def _quantize(values: np.ndarray, tolerance: float) -> np.ndarray:
+    """Rounds to a grid with the relative spacing tolerance, so inputs which differ less than the tolerance share a
+    key. The grid is uniform in log(|value|), zero, inf and nan are kept."""
+    step = math.log1p(tolerance)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return np.copysign(np.exp(np.round(np.log(np.abs(values)) / step) * step), values)
+
+
+class StateCache:
+    """Persistent cache of flashed states in an SQLite file shared by all processes and threads.
+
+    An entry is the value of one output of a state, keyed by fluid, backend, the input pair with its values rounded
+    to the relative tolerance and the output. Above max_entries the least recently used entries are evicted down
+    to 90 %. statistics counts the hits, misses and stores of states and the evicted entries of this process.
+    Only states with a solution are stored, and no states of solved input pairs with a warm start, as their root
+    depends on the start (see PairSolver). Errors of the database (e.g. a read only file system) make the cache
+    miss instead of failing the evaluation.
+
+    A lookup in the file takes about as long as a flash of a native input pair, storing a state about a
+    millisecond. The cache pays off for solved input pairs, slow backends like REFPROP and points which are
+    requested again by other processes or after a restart.
+    """
+    TOUCH_INTERVAL = 3600  # seconds, the last use of an entry is updated at most this often
+    max_memory_states = 10000  # single states with exactly the same inputs are also kept in memory
+    max_batch = 10000  # larger arrays (e.g. scans or table builds) are not cached
+
+    def __init__(self, path: str = None, tolerance: float = 1e-9, max_entries: int = 1000000):
+        """The default path is states-<coolprop version>.sqlite in the tt cache folder."""
+        if path is None:
+            path = os.path.join(get_cache_dir('states'), f'states-{coolprop_version()}.sqlite')
+        if not 0 < tolerance < 1:
+            raise ValueError(f'tolerance must be between 0 and 1 but is {tolerance}')
+        self.path = path
+        self.tolerance = tolerance
+        self.max_entries = max_entries
+        self.statistics = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'errors': 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._stored_since_check = max_entries  # checks the size with the first store
+
+    def __repr__(self):
+        return f'StateCache({self.path}, tolerance {self.tolerance})'
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS states (fluid TEXT, backend TEXT, inputs TEXT, '
+                                   'key_1 REAL, key_2 REAL, output TEXT, value, used INTEGER, '
+                                   'UNIQUE (fluid, backend, inputs, key_1, key_2, output))')
+                connection.execute('CREATE INDEX IF NOT EXISTS states_used ON states (used)')
+            connection.execute('CREATE TEMP TABLE IF NOT EXISTS query (i INTEGER PRIMARY KEY, key_1 REAL, '
+                               'key_2 REAL)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.statistics[name] += n
+
+    def _keys(self, engine, inputs: dict) -> tuple:
+        """(fluid, backend, input names) and the flat quantized columns of the inputs in the order of the names."""
+        names = sorted(inputs)
+        columns = np.broadcast_arrays(*[np.asarray(inputs[n], dtype=float) for n in names])
+        return ((engine.fluid_name, engine.backend, f'{",".join(names)}@{self.tolerance!r}'),
+                [_quantize(c.ravel(), self.tolerance) for c in columns])
+
+    def _lookup(self, prefix: tuple, keys: list, indices: np.ndarray, outputs: list) -> dict:
+        """{index: {output: value}} of the states at indices which are stored with all outputs."""
+        connection = self._connection
+        now = int(time.time())
+        outputs_sql = ", ".join("?" * len(outputs))
+        if len(indices) == 1:
+            i = int(indices[0])
+            rows = [(i,) + row for row in connection.execute(
+                f'SELECT output, value, used, rowid FROM states WHERE fluid = ? AND backend = ? AND inputs = ? AND '
+                f'key_1 = ? AND key_2 = ? AND output IN ({outputs_sql})',
+                prefix + (keys[0][i], keys[1][i]) + tuple(outputs)).fetchall()]
+        else:
+            with connection:
+                connection.execute('DELETE FROM temp.query')
+                connection.executemany('INSERT INTO temp.query VALUES (?, ?, ?)',
+                                       zip(indices.tolist(), keys[0][indices].tolist(), keys[1][indices].tolist()))
+                rows = connection.execute(
+                    # CROSS JOIN keeps the query as outer loop, the states are searched with their unique index
+                    f'SELECT q.i, s.output, s.value, s.used, s.rowid FROM temp.query q CROSS JOIN states s WHERE '
+                    f's.fluid = ? AND s.backend = ? AND s.inputs = ? AND s.key_1 = q.key_1 AND s.key_2 = q.key_2 '
+                    f'AND s.output IN ({outputs_sql})', prefix + tuple(outputs)).fetchall()
+        found = {}
+        stale = []
+        for i, output, value, used, rowid in rows:
+            found.setdefault(i, {})[output] = np.nan if value is None else value
+            if used < now - self.TOUCH_INTERVAL:
+                stale.append((now, rowid))
+        if stale:
+            with connection:
+                connection.executemany('UPDATE states SET used = ? WHERE rowid = ?', stale)
+        return {i: values for i, values in found.items() if len(values) == len(outputs)}
+
+    def _store(self, prefix: tuple, keys: list, indices: np.ndarray, values: dict):
+        """Stores the states at indices, values are {output: flat array of these states}."""
+        now = int(time.time())
+        rows = [prefix + (keys[0][i], keys[1][i], o, v[j] if isinstance(v[j], str) else float(v[j]), now)
+                for j, i in enumerate(indices.tolist()) for o, v in values.items()]
+        connection = self._connection
+        with connection:
+            connection.executemany('INSERT OR REPLACE INTO states VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        self._count('stores', len(indices))
+        with self._lock:
+            self._stored_since_check += len(rows)
+            check = self._stored_since_check >= self.max_entries // 20
+            if check:
+                self._stored_since_check = 0
+        if check:
+            self._evict()
+
+    def _evict(self):
+        connection = self._connection
+        with connection:
+            n = connection.execute('SELECT count(*) FROM states').fetchone()[0]
+            if n > self.max_entries:
+                removed = n - int(0.9 * self.max_entries)
+                connection.execute('DELETE FROM states WHERE rowid IN (SELECT rowid FROM states ORDER BY used, '
+                                   'rowid LIMIT ?)', (removed,))
+                self._count('evictions', removed)
+
+    @staticmethod
+    def _bypass(engine, inputs: dict, warm_start: dict) -> bool:
+        return engine.backend == 'table' or (warm_start is not None and engine.solves(list(inputs)))
+
+    def evaluate(self, engine, inputs: dict, outputs: list, warm_start: dict = None) -> dict:
+        """engine.evaluate with the stored state, or evaluated and stored."""
+        if self._bypass(engine, inputs, warm_start):
+            return engine.evaluate(inputs, outputs, warm_start)
+        key = (engine.fluid_name, engine.backend, tuple(outputs)) + tuple((n, float(v)) for n, v in inputs.items())
+        with self._lock:
+            values = self._memory.get(key)
+            if values is not None:
+                self._memory.move_to_end(key)
+                self.statistics['hits'] += 1
+                return dict(values)
+        values = self.evaluate_array(engine, {n: np.atleast_1d(v) for n, v in inputs.items()}, outputs, warm_start)
+        values = {o: v[0] if o == 'phase' else float(v[0]) for o, v in values.items()}
+        with self._lock:
+            self._memory[key] = values
+            if len(self._memory) > self.max_memory_states:
+                self._memory.popitem(last=False)
+        return dict(values)
+
+    def evaluate_array(self, engine, inputs: dict, outputs: list, warm_start: dict = None) -> dict:
+        """engine.evaluate_array with the stored states, the others are evaluated and stored."""
+        names = list(inputs)
+        shape = np.broadcast_shapes(*[np.shape(v) for v in inputs.values()])
+        n = math.prod(shape)
+        if self._bypass(engine, inputs, warm_start) or n > self.max_batch:
+            return engine.evaluate_array(inputs, outputs, warm_start)
+        prefix, keys = self._keys(engine, inputs)
+        finite = np.flatnonzero(np.isfinite(keys[0]) & np.isfinite(keys[1]))
+        try:
+            found = self._lookup(prefix, keys, finite, outputs)
+        except sqlite3.Error:
+            self._count('errors')
+            found = {}
+        self._count('hits', len(found))
+        self._count('misses', n - len(found))
+        if len(found) == n:
+            return {o: np.array([found[i][o] for i in range(n)], dtype=object if o == 'phase' else float).reshape(
+                shape) for o in outputs}
+
+        missing = np.ones(n, dtype=bool)
+        missing[list(found)] = False
+        columns = np.broadcast_arrays(*[np.asarray(inputs[pn], dtype=float) for pn in names])
+        failed = np.zeros(n, dtype=bool)
+        try:
+            evaluated = engine.evaluate_array({pn: c.ravel()[missing] for pn, c in zip(names, columns)}, outputs,
+                                              warm_start)
+        except SolverError as e:
+            evaluated = e.values
+            failed[missing] = e.failed
+
+        values = {o: np.full(n, 'unknown', dtype=object) if o == 'phase' else np.full(n, np.nan) for o in outputs}
+        for o in outputs:
+            values[o][missing] = evaluated[o]
+            for i, found_values in found.items():
+                values[o][i] = found_values[o]
+        store = np.zeros(n, dtype=bool)
+        store[finite] = True
+        store &= missing & ~failed
+        try:
+            if np.any(store):
+                self._store(prefix, keys, np.flatnonzero(store), {o: v[store] for o, v in values.items()})
+        except sqlite3.Error:
+            self._count('errors')
+        values = {o: v.reshape(shape) for o, v in values.items()}
+        if np.any(failed):
+            engine._raise_failed(names, failed.reshape(shape), values)
+        return values
+
+    def __len__(self):
+        return self._connection.execute('SELECT count(*) FROM states').fetchone()[0]
+
+    def clear(self):
+        """Removes all entries of the file and the memory."""
+        with self._lock:
+            self._memory.clear()
+        with self._connection as connection:
+            connection.execute('DELETE FROM states')
+
+
+_state_cache = None
+_configured = False
+
+
+def set_state_cache(enabled: bool = True, path: str = None, tolerance: float = 1e-9,
+                    max_entries: int = 1000000) -> StateCache:
+    """Enables (or disables) the persistent cache of the states flashed by FluidState and FluidStateArray.
+
+    The setting is also passed to processes started later (e.g. of evaluate_many) through the environment
+    variables TT_STATE_CACHE (path, or 1 for the default path), TT_STATE_CACHE_TOLERANCE and
+    TT_STATE_CACHE_MAX_ENTRIES, which enable the cache without calling this function.
+    """
+    global _state_cache, _configured
+    _state_cache = StateCache(path, tolerance, max_entries) if enabled else None
+    _configured = True
+    if enabled:
+        os.environ['TT_STATE_CACHE'] = _state_cache.path
+        os.environ['TT_STATE_CACHE_TOLERANCE'] = repr(tolerance)
+        os.environ['TT_STATE_CACHE_MAX_ENTRIES'] = str(max_entries)
+    else:
+        os.environ.pop('TT_STATE_CACHE', None)
+    return _state_cache
+
+
+def get_state_cache() -> StateCache:
+    """The StateCache in use or None."""
+    global _configured
+    if not _configured:
+        setting = os.environ.get('TT_STATE_CACHE', '')
+        if setting and setting not in ('0', 'false'):
+            set_state_cache(True, None if setting in ('1', 'true') else setting,
+                            float(os.environ.get('TT_STATE_CACHE_TOLERANCE', 1e-9)),
+                            int(os.environ.get('TT_STATE_CACHE_MAX_ENTRIES', 1000000)))
+        _configured = True
+    return _state_cache
@@ -1,17 +1,24 @@
-import matplotlib.pyplot as plt
-from . import ureg, AbstractFluid, FluidState
+import io
+import threading
+from . import ureg, AbstractFluid, FluidState, FluidStateArray, IsoLineSampler
 
 
 class ThermoChart:
     KINDS = ['pv', 'ts']
 
     def __init__(self, kind: str, fluid: str, x_property: str, x_unit:str, y_property:str, y_unit:str,
-                 states=None, processes=None, show=True, x_log:bool=False, y_log:bool=False):
+                 states=None, processes=None, show=True, x_log:bool=False, y_log:bool=False,
+                 pixel_tolerance: float = 0.5, backend: str = None):
+        """Process lines are sampled adaptively to pixel_tolerance, or with 100 points if it is None.
+
+        With show=False the chart never uses pyplot, it is drawn on Figures with an Agg canvas, which can be used in
+        several threads at once.
+        """
         if kind not in self.KINDS:
             raise ValueError(f'kind "{kind}" not in {self.KINDS}')
         self.kind = kind
 
-        self.fluid = AbstractFluid(fluid)
+        self.fluid = AbstractFluid(fluid, backend)
 
         states = [] if states is None else states
         states = [states] if type(states) is not list else states
@@ -27,9 +34,12 @@ class ThermoChart:
         self.unit_y = ureg.Unit(y_unit)
 
         self.fig = None
+        self.show = show
 
         self.x_log = x_log
         self.y_log = y_log
+        self.pixel_tolerance = pixel_tolerance
+        self.n_evaluations = 0
 
     def add_point(self, ax, fluid: FluidState, **kwargs):
         fluid = [fluid] if type(fluid) is not list else fluid
@@ -37,13 +47,37 @@ class ThermoChart:
         y = [f.get_property(self.property_y).to(self.unit_y).magnitude for f in fluid]
         ax.scatter(x, y, **kwargs)
 
-    def add_line(self, ax, line: list, **kwargs):
-        x = [f.get_property(self.property_x).to(self.unit_x).magnitude for f in line]
-        y = [f.get_property(self.property_y).to(self.unit_y).magnitude for f in line]
+    def add_line(self, ax, line: FluidStateArray, **kwargs):
+        if type(line) is list:
+            line = FluidStateArray.from_states(line)
+        x = line.get_property(self.property_x).to(self.unit_x).magnitude
+        y = line.get_property(self.property_y).to(self.unit_y).magnitude
         ax.plot(x, y, **kwargs)
 
-    def create_empty(self):
-        fig = plt.figure()
+    @classmethod
+    def from_definition(cls, definition: dict, **kwargs) -> 'ThermoChart':
+        """Chart of a definition (JSON data) like {'kind': 'pv', 'fluid': 'Water', 'state': {'p': 100, 'v': 0.02},
+        'processes': [['p', 'T', 400], ...], 'x_property': 'h', 'x_unit': 'kJ/kg', 'y_property': 'p', 'y_unit': 'bar',
+        'x_log': False, 'y_log': False}, where the processes (iso property, changing property, value) start at the
+        state and at the end of the previous process.
+        """
+        from . import Fluid, Process
+        states = [Fluid(fluid_name=definition['fluid'], amount=1, properties=definition['state'])]
+        processes = []
+        for iso_property, changing_property, value in definition.get('processes', []):
+            processes.append(Process(states[-1], iso_property, changing_property, value))
+            states.append(processes[-1].state_2)
+        return cls(definition.get('kind', 'pv'), definition['fluid'], definition['x_property'],
+                   definition['x_unit'], definition['y_property'], definition['y_unit'], states=states,
+                   processes=processes, x_log=definition.get('x_log', False), y_log=definition.get('y_log', False),
+                   **kwargs)
+
+    def create_empty(self, fig=None):
+        """Draws the chart into fig (which is cleared) or a new figure, with show=True a pyplot figure it shows."""
+        if fig is None:
+            fig = self._new_figure()
+        else:
+            fig.clear()
         ax = fig.add_subplot(1, 1, 1)
 
         self.add_point(ax, self.fluid.critical_point, label='critical point', c='r')
@@ -65,17 +99,25 @@ class ThermoChart:
             label = f'{s.fluid_name}({self.property_x}: {"{:.3g~P}".format(x)}, {"{:.3g~P}".format(y)})'
             self.add_point(ax, s, label=label)
 
+        sampler = None
+        if self.pixel_tolerance is not None:
+            size = fig.get_size_inches() * fig.dpi * ax.get_position().size
+            sampler = IsoLineSampler.from_pixels(self.property_x, self.unit_x, self.property_y, self.unit_y,
+                                                 self.x_log, self.y_log, self.pixel_tolerance, tuple(size))
+        self.n_evaluations = 0
         for p in self.processes:
             iso_property = p.state_1.get_property(p.iso_property_name)
             line = p.state_1.get_iso_line(p.iso_property_name, iso_property,
                                           p.changing_property_name,
                                           p.state_1.get_property(p.changing_property_name),
-                                          p.state_2.get_property(p.changing_property_name), n_points=100, space='log')
+                                          p.state_2.get_property(p.changing_property_name), n_points=100,
+                                          space='log' if sampler is None else 'linear', sampler=sampler)
+            self.n_evaluations += len(line) if sampler is None else sampler.n_evaluations
             label = f'Iso: {p.iso_property_name}@{"{:.3g~P}".format(iso_property)}'
             self.add_line(ax, line, label=label)
 
-        plt.xlabel(f'{self.property_x} [{"{:~P}".format(self.unit_x)}]')
-        plt.ylabel(f'{self.property_y} [{"{:~P}".format(self.unit_y)}]')
+        ax.set_xlabel(f'{self.property_x} [{"{:~P}".format(self.unit_x)}]')
+        ax.set_ylabel(f'{self.property_y} [{"{:~P}".format(self.unit_y)}]')
 
         if self.x_log:
             ax.set_xscale('log')
@@ -86,8 +128,51 @@ class ThermoChart:
         if self.y_log:
             ax.set_yscale('log')
 
-        plt.legend(loc='best')
-
-        plt.show()
-
-        return fig
\ No newline at end of file
+        ax.legend(loc='best')
+
+        self.fig = fig
+        if self.show:
+            import matplotlib.pyplot as plt
+            plt.show()
+        return fig
+
+    def _new_figure(self):
+        if self.show:
+            import matplotlib.pyplot as plt
+            return plt.figure()
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        return fig
+
+    def render(self, fig=None, format: str = 'png', **kwargs) -> bytes:
+        """The chart as image data, drawn into fig (e.g. a reused Figure with an Agg canvas) without pyplot."""
+        show, self.show = self.show, False
+        try:
+            fig = self.create_empty(fig)
+        finally:
+            self.show = show
+        output = io.BytesIO()
+        fig.savefig(output, format=format, **kwargs)
+        return output.getvalue()
+
+
+_figures = threading.local()
+
+
+def render_chart(definition: dict, format: str = 'png') -> bytes:
+    """Renders the chart of a definition (see ThermoChart.from_definition) without pyplot.
+
+    Every thread reuses one figure, which is cleared for the next chart, so long running workers do not accumulate
+    figures.
+    """
+    chart = ThermoChart.from_definition(definition, show=False)
+    fig = getattr(_figures, 'figure', None)
+    if fig is None:
+        fig = _figures.figure = chart._new_figure()
+    try:
+        return chart.render(fig, format)
+    finally:
+        fig.clear()
+        chart.fig = None
\ No newline at end of file
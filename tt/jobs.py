@@ -0,0 +1,249 @@
+"""Local background jobs for computations which take longer than a web request, without an external broker.
+
+A job is a function function(params, report) of a registered kind, run on a pool of worker processes. It calls
+report(progress, partial) to publish its progress (0 to 1) and optionally a part of its result. Status, parts and
+result are files in a JobStore folder, so every process (web workers and job workers) sees them. Jobs expire
+ttl seconds after they finished.
+"""
+import importlib
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from .cache import get_cache_dir
+
+# kind -> 'module:function', the functions are imported in the worker processes
+JOB_KINDS = {'property_sweep': 'tt.jobs:property_sweep'}
+MAX_SWEEP_STATES = 2000000  # states of one property_sweep
+
+
+def register_job_kind(kind: str, function: str):
+    """Registers function ('module:function', importable by the worker processes) as a job kind."""
+    if ':' not in function:
+        raise ValueError(f'{function} must be given as "module:function"')
+    JOB_KINDS[kind] = function
+
+
+def _json_safe(value):
+    """nan and inf (e.g. failed states) as None, numpy arrays and numbers as lists and floats."""
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if hasattr(value, 'tolist'):
+        return _json_safe(value.tolist())
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class JobNotFound(KeyError):
+    """The job does not exist or has expired."""
+
+
+class JobStore:
+    def __init__(self, directory: str = None, ttl: float = 24 * 3600):
+        """Jobs are kept in directory (by default the tt cache folder jobs) until ttl seconds after they ended."""
+        self.directory = get_cache_dir('jobs') if directory is None else directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.ttl = ttl
+
+    def _path(self, job_id: str, *names) -> str:
+        if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+            raise JobNotFound(job_id)
+        return os.path.join(self.directory, job_id, *names)
+
+    @staticmethod
+    def _write(path: str, data):
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(_json_safe(data), f)
+        os.replace(tmp_path, path)
+
+    def create(self, kind: str, params: dict) -> str:
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._path(job_id, 'parts'))
+        now = time.time()
+        self._write(self._path(job_id, 'status.json'), {'id': job_id, 'kind': kind, 'state': 'queued',
+                                                         'progress': 0., 'parts': 0, 'created': now,
+                                                         'updated': now, 'ended': None, 'error': None})
+        self._write(self._path(job_id, 'params.json'), params)
+        return job_id
+
+    def status(self, job_id: str) -> dict:
+        try:
+            with open(self._path(job_id, 'status.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise JobNotFound(job_id) from None
+
+    def update(self, job_id: str, **changes) -> dict:
+        """Changes the status of a job (only the worker of a job changes it, so there is no lock)."""
+        status = self.status(job_id)
+        status.update(changes, updated=time.time())
+        if changes.get('state') in ('finished', 'failed'):
+            status['ended'] = status['updated']
+        self._write(self._path(job_id, 'status.json'), status)
+        return status
+
+    def add_part(self, job_id: str, part) -> int:
+        """Stores a partial result, parts are numbered from 0 in the order they were added."""
+        i = self.status(job_id)['parts']
+        self._write(self._path(job_id, 'parts', f'{i:06d}.json'), part)
+        self.update(job_id, parts=i + 1)
+        return i
+
+    def part(self, job_id: str, i: int):
+        with open(self._path(job_id, 'parts', f'{i:06d}.json')) as f:
+            return json.load(f)
+
+    def set_result(self, job_id: str, result):
+        self._write(self._path(job_id, 'result.json'), result)
+        self.update(job_id, state='finished', progress=1.)
+
+    def result(self, job_id: str):
+        try:
+            with open(self._path(job_id, 'result.json')) as f:
+                return json.load(f)
+        except OSError:
+            raise JobNotFound(job_id) from None
+
+    def purge(self) -> int:
+        """Removes the jobs which ended more than ttl seconds ago, returns their number."""
+        removed = 0
+        now = time.time()
+        for job_id in os.listdir(self.directory):
+            try:
+                status = self.status(job_id)
+            except JobNotFound:
+                continue
+            if status['ended'] is not None and now - status['ended'] > self.ttl:
+                shutil.rmtree(self._path(job_id), ignore_errors=True)
+                removed += 1
+        return removed
+
+
+def _resolve(kind: str):
+    if kind not in JOB_KINDS:
+        raise ValueError(f'{kind} is not a job kind, use one of {list(JOB_KINDS)}')
+    module, _, function = JOB_KINDS[kind].partition(':')
+    return getattr(importlib.import_module(module), function)
+
+
+def run_job(directory: str, job_id: str, kind: str, params: dict, job_kinds: dict = None):
+    """Runs a job in a worker process and stores its progress, parts and result or error."""
+    if job_kinds is not None:
+        JOB_KINDS.update(job_kinds)
+    store = JobStore(directory)
+    store.update(job_id, state='running')
+
+    def report(progress: float, partial=None):
+        if partial is not None:
+            store.add_part(job_id, partial)
+        store.update(job_id, progress=float(progress))
+
+    try:
+        store.set_result(job_id, _resolve(kind)(params, report))
+    except Exception as e:
+        store.update(job_id, state='failed', error=f'{type(e).__name__}: {e}')
+
+
+class JobQueue:
+    def __init__(self, store: JobStore = None, workers: int = None):
+        """Jobs run on worker processes (default TT_JOB_WORKERS or the number of cores), started on first use."""
+        self.store = JobStore() if store is None else store
+        self.workers = workers or int(os.environ.get('TT_JOB_WORKERS', 0)) or os.cpu_count() or 1
+        self._executor = None
+        self._jobs = {}  # id -> pool of the jobs which did not end
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'JobQueue({self.workers} workers, {self.store.directory})'
+
+    def submit(self, kind: str, params: dict) -> str:
+        """Queues a job and returns its id."""
+        _resolve(kind)
+        json.dumps(params)  # params go to another process and into the store
+        self.store.purge()
+        job_id = self.store.create(kind, params)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            executor = self._executor
+            future = executor.submit(run_job, self.store.directory, job_id, kind, params, dict(JOB_KINDS))
+            self._jobs[job_id] = executor
+        future.add_done_callback(lambda f: self._check_worker(f, job_id, executor))
+        return job_id
+
+    def _check_worker(self, future, job_id: str, executor: ProcessPoolExecutor):
+        # run_job stores its own errors, this catches workers which died
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        error = future.exception() if not future.cancelled() else None
+        if error is not None or future.cancelled():
+            self._fail(job_id, f'worker failed: {error!r}')
+            self._discard_executor(executor)
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Shuts a broken pool down, the next job starts a new one. Its jobs which did not end have failed."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+            job_ids = [job_id for job_id, e in self._jobs.items() if e is executor]
+        executor.shutdown(wait=False, cancel_futures=True)
+        for job_id in job_ids:
+            self._fail(job_id, 'worker failed: the pool of the job was discarded')
+
+    def _fail(self, job_id: str, error: str):
+        try:
+            if self.store.status(job_id)['state'] in ('queued', 'running'):
+                self.store.update(job_id, state='failed', error=error)
+        except JobNotFound:
+            pass
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def property_sweep(params: dict, report) -> dict:
+    """Job evaluating outputs of many states, params like {'fluid': 'Water', 'inputs': {'p': [...], 'T': [...]},
+    'outputs': ['h', 's'], 'grid': True, 'backend': None, 'chunk_size': 10000} in the units of Properties.xlsx.
+
+    With grid the states are all combinations of both input lists, otherwise the lists are paired, at most
+    MAX_SWEEP_STATES states. Every chunk of states is reported as a part {'offset': i, 'outputs': {output:
+    [values]}}, failed states are None.
+    """
+    import numpy as np
+    from .fluid_state import FluidState, FluidStateArray, get_fluid_info
+    get_fluid_info(params['fluid'])  # unknown fluids fail here instead of giving nan
+    for o in params['outputs']:
+        p = FluidState.property_info.get(o)
+        if p is None or not (p.coolprop_use or o in ('v', 'cp_molar')):
+            raise ValueError(f'{o} is not a possible output, use a specific property like h, s, v or x')
+    (name_1, values_1), (name_2, values_2) = params['inputs'].items()
+    values_1, values_2 = np.asarray(values_1, dtype=float), np.asarray(values_2, dtype=float)
+    size = values_1.size * values_2.size if params.get('grid', False) else max(values_1.size, values_2.size)
+    if size > MAX_SWEEP_STATES:
+        raise ValueError(f'{size} states are more than {MAX_SWEEP_STATES}')
+    if params.get('grid', False):
+        values_1, values_2 = (a.ravel() for a in np.meshgrid(values_1, values_2, indexing='ij'))
+    values_1, values_2 = np.broadcast_arrays(values_1, values_2)
+    chunk_size = int(params.get('chunk_size', 10000))
+    outputs = {o: np.empty(len(values_1)) for o in params['outputs']}
+    for start in range(0, len(values_1), chunk_size):
+        end = min(start + chunk_size, len(values_1))
+        states = FluidStateArray(params['fluid'], {name_1: values_1[start:end], name_2: values_2[start:end]},
+                                 backend=params.get('backend'))
+        states.flash(strict=False)  # failed states are nan
+        for o in outputs:
+            outputs[o][start:end] = states.get_property(o).magnitude
+        report(end / len(values_1), {'offset': start, 'outputs': {o: v[start:end] for o, v in outputs.items()}})
+    return {'inputs': {name_1: values_1, name_2: values_2}, 'outputs': outputs}
@@ -1,22 +1,25 @@
 from CoolProp.CoolProp import PropsSI
 import numpy as np
-import matplotlib.pyplot as plt
+from .fluid_state import FluidStateArray, get_saturation_dome, get_backend, coolprop_fluid_name
 
 
 class PvChart:
-    def __init__(self, fluid: str = 'Water'):
+    def __init__(self, fluid: str = 'Water', backend: str = None):
         self.fluid = fluid
+        self.backend = get_backend(fluid, backend)
+        self._coolprop_fluid = coolprop_fluid_name(fluid, backend)
 
-        self.T_cirtical = PropsSI("Tcrit", self.fluid)
-        self.p_cirtical = PropsSI("Pcrit", self.fluid)
-        self.V_cirtical = 1 / PropsSI("rhocrit", self.fluid)
+        self.T_cirtical = PropsSI("Tcrit", self._coolprop_fluid)
+        self.p_cirtical = PropsSI("Pcrit", self._coolprop_fluid)
+        self.V_cirtical = 1 / PropsSI("rhocrit", self._coolprop_fluid)
 
-        self.T_trippel = PropsSI("T_triple", self.fluid)
-        self.p_trippel = PropsSI("p_triple", self.fluid)
+        self.T_trippel = PropsSI("T_triple", self._coolprop_fluid)
+        self.p_trippel = PropsSI("p_triple", self._coolprop_fluid)
 
-        self.P_range = np.linspace(self.p_trippel, self.p_cirtical, 1000)
-        self.V_liquid = 1 / PropsSI("D", "P", self.P_range, "Q", 0, self.fluid)
-        self.V_vapor = 1 / PropsSI("D", "P", self.P_range, "Q", 1, self.fluid)
+        dome = get_saturation_dome(self.fluid, 'p', 1000, backend=self.backend)
+        self.P_range = dome.liquid.value('p')
+        self.V_liquid = dome.liquid.value('v')
+        self.V_vapor = dome.vapor.value('v')
 
         self.points = []
         self.iso_lines = []
@@ -28,22 +31,40 @@ class PvChart:
                 label=f'Isobar (p = {p / 1e5} bar)')
 
     def _add_isotherm_line(self, ax, T):
-        v_iso_line = np.logspace(np.log10(0.0008), np.log10(100), 1000)
-        p_iso_line = PropsSI("P", "D", 1 / v_iso_line, "T", T, self.fluid)
+        # (p, T) inputs work with every backend, the two-phase part joins the saturated states
+        p_min = PropsSI("gas_constant", self._coolprop_fluid) / PropsSI("M", self._coolprop_fluid) * T / 100
+        p_iso_line = np.geomspace(p_min, self.p_cirtical, 1000)
+        if T < self.T_cirtical:
+            p_sat = PropsSI("P", "T", T, "Q", 0, self._coolprop_fluid)
+            p_iso_line = np.concatenate([p_iso_line[p_iso_line < p_sat], [p_sat, p_sat],
+                                         p_iso_line[p_iso_line > p_sat]])
+        line = FluidStateArray(self.fluid, {'p': p_iso_line, 'T': T}, si=True, backend=self.backend)
+        v_iso_line = line.value('v')
+        if T < self.T_cirtical:
+            saturated = FluidStateArray(self.fluid, {'T': T, 'x': np.array([1, 0])}, si=True, backend=self.backend)
+            i = np.flatnonzero(p_iso_line == p_sat)
+            v_iso_line[i] = saturated.value('v')
         ax.plot(v_iso_line[p_iso_line<self.p_cirtical], p_iso_line[p_iso_line<self.p_cirtical] / 1e5,
                 label=f'Isotherm (T = {T} K)')
 
     def _add_isoquality_line(self, ax, x):
         p_iso_line = np.logspace(np.log10(self.p_trippel), np.log10(self.p_cirtical), 100)
         p_iso_line = np.linspace(self.p_trippel, self.p_cirtical, 100)
-        v_iso_line = 1 / PropsSI("D", "P", p_iso_line, "Q", x, self.fluid)
+        v_iso_line = 1 / PropsSI("D", "P", p_iso_line, "Q", x, self._coolprop_fluid)
         # v_iso_line = np.logspace(np.log10(0.0008), np.log10(100), 100)
-        # p_iso_line = PropsSI("P", "D", 1 / v_iso_line, "Q", x, self.fluid)
+        # p_iso_line = PropsSI("P", "D", 1 / v_iso_line, "Q", x, self._coolprop_fluid)
         ax.plot(v_iso_line, p_iso_line / 1e5, label=f'Isoquality (x = {x})')
 
     @property
-    def figure(self, show=False) -> plt.Figure:
-        fig = plt.figure()
+    def figure(self) -> 'Figure':
+        """The chart on a new Figure with an Agg canvas, pyplot is not used."""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        return self.draw(fig)
+
+    def draw(self, fig):
         ax = fig.add_subplot(1, 1, 1)
         ax.scatter([self.V_cirtical], [self.p_cirtical / 1e5], label='critical point', c='r')
         ax.plot(self.V_liquid[self.V_liquid > 0], self.P_range[self.V_liquid > 0] / 1e5, label='saturated liquid line')
@@ -73,38 +94,36 @@ class PvChart:
         ax.set_title(f'p-v Chart of {self.fluid}')
         # ax.set_ylim(bottom=0)
 
-        plt.xlabel('specific Volume v [m^3/kg]')
-        plt.ylabel('Pressure p [bar]')
+        ax.set_xlabel('specific Volume v [m^3/kg]')
+        ax.set_ylabel('Pressure p [bar]')
 
         # ax.set_yscale('log')
         # ax.set_xscale('log')
         ax.set_xlim([0,0.05])
 
-        plt.legend(loc='best')
-
-        if show:
-            fig.show()
+        ax.legend(loc='best')
         return fig
 
     def show(self):
-        fig = self.figure
-        fig.show()
+        import matplotlib.pyplot as plt
+        self.draw(plt.figure())
+        plt.show()
 
     def add_point(self, T=None, p=None, x=None):
         if p is not None:
             p = p * 1e5
         if x is not None:
             if p is not None:
-                T = PropsSI("T", "P", p, "Q", x, self.fluid)
-                rho = PropsSI("D", "P", p, "Q", x, self.fluid)
+                T = PropsSI("T", "P", p, "Q", x, self._coolprop_fluid)
+                rho = PropsSI("D", "P", p, "Q", x, self._coolprop_fluid)
             elif T is not None:
-                p = PropsSI("P", "T", T, "Q", x, self.fluid)
-                rho = PropsSI("D", "T", T, "Q", x, self.fluid)
+                p = PropsSI("P", "T", T, "Q", x, self._coolprop_fluid)
+                rho = PropsSI("D", "T", T, "Q", x, self._coolprop_fluid)
             else:
                 raise Exception('T or p have to be defined if x is defined')
         else:
-            x = PropsSI("Q", "T", T, "P", p, self.fluid)
-            rho = PropsSI("D", "T", T, "P", p, self.fluid)
+            x = PropsSI("Q", "T", T, "P", p, self._coolprop_fluid)
+            rho = PropsSI("D", "T", T, "P", p, self._coolprop_fluid)
         point = {'T': T, 'p': p, 'x': x, 'rho': rho}
         self.points.append(point)
 
@@ -13,19 +13,24 @@ _properties_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Pr
 
 
 class AbstractFluid:
-    def __init__(self, fluid_name):
+    def __init__(self, fluid_name, backend: str = None):
+        from .fluid_state import get_backend, coolprop_fluid_name  # the engine package is only loaded when used
         self.fluid_name = fluid_name
+        self.backend = get_backend(fluid_name, backend)
+        coolprop_name = coolprop_fluid_name(fluid_name, backend)
 
-        T_crit = PropsSI('T_critical', fluid_name) * ureg.K
-        p_crit = PropsSI('p_critical', fluid_name) * ureg.Pa
+        T_crit = PropsSI('T_critical', coolprop_name) * ureg.K
+        p_crit = PropsSI('p_critical', coolprop_name) * ureg.Pa
         properties_crit = {'T': T_crit, 'p': p_crit}
-        self.critical_point = FluidState(fluid_name=fluid_name, properties=properties_crit)
+        self.critical_point = FluidState(fluid_name=fluid_name, properties=properties_crit, backend=self.backend)
 
-        T_triple = PropsSI('T_triple', fluid_name) * ureg.K
+        T_triple = PropsSI('T_triple', coolprop_name) * ureg.K
         properties_triple_liquid = {'x': 0, 'T': T_triple}
-        self.triple_point_liquid = FluidState(fluid_name=fluid_name, properties=properties_triple_liquid)
+        self.triple_point_liquid = FluidState(fluid_name=fluid_name, properties=properties_triple_liquid,
+                                              backend=self.backend)
         properties_triple_vapor = {'x': 1, 'T': T_triple}
-        self.triple_point_vapor = FluidState(fluid_name=fluid_name, properties=properties_triple_vapor)
+        self.triple_point_vapor = FluidState(fluid_name=fluid_name, properties=properties_triple_vapor,
+                                             backend=self.backend)
 
     def get_saturation_line(self, x: int, space_property: str, space: str = 'linear', n_points: int = 10):
         if x is 0:
@@ -54,7 +59,7 @@ class AbstractFluid:
         else:
             raise ValueError(f'"{space}" is not valid for property "space"')
         properties = [{iso_property_name: iso_property_value, space_property: v} for v in range]
-        return [FluidState(fluid_name=self.fluid_name, properties=p) for p in properties]
+        return [FluidState(fluid_name=self.fluid_name, properties=p, backend=self.backend) for p in properties]
 
     @property
     def T_triple(self) -> ureg.Quantity:
@@ -75,8 +80,11 @@ class FluidState:
         except Exception:
             pass
 
-    def __init__(self, fluid_name: str, properties: dict):
+    def __init__(self, fluid_name: str, properties: dict, backend: str = None):
+        from .fluid_state import get_backend, coolprop_fluid_name  # the engine package is only loaded when used
         self.fluid_name = fluid_name
+        self.backend = get_backend(fluid_name, backend)
+        self._coolprop_name = coolprop_fluid_name(fluid_name, self.backend)
         self.cp_inputs = {}
         for pn, value in properties.items():
             if pn == 'v':
@@ -219,15 +227,16 @@ class FluidState:
     def get_property_from_coolprop(self, coolprop_property_name: str):
         if coolprop_property_name in ['T_critical', 'p_critical', 'rhomass_critical', 'rhomolar_critical',
                                       'T_triple', 'p_triple']:  # todo: add reducing point?
-            return PropsSI(coolprop_property_name, self.fluid_name)
+            return PropsSI(coolprop_property_name, self._coolprop_name)
         pns = list(self.cp_inputs.keys())
         values = list(self.cp_inputs.values())
         try:
             if coolprop_property_name == 'phase':
-                return CP.PhaseSI(pns[0], values[0].magnitude, pns[1], values[1].magnitude, self.fluid_name)
+                return CP.PhaseSI(pns[0], values[0].magnitude, pns[1], values[1].magnitude,
+                                  self._coolprop_name)
             else:
                 return PropsSI(coolprop_property_name, pns[0], values[0].magnitude, pns[1], values[1].magnitude,
-                               self.fluid_name)
+                               self._coolprop_name)
         except Exception as e:
             return np.nan
 
@@ -241,9 +250,9 @@ class FluidState:
 
 
 class Fluid(AbstractFluid, FluidState):
-    def __init__(self, fluid_name: str, properties: dict, amount):
-        AbstractFluid.__init__(self, fluid_name=fluid_name)
-        FluidState.__init__(self, fluid_name=fluid_name, properties=properties)
+    def __init__(self, fluid_name: str, properties: dict, amount, backend: str = None):
+        AbstractFluid.__init__(self, fluid_name=fluid_name, backend=backend)
+        FluidState.__init__(self, fluid_name=fluid_name, properties=properties, backend=backend)
         self._amount = amount
 
     @property
@@ -340,7 +349,7 @@ class Process:
         iso_property_value = fluid.get_property(iso_property_name)
         properties = {changing_property_name: changing_property_value,
                       iso_property_name: iso_property_value}
-        return Fluid(fluid_name=fluid.fluid_name, amount=fluid.m, properties=properties)
+        return Fluid(fluid_name=fluid.fluid_name, amount=fluid.m, properties=properties, backend=fluid.backend)
 
     def summary(self):
         print(f'\nSummary for {self}')
@@ -357,12 +366,12 @@ class ThermoChart:
     KINDS = ['pv', 'ts']
 
     def __init__(self, kind: str, fluid: str, x_property: str, x_unit:str, y_property:str, y_unit:str,
-                 states=None, processes=None, show=True, x_log:bool=False, y_log:bool=False):
+                 states=None, processes=None, show=True, x_log:bool=False, y_log:bool=False, backend: str = None):
         if kind not in self.KINDS:
             raise ValueError(f'kind "{kind}" not in {self.KINDS}')
         self.kind = kind
 
-        self.fluid = AbstractFluid(fluid)
+        self.fluid = AbstractFluid(fluid, backend)
 
         states = [] if states is None else states
         states = [states] if type(states) is not list else states